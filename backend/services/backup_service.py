@@ -0,0 +1,200 @@
+# Path: backend/services/backup_service.py
+import gzip
+import shutil
+import sqlite3
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .database import Database
+
+logger = logging.getLogger(__name__)
+
+# Compressed, deduplicated snapshots of wishes.db
+# Snapshots are taken with SQLite's online backup API, hashed, gzipped and
+# pruned by a keep-last / daily / weekly retention policy
+
+BACKUP_PREFIX = "wishes_"
+BACKUP_SUFFIX = ".db.gz"
+LEGACY_PREFIX = "wishes_backup_"
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S_%f"
+CHUNK_SIZE = 1 << 20
+
+class BackupService:
+    def __init__(self, database: Database, backups_path: Path, keep_last: int = 5,
+                 keep_daily: int = 7, keep_weekly: int = 4, pages_per_step: int = 256):
+        self.database = database
+        self.backups_path = Path(backups_path)
+        self.backups_path.mkdir(parents=True, exist_ok=True)
+        self.keep_last = keep_last
+        self.keep_daily = keep_daily
+        self.keep_weekly = keep_weekly
+        self.pages_per_step = pages_per_step
+        self._lock = threading.Lock()
+
+    def create_backup(self) -> Dict:
+
+        # Snapshots the live database in page-stepped chunks, so imports and reads
+        # keep running, then compresses it while hashing the raw pages
+        # A snapshot identical to the newest backup is discarded instead of stored
+
+        with self._lock:
+            snapshot = self.backups_path / "snapshot.partial"
+            archive = self.backups_path / "archive.partial"
+            try:
+                snapshot.unlink(missing_ok=True)
+                self.database.backup_to(snapshot, pages=self.pages_per_step)
+                digest = hashlib.sha256()
+                with open(snapshot, 'rb') as source, gzip.open(archive, 'wb', compresslevel=6) as target:
+                    for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                        digest.update(chunk)
+                        target.write(chunk)
+                content_hash = digest.hexdigest()[:16]
+
+                backups = self._scan()
+                if backups and backups[0]["hash"] == content_hash:
+                    logger.info(f"Database unchanged since {backups[0]['name']}, skipping backup")
+                    return {"success": True, "skipped": True, **self._public(backups[0])}
+
+                created = datetime.now()
+                name = f"{BACKUP_PREFIX}{created.strftime(TIMESTAMP_FORMAT)}_{content_hash}{BACKUP_SUFFIX}"
+                archive.replace(self.backups_path / name)
+                logger.info(f"Created backup {name}")
+
+                self._prune()
+                backup = next(b for b in self._scan() if b["name"] == name)
+                return {"success": True, "skipped": False, **self._public(backup)}
+            except Exception as e:
+                logger.error(f"Backup failed: {e}")
+                return {"success": False, "error": str(e)}
+            finally:
+                snapshot.unlink(missing_ok=True)
+                archive.unlink(missing_ok=True)
+
+    def list_backups(self) -> Dict:
+        """List backups, newest first"""
+        try:
+            return {"success": True, "data": [self._public(b) for b in self._scan()]}
+        except OSError as e:
+            logger.error(f"Failed to list backups: {e}")
+            return {"success": False, "error": str(e)}
+
+    def find_backup(self, name: str) -> Optional[Dict]:
+        """The public details of the backup with this name, or None"""
+        with self._lock:
+            backup = next((b for b in self._scan() if b["name"] == name), None)
+        return self._public(backup) if backup else None
+
+    def extract_backup(self, name: str, target: Path) -> Dict:
+        """Write the plain SQLite file of a backup to target and check its integrity"""
+        backup = next((b for b in self._scan() if b["name"] == name), None)
+        if backup is None:
+            raise ValueError(f"Backup not found: {name}")
+        if backup["compressed"]:
+            with gzip.open(backup["path"], 'rb') as source, open(target, 'wb') as f:
+                shutil.copyfileobj(source, f, CHUNK_SIZE)
+        else:
+            shutil.copyfile(backup["path"], target)
+
+        conn = sqlite3.connect(target)
+        try:
+            check = conn.execute('PRAGMA quick_check').fetchone()[0]
+        finally:
+            conn.close()
+        if check != 'ok':
+            raise sqlite3.DatabaseError(f"Backup is corrupt: {check}")
+        return self._public(backup)
+
+    def restore_backup(self, name: str) -> Dict:
+        """Restore the database to a backup, keeping a backup of the current state first"""
+        if self.find_backup(name) is None:
+            return {"success": False, "error": f"Backup not found: {name}"}
+
+        current = self.create_backup()
+        if not current["success"]:
+            return {"success": False, "error": f"Could not back up current data: {current['error']}"}
+
+        with self._lock:
+            restored = self.backups_path / "restore.partial"
+            try:
+                backup = self.extract_backup(name, restored)
+                self.database.restore_from(restored)
+                logger.info(f"Restored database from {name}")
+                return {
+                    "success": True,
+                    "restored": backup,
+                    "safety_backup": current.get("name"),
+                    "message": "Backup restored successfully"
+                }
+            except Exception as e:
+                logger.error(f"Restore failed: {e}")
+                return {"success": False, "error": str(e)}
+            finally:
+                restored.unlink(missing_ok=True)
+
+    def _scan(self) -> List[Dict]:
+        """Backups on disk, newest first, including uncompressed ones from older versions"""
+        backups = []
+        for path in self.backups_path.iterdir():
+            backup = self._parse_name(path)
+            if backup:
+                backups.append(backup)
+        return sorted(backups, key=lambda b: b["created"], reverse=True)
+
+    def _parse_name(self, path: Path) -> Optional[Dict]:
+        name = path.name
+        try:
+            if name.startswith(LEGACY_PREFIX) and name.endswith(".db"):
+                created = datetime.strptime(name[len(LEGACY_PREFIX):-3], "%Y%m%d_%H%M%S")
+                content_hash, compressed = None, False
+            elif name.startswith(BACKUP_PREFIX) and name.endswith(BACKUP_SUFFIX):
+                stamp, content_hash = name[len(BACKUP_PREFIX):-len(BACKUP_SUFFIX)].rsplit('_', 1)
+                created = datetime.strptime(stamp, TIMESTAMP_FORMAT)
+                compressed = True
+            else:
+                return None
+        except ValueError:
+            return None
+        return {
+            "name": name,
+            "path": path,
+            "created": created,
+            "hash": content_hash,
+            "compressed": compressed,
+            "size": path.stat().st_size
+        }
+
+    def _public(self, backup: Dict) -> Dict:
+        return {
+            "name": backup["name"],
+            "path": str(backup["path"]),
+            "created": backup["created"].isoformat(timespec='seconds'),
+            "hash": backup["hash"],
+            "compressed": backup["compressed"],
+            "size": backup["size"]
+        }
+
+    def _prune(self):
+        """Apply the retention policy: the newest N backups plus the newest of each recent day and week"""
+        backups = self._scan()
+        keep = {b["name"] for b in backups[:self.keep_last]}
+        days, weeks = {}, {}
+        for backup in backups:
+            day = backup["created"].date()
+            week = backup["created"].isocalendar()[:2]
+            if day not in days and len(days) < self.keep_daily:
+                days[day] = backup["name"]
+            if week not in weeks and len(weeks) < self.keep_weekly:
+                weeks[week] = backup["name"]
+        keep.update(days.values(), weeks.values())
+
+        for backup in backups:
+            if backup["name"] not in keep:
+                try:
+                    backup["path"].unlink()
+                    logger.info(f"Pruned backup {backup['name']}")
+                except OSError as e:
+                    logger.warning(f"Could not prune backup {backup['name']}: {e}")
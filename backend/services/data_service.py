@@ -1,12 +1,19 @@
 # Path: backend/services/data_service.py
 import json
 import sqlite3
-import shutil
 import platform
 from datetime import datetime
 from pathlib import Path
 import logging
-from typing import Dict, Optional, List
+from typing import Callable, Dict, Optional, List
+from .uigf import UIGFReader, UIGFFormatError, write_uigf
+from .database import (
+    WISH_COLUMNS, Database, get_database, upsert_wishes, refresh_pity, wish_to_row, row_to_wish,
+    merge_wishes, start_import_session, finish_import_session, import_session, rebuild_summaries
+)
+from .history_cache import get_history_cache
+from .backup_service import BackupService
+from .exporter import EXPORT_FORMATS, export_wishes
 
 logger = logging.getLogger(__name__)
 
@@ -22,61 +29,44 @@ class DataService:
         self.db_path = self.app_data_path / "wishes.db"
         self.backups_path = self.app_data_path / "backups"
         self.backups_path.mkdir(parents=True, exist_ok=True)
-
-    def _get_connection(self):
-        """Create a new database connection with row factory"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
-
-    def _ensure_table_exists(self, conn):
-        """Ensure wishes table exists with correct schema"""
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS wishes (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                rarity INTEGER NOT NULL,
-                type TEXT NOT NULL,
-                time TIMESTAMP NOT NULL,
-                bannerType TEXT NOT NULL
-            )
-        ''')
-        # Add indexes for performance
-        conn.execute('CREATE INDEX IF NOT EXISTS idx_wishes_time ON wishes(time)')
-        conn.execute('CREATE INDEX IF NOT EXISTS idx_wishes_bannerType ON wishes(bannerType)')
-        conn.execute('CREATE INDEX IF NOT EXISTS idx_wishes_rarity ON wishes(rarity)')
-        conn.commit()
+        self.db = get_database(self.db_path)
+        self.backup_service = BackupService(self.db, self.backups_path)
 
     def get_wishes(self) -> List[Dict]:
         """Get all wishes from database"""
         try:
-            with self._get_connection() as conn:
-                self._ensure_table_exists(conn)
-                cursor = conn.execute('SELECT * FROM wishes ORDER BY time DESC')
-                return [dict(row) for row in cursor.fetchall()]
+            return get_history_cache(self.db).get().records()
         except Exception as e:
             logger.error(f"Failed to get wishes: {e}")
             return []
 
-    def export_data(self, format: str = "json") -> Dict:
-        # Export all data to JSON format
+    def export_data(self, format: str = "json", with_pity: bool = False,
+                    progress_callback: Optional[Callable] = None) -> Dict:
+
+        # Exports the wish history as JSON, JSON Lines, CSV, Parquet or Excel (xlsx)
+        # Rows are streamed from the database in batches rather than loaded whole,
+        # optionally with the pity stored for each wish
+
         try:
-            wishes = self.get_wishes()
-            if not wishes:
-                return {"success": False, "error": "No data to export"}
+            format = format.lower()
+            if format not in EXPORT_FORMATS:
+                return {"success": False, "error": "Unsupported format"}
 
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
-            if format.lower() == "json":
-                export_path = Path.home() / "Documents" / f"genshin_wishes_{timestamp}.json"
-                with open(export_path, 'w', encoding='utf-8') as f:
-                    json.dump(wishes, f, ensure_ascii=False, indent=2)
-                return {
-                    "success": True,
-                    "path": str(export_path),
-                    "count": len(wishes)
-                }
-            return {"success": False, "error": "Unsupported format"}
+            export_path = Path.home() / "Documents" / f"genshin_wishes_{timestamp}{EXPORT_FORMATS[format]}"
+            export_path.parent.mkdir(parents=True, exist_ok=True)
+            count = export_wishes(self.db, export_path, format, with_pity=with_pity,
+                                  progress_callback=progress_callback)
+
+            if count == 0:
+                export_path.unlink(missing_ok=True)
+                return {"success": False, "error": "No data to export"}
+            return {
+                "success": True,
+                "path": str(export_path),
+                "format": format,
+                "count": count
+            }
         except Exception as e:
             logger.error(f"Export failed: {e}")
             return {"success": False, "error": str(e)}
@@ -98,27 +88,23 @@ class DataService:
             for wish in wishes:
                 if not all(field in wish for field in required_fields):
                     raise ValueError("Missing required fields in wish data")
+            rows = [wish_to_row(wish) for wish in wishes]
 
-            with self._get_connection() as conn:
-                self._ensure_table_exists(conn)
-                
-                # Begin transaction
-                conn.execute('BEGIN TRANSACTION')
-                try:
-                    # Clear existing data
-                    conn.execute('DELETE FROM wishes')
-                    
-                    # Insert new data
-                    conn.executemany('''
-                        INSERT INTO wishes (id, name, rarity, type, time, bannerType)
-                        VALUES (:id, :name, :rarity, :type, :time, :bannerType)
-                    ''', wishes)
-                    
-                    # Commit transaction
-                    conn.execute('COMMIT')
-                except Exception as e:
-                    conn.execute('ROLLBACK')
-                    raise e
+            # Replace everything in one transaction, rolled back on any error
+            with self.db.writer() as conn:
+                # Clear existing data
+                conn.execute('DELETE FROM wishes')
+                conn.execute('DELETE FROM import_checkpoints')
+                conn.execute('DELETE FROM import_sessions')
+
+                # Insert new data
+                session_id = start_import_session(conn, "json")
+                conn.executemany(f'''
+                    INSERT INTO wishes ({WISH_COLUMNS}, banner_group, session_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [(*row, session_id) for row in rows])
+                refresh_pity(conn)
+                finish_import_session(conn, session_id)
 
             return {
                 "success": True,
@@ -129,19 +115,149 @@ class DataService:
             logger.error(f"Import failed: {e}")
             return {"success": False, "error": str(e)}
 
+    def import_uigf(self, file_path: str, uid: Optional[str] = None, chunk_size: int = 5000) -> Dict:
+
+        # Streams wishes from a UIGF file on disk into the database
+        # Records are validated one by one and merged in chunked transactions,
+        # so existing wishes are kept and memory stays bounded for huge archives
+
+        try:
+            path = Path(file_path)
+            if not path.is_file():
+                raise ValueError(f"File not found: {file_path}")
+
+            self._create_backup()
+            with open(path, 'r', encoding='utf-8') as f, import_session(self.db, "uigf") as session_id:
+                reader = UIGFReader(f, uid=uid)
+                totals = {"inserted": 0, "updated": 0, "unchanged": 0}
+                chunk = []
+                for wish in reader:
+                    chunk.append(wish)
+                    if len(chunk) >= chunk_size:
+                        self._upsert_wishes(chunk, totals, session_id)
+                        chunk = []
+                self._upsert_wishes(chunk, totals, session_id)
+
+            if reader.count == 0:
+                raise ValueError("No importable wishes found in file")
+
+            logger.info(f"Imported {reader.count} wishes from UIGF file, skipped {reader.skipped}")
+            return {
+                "success": True,
+                "count": reader.count,
+                "skipped": reader.skipped,
+                **totals,
+                "uid": reader.uid,
+                "version": reader.version,
+                "session_id": session_id,
+                "message": "UIGF data imported successfully"
+            }
+        except UIGFFormatError as e:
+            logger.error(f"UIGF import failed: {e}")
+            return {"success": False, "error": f"Invalid UIGF file: {e}"}
+        except Exception as e:
+            logger.error(f"UIGF import failed: {e}")
+            return {"success": False, "error": str(e)}
+
+    def merge_database(self, source: str) -> Dict:
+
+        # Merges the wishes of a backup (by name) or another wishes.db (by path)
+        # into the live history without deleting anything
+        # The source is copied and migrated to the current schema, attached, and
+        # unioned by wish id in one INSERT ... SELECT; live rows win conflicts
+
+        working = self.backups_path / "merge.partial"
+        try:
+            self._remove_database_files(working)
+            backup = self.backup_service.find_backup(source)
+            if backup:
+                self.backup_service.extract_backup(source, working)
+                label = backup["name"]
+            else:
+                path = Path(source)
+                if not path.is_file():
+                    raise ValueError(f"Backup or database not found: {source}")
+                # The backup API also copies pages still in the source's WAL
+                source_conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+                target_conn = sqlite3.connect(working)
+                try:
+                    source_conn.backup(target_conn)
+                finally:
+                    target_conn.close()
+                    source_conn.close()
+                label = path.name
+            Database(working).close()
+
+            self._create_backup()
+            with self.db.attached(working, "source"), self.db.writer() as conn:
+                session_id = start_import_session(conn, f"merge:{label}")
+                result = merge_wishes(conn, "source", session_id)
+                finish_import_session(conn, session_id)
+
+            logger.info(
+                f"Merged {result['inserted']} wishes from {label}, "
+                f"{result['conflict_count']} conflicts kept the live version"
+            )
+            return {
+                "success": True,
+                **result,
+                "session_id": session_id,
+                "message": f"Merged {result['inserted']} wishes from {label}"
+            }
+        except Exception as e:
+            logger.error(f"Merge failed: {e}")
+            return {"success": False, "error": str(e)}
+        finally:
+            self._remove_database_files(working)
+
+    def _remove_database_files(self, path: Path):
+        for suffix in ("", "-wal", "-shm"):
+            path.with_name(path.name + suffix).unlink(missing_ok=True)
+
+    def _upsert_wishes(self, wishes: List[Dict], totals: Dict[str, int], session_id: Optional[int] = None):
+        """Write one chunk of wishes in its own transaction, adding its counts to totals"""
+        if not wishes:
+            return
+        with self.db.writer() as conn:
+            counts = upsert_wishes(conn, wishes, session_id)
+        for key, count in counts.items():
+            totals[key] += count
+
+    def export_uigf(self, uid: str, app_version: str = "") -> Dict:
+        """Export the wish history as a UIGF v4.0 file, streamed row by row from the database"""
+        try:
+            uid = str(uid).strip()
+            if not uid.isdigit():
+                raise ValueError("A numeric game UID is required for UIGF export")
+
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            export_path = Path.home() / "Documents" / f"genshin_wishes_uigf_{timestamp}.json"
+            export_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.db.reader() as conn:
+                cursor = conn.execute(f'SELECT {WISH_COLUMNS} FROM wishes ORDER BY time ASC, id ASC')
+                with open(export_path, 'w', encoding='utf-8') as f:
+                    count = write_uigf(f, (row_to_wish(row) for row in cursor), uid, app_version)
+
+            if count == 0:
+                export_path.unlink(missing_ok=True)
+                return {"success": False, "error": "No data to export"}
+            return {
+                "success": True,
+                "path": str(export_path),
+                "count": count
+            }
+        except Exception as e:
+            logger.error(f"UIGF export failed: {e}")
+            return {"success": False, "error": str(e)}
+
     def reset_data(self) -> Dict:
         """Reset all data in database"""
         try:
             self._create_backup()
-            with self._get_connection() as conn:
-                self._ensure_table_exists(conn)
-                conn.execute('BEGIN TRANSACTION')
-                try:
-                    conn.execute('DELETE FROM wishes')
-                    conn.execute('COMMIT')
-                except Exception as e:
-                    conn.execute('ROLLBACK')
-                    raise e
+            with self.db.writer() as conn:
+                conn.execute('DELETE FROM wishes')
+                conn.execute('DELETE FROM import_checkpoints')
+                conn.execute('DELETE FROM import_sessions')
             return {
                 "success": True,
                 "message": "All data has been reset"
@@ -150,16 +266,24 @@ class DataService:
             logger.error(f"Reset failed: {e}")
             return {"success": False, "error": str(e)}
 
-    def _create_backup(self) -> Optional[str]:
-        """Create a backup of the current database"""
+    def rebuild_summaries(self) -> Dict:
+        """Recompute the wish and item summary tables from the wishes themselves"""
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = self.backups_path / f"wishes_backup_{timestamp}.db"
-            
-            if self.db_path.exists():
-                shutil.copy2(self.db_path, backup_path)
-                return str(backup_path)
-            return None
+            with self.db.writer() as conn:
+                rebuild_summaries(conn)
+                wishes = conn.execute('SELECT COALESCE(SUM(wishes), 0) FROM wish_totals').fetchone()[0]
+                items = conn.execute('SELECT COUNT(*) FROM item_totals').fetchone()[0]
+            return {
+                "success": True,
+                "wishes": wishes,
+                "items": items,
+                "message": "Summaries rebuilt"
+            }
         except Exception as e:
-            logger.error(f"Backup failed: {e}")
-            return None
\ No newline at end of file
+            logger.error(f"Summary rebuild failed: {e}")
+            return {"success": False, "error": str(e)}
+
+    def _create_backup(self) -> Optional[str]:
+        """Back up the current database, reusing the newest backup if nothing changed"""
+        result = self.backup_service.create_backup()
+        return result.get("path") if result["success"] else None
@@ -0,0 +1,794 @@
+# Path: backend/services/database.py
+import re
+import json
+import time
+import queue
+import sqlite3
+import calendar
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .pity_kernel import pity_counters
+
+logger = logging.getLogger(__name__)
+
+# Shared SQLite access layer for wishes.db
+# One serialized write connection plus a pool of read connections in WAL mode,
+# so bridge calls can keep reading while an import is writing
+# The schema is migrated once when the database is first opened
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Banners that share pity map to one group code; both character event banners are group 1
+BANNER_GROUPS = {
+    'character-1': 1,
+    'character-2': 1,
+    'weapon': 2,
+    'permanent': 3,
+    'chronicled': 4
+}
+# Group codes by the names the frontend filters on
+GROUP_CODES = {
+    'character': 1,
+    'weapon': 2,
+    'permanent': 3,
+    'chronicled': 4
+}
+
+WISH_COLUMNS = 'id, name, rarity, type, time, bannerType'
+
+def fts_query(text: str) -> Optional[str]:
+    """Turn free text into an FTS5 query matching every word as a prefix, or None if it has no words"""
+    words = re.findall(r'\w+', str(text or ''))
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+def banner_condition(banner: Optional[str]) -> Optional[Tuple[str, object]]:
+    """The SQL condition and parameter for a banner filter, or None for an empty or 'all' filter.
+
+    A group name ('character') matches every banner sharing that pity; a
+    banner type ('character-2') matches that banner alone.
+    """
+    if not banner or banner == 'all':
+        return None
+    if banner in GROUP_CODES:
+        # Indexed by (banner_group, time, id)
+        return 'banner_group = ?', GROUP_CODES[banner]
+    if banner in BANNER_GROUPS:
+        return 'bannerType = ?', banner
+    raise ValueError(f"Unknown banner filter: {banner}")
+
+def date_range(filters: Dict) -> Tuple[Optional[int], Optional[int]]:
+    """The date_from / date_to filters as epoch seconds: inclusive start, exclusive end.
+
+    Dates are inclusive calendar days in the wishes' own server time; a full
+    timestamp as date_to includes that second.
+    """
+    start = end = None
+    if filters.get('date_from'):
+        start = to_epoch(filters['date_from'])
+    date_to = filters.get('date_to')
+    if date_to:
+        end = to_epoch(date_to) + (86400 if len(str(date_to).strip()) == 10 else 1)
+    return start, end
+
+def to_epoch(value) -> int:
+    """Convert a wish time to epoch seconds.
+
+    Wish times are the server's local wall clock without an offset, so they
+    are stored as if they were UTC and convert back to the same string.
+    """
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip()
+    try:
+        parsed = datetime.strptime(text[:19], TIME_FORMAT)
+    except ValueError:
+        parsed = datetime.fromisoformat(text)
+    return calendar.timegm(parsed.replace(tzinfo=None).timetuple())
+
+def from_epoch(value: int) -> str:
+    return time.strftime(TIME_FORMAT, time.gmtime(value))
+
+def wish_to_row(wish: Dict) -> Tuple:
+    """Convert an app wish dict to a wishes row, in WISH_COLUMNS order plus banner_group"""
+    return (
+        int(wish['id']),
+        wish['name'],
+        int(wish['rarity']),
+        wish['type'],
+        to_epoch(wish['time']),
+        wish['bannerType'],
+        BANNER_GROUPS.get(wish['bannerType'], 0)
+    )
+
+# Select this next to WISH_COLUMNS to get the pity shown for each wish:
+# pulls since the previous 5★ for a 5★, since the previous 4★ for a 4★, else 0
+PITY_COLUMN = 'CASE rarity WHEN 5 THEN pity_5 WHEN 4 THEN pity_4 ELSE 0 END AS pity'
+
+def row_to_wish(row) -> Dict:
+    """Convert a wishes row back to the dict shape the app and frontend use"""
+    wish = {
+        "id": str(row['id']),
+        "name": row['name'],
+        "rarity": row['rarity'],
+        "type": row['type'],
+        "time": from_epoch(row['time']),
+        "bannerType": row['bannerType']
+    }
+    if 'pity' in row.keys():
+        wish['pity'] = row['pity']
+    return wish
+
+# Schema migrations, applied in order; a database's PRAGMA user_version is
+# the number of migrations it has already run
+
+def _migrate_v1(conn: sqlite3.Connection):
+    """Original schema; a no-op for databases created before versioning"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS wishes (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            rarity INTEGER NOT NULL,
+            type TEXT NOT NULL,
+            time TIMESTAMP NOT NULL,
+            bannerType TEXT NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_wishes_time ON wishes(time)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_wishes_bannerType ON wishes(bannerType)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_wishes_rarity ON wishes(rarity)')
+    # Pagination cursors of interrupted imports, one per gacha_type
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS import_checkpoints (
+            gacha_type TEXT PRIMARY KEY,
+            end_id TEXT NOT NULL,
+            stop_id INTEGER,
+            authkey_hash TEXT NOT NULL,
+            uid TEXT,
+            updated_at TIMESTAMP NOT NULL
+        )
+    ''')
+
+def _migrate_v2(conn: sqlite3.Connection):
+    """Integer wish ids as the rowid, epoch-second times and a banner group code.
+
+    Wish ids grow with every pull, so (banner_group, id) orders a pity group
+    chronologically, including the ten wishes of a 10-pull that share a time.
+    """
+    conn.execute('''
+        CREATE TABLE wishes_v2 (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            rarity INTEGER NOT NULL,
+            type TEXT NOT NULL,
+            time INTEGER NOT NULL,
+            bannerType TEXT NOT NULL,
+            banner_group INTEGER NOT NULL
+        )
+    ''')
+    # Rows the new schema cannot hold are kept aside with the reason, not dropped
+    conn.execute('''
+        CREATE TABLE wishes_quarantine (
+            id TEXT,
+            name TEXT,
+            rarity INTEGER,
+            type TEXT,
+            time TEXT,
+            bannerType TEXT,
+            reason TEXT NOT NULL
+        )
+    ''')
+    rows = {}
+    quarantined = []
+    for row in conn.execute(f'SELECT {WISH_COLUMNS} FROM wishes'):
+        try:
+            converted = wish_to_row(dict(row))
+        except (TypeError, ValueError) as e:
+            quarantined.append((*row, f"unreadable id or time: {e}"))
+            continue
+        if converted[0] in rows:
+            quarantined.append((*row, f"duplicate id {converted[0]}"))
+            continue
+        rows[converted[0]] = converted
+    if quarantined:
+        logger.warning(f"Moved {len(quarantined)} wishes the new schema cannot hold to wishes_quarantine")
+        conn.executemany(f'''
+            INSERT INTO wishes_quarantine ({WISH_COLUMNS}, reason) VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', quarantined)
+    conn.executemany(f'''
+        INSERT INTO wishes_v2 ({WISH_COLUMNS}, banner_group)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', rows.values())
+    conn.execute('DROP TABLE wishes')
+    conn.execute('ALTER TABLE wishes_v2 RENAME TO wishes')
+    conn.execute('CREATE INDEX idx_wishes_group ON wishes(banner_group, id, rarity)')
+    conn.execute('CREATE INDEX idx_wishes_time ON wishes(time, id)')
+    conn.execute('CREATE INDEX idx_wishes_bannerType ON wishes(bannerType, id)')
+
+def _migrate_v3(conn: sqlite3.Connection):
+    """Materialized pity counters, kept current by upsert_wishes.
+
+    pity_5 and pity_4 count the pulls in the banner group since the previous
+    5★ / 4★, including the wish itself, in (time, id) order.
+    """
+    conn.execute('ALTER TABLE wishes ADD COLUMN pity_5 INTEGER NOT NULL DEFAULT 0')
+    conn.execute('ALTER TABLE wishes ADD COLUMN pity_4 INTEGER NOT NULL DEFAULT 0')
+    conn.execute('CREATE INDEX idx_wishes_group_time ON wishes(banner_group, time, id)')
+    refresh_pity(conn)
+
+def _migrate_v4(conn: sqlite3.Connection):
+    """Full-text index over item names, kept in sync with wishes by triggers.
+
+    External-content FTS5 stores only the index, keyed by wish id. unicode61
+    folds case and diacritics in any script, and prefix indexes answer
+    as-you-type lookups without scanning the term list.
+    """
+    conn.execute('''
+        CREATE VIRTUAL TABLE wishes_fts USING fts5(
+            name, content='wishes', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+        )
+    ''')
+    conn.execute('''
+        CREATE TRIGGER wishes_fts_insert AFTER INSERT ON wishes BEGIN
+            INSERT INTO wishes_fts(rowid, name) VALUES (new.id, new.name);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER wishes_fts_delete AFTER DELETE ON wishes BEGIN
+            INSERT INTO wishes_fts(wishes_fts, rowid, name) VALUES ('delete', old.id, old.name);
+        END
+    ''')
+    # Pity updates do not touch the name, so they skip the index
+    conn.execute('''
+        CREATE TRIGGER wishes_fts_update AFTER UPDATE OF id, name ON wishes BEGIN
+            INSERT INTO wishes_fts(wishes_fts, rowid, name) VALUES ('delete', old.id, old.name);
+            INSERT INTO wishes_fts(rowid, name) VALUES (new.id, new.name);
+        END
+    ''')
+    conn.execute("INSERT INTO wishes_fts(wishes_fts) VALUES ('rebuild')")
+
+def _migrate_v5(conn: sqlite3.Connection):
+    """Ledger of import sessions, and the session that first brought in each wish.
+
+    Only inserts set session_id, so a session's wishes are exactly the ones it
+    added; the (session_id, time, id) index answers "new since the last
+    import" without diffing histories.
+    """
+    conn.execute('''
+        CREATE TABLE import_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT NOT NULL,
+            started INTEGER NOT NULL,
+            finished INTEGER,
+            status TEXT NOT NULL DEFAULT 'running',
+            new_count INTEGER NOT NULL DEFAULT 0,
+            banner_counts TEXT NOT NULL DEFAULT '{}',
+            first_wish_id INTEGER,
+            last_wish_id INTEGER
+        )
+    ''')
+    conn.execute('''
+        ALTER TABLE wishes ADD COLUMN session_id INTEGER
+        REFERENCES import_sessions(id) ON DELETE SET NULL
+    ''')
+    conn.execute('CREATE INDEX idx_wishes_session ON wishes(session_id, time, id)')
+
+def _migrate_v6(conn: sqlite3.Connection):
+    """Summary tables kept current by triggers on wishes.
+
+    wish_totals holds the wish count per banner group and rarity; item_totals
+    holds how often each item was obtained. Every insert, delete and update of
+    a counted column adjusts one row of each, so dashboard totals are read
+    without touching wishes. Pity sums are left out: refresh_pity rewrites the
+    pity of many rows on each import, and a trigger on those updates would
+    cost more than the sums save. rebuild_summaries recomputes both tables.
+    """
+    conn.execute('''
+        CREATE TABLE wish_totals (
+            banner_group INTEGER NOT NULL,
+            rarity INTEGER NOT NULL,
+            wishes INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (banner_group, rarity)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE item_totals (
+            name TEXT NOT NULL,
+            type TEXT NOT NULL,
+            rarity INTEGER NOT NULL,
+            obtained INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (name, type, rarity)
+        ) WITHOUT ROWID
+    ''')
+    for statement in SUMMARY_TRIGGERS:
+        conn.execute(statement)
+    rebuild_summaries(conn)
+
+# Each change to wishes moves its row's contribution between summary rows;
+# emptied item rows are dropped, group rows stay at zero
+_ADD_WISH_TOTALS = '''
+    INSERT INTO wish_totals (banner_group, rarity, wishes) VALUES (new.banner_group, new.rarity, 1)
+    ON CONFLICT (banner_group, rarity) DO UPDATE SET wishes = wishes + 1;
+'''
+_REMOVE_WISH_TOTALS = '''
+    UPDATE wish_totals SET wishes = wishes - 1
+    WHERE banner_group = old.banner_group AND rarity = old.rarity;
+'''
+_ADD_ITEM_TOTALS = '''
+    INSERT INTO item_totals (name, type, rarity, obtained) VALUES (new.name, new.type, new.rarity, 1)
+    ON CONFLICT (name, type, rarity) DO UPDATE SET obtained = obtained + 1;
+'''
+_REMOVE_ITEM_TOTALS = '''
+    UPDATE item_totals SET obtained = obtained - 1
+    WHERE name = old.name AND type = old.type AND rarity = old.rarity;
+    DELETE FROM item_totals
+    WHERE name = old.name AND type = old.type AND rarity = old.rarity AND obtained <= 0;
+'''
+SUMMARY_TRIGGERS = [
+    f'CREATE TRIGGER wishes_totals_insert AFTER INSERT ON wishes BEGIN {_ADD_WISH_TOTALS} {_ADD_ITEM_TOTALS} END',
+    f'CREATE TRIGGER wishes_totals_delete AFTER DELETE ON wishes BEGIN {_REMOVE_WISH_TOTALS} {_REMOVE_ITEM_TOTALS} END',
+    # Upserts rewrite every column of a re-imported wish, so only real moves count
+    f'''CREATE TRIGGER wishes_totals_update AFTER UPDATE OF banner_group, rarity ON wishes
+        WHEN (old.banner_group, old.rarity) IS NOT (new.banner_group, new.rarity)
+        BEGIN {_REMOVE_WISH_TOTALS} {_ADD_WISH_TOTALS} END''',
+    f'''CREATE TRIGGER wishes_items_update AFTER UPDATE OF name, type, rarity ON wishes
+        WHEN (old.name, old.type, old.rarity) IS NOT (new.name, new.type, new.rarity)
+        BEGIN {_REMOVE_ITEM_TOTALS} {_ADD_ITEM_TOTALS} END'''
+]
+
+MIGRATIONS = [_migrate_v1, _migrate_v2, _migrate_v3, _migrate_v4, _migrate_v5, _migrate_v6]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    # WAL keeps NORMAL crash-safe; only the last transactions can roll back on power loss
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-16000',  # 16 MiB page cache per connection
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA foreign_keys=ON',
+    'PRAGMA busy_timeout=5000'
+]
+
+class Database:
+    def __init__(self, db_path: Path, read_pool_size: int = 4):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.read_pool_size = read_pool_size
+        self._write_lock = threading.RLock()
+        self._write_depth = 0
+        # Bumped by every committed write transaction that changed rows; only
+        # written under the write lock, and read without it
+        self._generation = 0
+        self._readers = queue.LifoQueue()
+        self._write_conn = self._connect()
+        self._initialize_schema()
+        # Its own connection and lock, so version checks never wait for a write
+        self._version_lock = threading.Lock()
+        self._version_conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Pooled connections move between bridge threads, one user at a time
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _initialize_schema(self):
+        """Bring the schema up to SCHEMA_VERSION, each migration in its own transaction"""
+        try:
+            with self.writer() as conn:
+                version = int(conn.execute('PRAGMA user_version').fetchone()[0])
+            if version > SCHEMA_VERSION:
+                raise sqlite3.DatabaseError(
+                    f"Database schema v{version} is newer than this version of PityPal supports"
+                )
+            if version < SCHEMA_VERSION:
+                self._backup_before_migration(version)
+            for target in range(version + 1, SCHEMA_VERSION + 1):
+                with self.writer() as conn:
+                    MIGRATIONS[target - 1](conn)
+                    conn.execute(f'PRAGMA user_version = {target}')
+                logger.info(f"Migrated database to schema v{target}")
+            logger.info(f"Database ready at {self.db_path}")
+        except sqlite3.Error as e:
+            logger.error(f"Database initialization failed: {e}")
+            raise
+
+    def _backup_before_migration(self, version: int):
+        """Copy an existing database aside before migrations rewrite it.
+
+        New, empty databases are not copied. The copy sits next to the
+        database, named after the schema version it holds.
+        """
+        with self.reader() as conn:
+            if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'wishes'").fetchone():
+                return
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        target = self.db_path.with_name(f"{self.db_path.stem}.v{version}-{stamp}.bak")
+        self.backup_to(target)
+        logger.info(f"Saved schema v{version} database to {target} before migrating")
+
+    @contextmanager
+    def writer(self):
+        """Serialized write transaction, committed on success and rolled back on error.
+
+        Nested use joins the outer transaction.
+        """
+        with self._write_lock:
+            conn = self._write_conn
+            outermost = self._write_depth == 0
+            if outermost:
+                conn.execute('BEGIN IMMEDIATE')
+                changes = conn.total_changes
+            self._write_depth += 1
+            try:
+                yield conn
+            except BaseException:
+                self._write_depth -= 1
+                if outermost:
+                    conn.rollback()
+                raise
+            else:
+                self._write_depth -= 1
+                if outermost:
+                    conn.commit()
+                    if conn.total_changes != changes:
+                        self._generation += 1
+
+    @contextmanager
+    def reader(self):
+        """Borrow a pooled read connection"""
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            if self._readers.qsize() < self.read_pool_size:
+                self._readers.put(conn)
+            else:
+                conn.close()
+
+    def data_version(self) -> Tuple[int, int]:
+        """A key that changes whenever the data may have changed.
+
+        Combines the write generation of this process with PRAGMA data_version
+        of a dedicated connection, which moves when any other connection,
+        including the write connection, commits. Neither waits for an open
+        write transaction, so reads keep going during imports.
+        """
+        generation = self._generation
+        with self._version_lock:
+            return generation, self._version_conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def backup_to(self, target_path: Path, pages: int = 256, sleep: float = 0.001):
+        """Copy a consistent snapshot to target_path with the online backup API.
+
+        The copy runs in steps of `pages` pages on a read connection, so the
+        writer is never held up for the whole database.
+        """
+        with self.reader() as conn:
+            target = sqlite3.connect(target_path)
+            try:
+                conn.backup(target, pages=pages, sleep=sleep)
+            finally:
+                target.close()
+
+    def restore_from(self, source_path: Path):
+        """Replace the whole database with the one at source_path and migrate it"""
+        source = sqlite3.connect(source_path)
+        try:
+            with self._write_lock:
+                if self._write_depth:
+                    raise sqlite3.OperationalError("Cannot restore inside a write transaction")
+                source.backup(self._write_conn)
+                self._generation += 1
+        finally:
+            source.close()
+        # Backups taken before a schema upgrade are brought up to date
+        self._initialize_schema()
+
+    @contextmanager
+    def attached(self, path: Path, schema: str):
+        """Attach another database file to the write connection as schema.
+
+        ATTACH is not allowed inside a transaction, so this must be entered
+        outside writer(); open writer() within it for the actual statements.
+        """
+        if not schema.isidentifier():
+            raise ValueError(f"Invalid schema name: {schema}")
+        with self._write_lock:
+            if self._write_depth:
+                raise sqlite3.OperationalError("Cannot attach inside a write transaction")
+            self._write_conn.execute(f'ATTACH DATABASE ? AS {schema}', (str(path),))
+            try:
+                yield self._write_conn
+            finally:
+                self._write_conn.execute(f'DETACH DATABASE {schema}')
+
+    def checkpoint(self):
+        """Fold the WAL back into the main file, e.g. before copying it"""
+        with self._write_lock:
+            self._write_conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def close(self):
+        with self._write_lock:
+            while True:
+                try:
+                    self._readers.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._write_conn.close()
+        with self._version_lock:
+            self._version_conn.close()
+
+# Rows from a JSON array of wish_to_row tuples
+STAGED_WISHES = '''
+    SELECT json_extract(value, '$[0]') AS id, json_extract(value, '$[1]') AS name,
+           json_extract(value, '$[2]') AS rarity, json_extract(value, '$[3]') AS type,
+           json_extract(value, '$[4]') AS time, json_extract(value, '$[5]') AS bannerType,
+           json_extract(value, '$[6]') AS banner_group
+    FROM json_each(?)
+'''
+
+def upsert_wishes(conn: sqlite3.Connection, wishes: List[Dict],
+                  session_id: Optional[int] = None) -> Dict[str, int]:
+    """Insert new wishes and update changed ones, leaving identical rows untouched.
+
+    Runs inside the caller's transaction. Unlike INSERT OR REPLACE, a known
+    and unchanged wish costs one primary key lookup and no page writes.
+    Pity counters are then recomputed for the affected part of each group.
+    New wishes are tagged with session_id; updated ones keep their session.
+    """
+    rows = [wish_to_row(wish) for wish in wishes]
+    # The batch is passed as one JSON parameter instead of a staging table, so a
+    # batch with nothing new performs no writes at all, not even to temp tables
+    batch = json.dumps(list({row[0]: row for row in rows}.values()))
+    changed = conn.execute(f'''
+        SELECT s.id, s.time, s.banner_group, w.id IS NULL AS is_new,
+               w.time AS old_time, w.banner_group AS old_group
+        FROM ({STAGED_WISHES}) s LEFT JOIN wishes w ON w.id = s.id
+        WHERE w.id IS NULL OR w.name IS NOT s.name OR w.rarity IS NOT s.rarity
+           OR w.type IS NOT s.type OR w.time IS NOT s.time OR w.bannerType IS NOT s.bannerType
+    ''', (batch,)).fetchall()
+    if changed:
+        conn.execute(f'''
+            INSERT INTO wishes ({WISH_COLUMNS}, banner_group, session_id)
+            SELECT {WISH_COLUMNS}, banner_group, ? FROM ({STAGED_WISHES}) WHERE true
+            ON CONFLICT(id) DO UPDATE SET
+                name = excluded.name, rarity = excluded.rarity, type = excluded.type,
+                time = excluded.time, bannerType = excluded.bannerType,
+                banner_group = excluded.banner_group
+            WHERE name IS NOT excluded.name OR rarity IS NOT excluded.rarity
+               OR type IS NOT excluded.type OR time IS NOT excluded.time
+               OR bannerType IS NOT excluded.bannerType
+        ''', (session_id, batch))
+
+    # A wish moved to another time or group also disturbs the pity of its old position
+    ranges = {}
+    for row in changed:
+        positions = [(row['banner_group'], (row['time'], row['id']))]
+        if not row['is_new'] and (row['old_group'], row['old_time']) != (row['banner_group'], row['time']):
+            positions.append((row['old_group'], (row['old_time'], row['id'])))
+        for group, key in positions:
+            first, last = ranges.get(group, (key, key))
+            ranges[group] = (min(first, key), max(last, key))
+    refresh_pity(conn, ranges)
+
+    inserted = sum(1 for row in changed if row['is_new'])
+    return {
+        "inserted": inserted,
+        "updated": len(changed) - inserted,
+        "unchanged": len(rows) - len(changed)
+    }
+
+def merge_wishes(conn: sqlite3.Connection, schema: str, session_id: Optional[int] = None,
+                 conflict_limit: int = 100) -> Dict:
+    """Union the wishes of an attached database at the current schema version into wishes.
+
+    Runs inside the caller's transaction. Wishes are matched by id in one
+    INSERT ... SELECT; the live row wins when both sides hold the same id with
+    different values, and those conflicts are reported. Pity is then rebuilt
+    once for the whole table.
+    """
+    differs = '''
+        w.name IS NOT s.name OR w.rarity IS NOT s.rarity OR w.type IS NOT s.type
+        OR w.time IS NOT s.time OR w.bannerType IS NOT s.bannerType
+    '''
+    source_count = conn.execute(f'SELECT COUNT(*) FROM {schema}.wishes').fetchone()[0]
+    conflict_count = conn.execute(f'''
+        SELECT COUNT(*) FROM {schema}.wishes s JOIN main.wishes w ON w.id = s.id WHERE {differs}
+    ''').fetchone()[0]
+    conflicts = [
+        {
+            "id": str(row['id']),
+            "live": {
+                "name": row['name'], "rarity": row['rarity'], "type": row['type'],
+                "time": from_epoch(row['time']), "bannerType": row['bannerType']
+            },
+            "source": {
+                "name": row['source_name'], "rarity": row['source_rarity'], "type": row['source_type'],
+                "time": from_epoch(row['source_time']), "bannerType": row['source_bannerType']
+            }
+        }
+        for row in conn.execute(f'''
+            SELECT w.id, w.name, w.rarity, w.type, w.time, w.bannerType,
+                   s.name AS source_name, s.rarity AS source_rarity, s.type AS source_type,
+                   s.time AS source_time, s.bannerType AS source_bannerType
+            FROM {schema}.wishes s JOIN main.wishes w ON w.id = s.id
+            WHERE {differs} ORDER BY w.time, w.id LIMIT ?
+        ''', (conflict_limit,))
+    ]
+
+    conn.execute(f'''
+        INSERT INTO main.wishes ({WISH_COLUMNS}, banner_group, session_id)
+        SELECT {WISH_COLUMNS}, banner_group, ? FROM {schema}.wishes WHERE true
+        ON CONFLICT(id) DO NOTHING
+    ''', (session_id,))
+    inserted = conn.execute('SELECT changes()').fetchone()[0]
+    if inserted:
+        refresh_pity(conn)
+
+    return {
+        "source_count": source_count,
+        "inserted": inserted,
+        "unchanged": source_count - inserted - conflict_count,
+        "conflict_count": conflict_count,
+        "conflicts": conflicts
+    }
+
+def refresh_pity(conn: sqlite3.Connection, ranges: Optional[Dict[int, Tuple]] = None):
+    """Recompute pity_5 / pity_4 from the first changed wish of each banner group.
+
+    ranges maps a banner group to the (time, id) keys of its first and last
+    changed wish; without it every group is rebuilt at once by the vectorized
+    pity kernel. Counting resumes from the stored state of the wish before the
+    range and stops at the first wish past the range whose stored counters
+    already match, since every later wish then matches too. Only rows whose
+    counters differ are written.
+    """
+    if ranges is None:
+        _rebuild_pity(conn)
+        return
+
+    for group, (first_key, last_key) in ranges.items():
+        pity_5 = pity_4 = 0
+        first_time, first_id = first_key
+        previous = conn.execute('''
+            SELECT rarity, pity_5, pity_4 FROM wishes
+            WHERE banner_group = ? AND (time, id) < (?, ?)
+            ORDER BY time DESC, id DESC LIMIT 1
+        ''', (group, first_time, first_id)).fetchone()
+        if previous:
+            pity_5 = 0 if previous['rarity'] == 5 else previous['pity_5']
+            pity_4 = 0 if previous['rarity'] == 4 else previous['pity_4']
+        cursor = conn.execute('''
+            SELECT id, time, rarity, pity_5, pity_4 FROM wishes
+            WHERE banner_group = ? AND (time, id) >= (?, ?) ORDER BY time, id
+        ''', (group, first_time, first_id))
+
+        updates = []
+        for row in cursor:
+            pity_5 += 1
+            pity_4 += 1
+            if (row['pity_5'], row['pity_4']) != (pity_5, pity_4):
+                updates.append((pity_5, pity_4, row['id']))
+            elif (row['time'], row['id']) > last_key:
+                break
+            if row['rarity'] == 5:
+                pity_5 = 0
+            elif row['rarity'] == 4:
+                pity_4 = 0
+        cursor.close()
+        conn.executemany('UPDATE wishes SET pity_5 = ?, pity_4 = ? WHERE id = ?', updates)
+
+def _rebuild_pity(conn: sqlite3.Connection):
+    # Plain tuples load straight into one array; rows come back oldest first,
+    # so the chronological order is the row order
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    cursor.execute('SELECT id, banner_group, rarity, pity_5, pity_4 FROM wishes ORDER BY time, id')
+    rows = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 5)
+    ids, groups, rarity, stored_5, stored_4 = rows.T
+    pity_5, pity_4 = pity_counters(groups, rarity, np.arange(len(rows)))
+    changed = np.flatnonzero((pity_5 != stored_5) | (pity_4 != stored_4))
+    conn.executemany('UPDATE wishes SET pity_5 = ?, pity_4 = ? WHERE id = ?', zip(
+        pity_5[changed].tolist(), pity_4[changed].tolist(), ids[changed].tolist()
+    ))
+
+def rebuild_summaries(conn: sqlite3.Connection):
+    """Recompute wish_totals and item_totals from the wishes table"""
+    conn.execute('DELETE FROM wish_totals')
+    conn.execute('DELETE FROM item_totals')
+    conn.execute('''
+        INSERT INTO wish_totals (banner_group, rarity, wishes)
+        SELECT banner_group, rarity, COUNT(*) FROM wishes GROUP BY banner_group, rarity
+    ''')
+    conn.execute('''
+        INSERT INTO item_totals (name, type, rarity, obtained)
+        SELECT name, type, rarity, COUNT(*) FROM wishes GROUP BY name, type, rarity
+    ''')
+
+def start_import_session(conn: sqlite3.Connection, source: str) -> int:
+    """Open an import session in the ledger and return its id"""
+    cursor = conn.execute(
+        'INSERT INTO import_sessions (source, started) VALUES (?, ?)', (source, int(time.time()))
+    )
+    return cursor.lastrowid
+
+def finish_import_session(conn: sqlite3.Connection, session_id: int, status: str = 'completed'):
+    """Close an import session, recording per-banner counts and the range of wishes it added"""
+    banner_counts = dict(conn.execute('''
+        SELECT bannerType, COUNT(*) FROM wishes WHERE session_id = ? GROUP BY bannerType
+    ''', (session_id,)).fetchall())
+    first = conn.execute(
+        'SELECT id FROM wishes WHERE session_id = ? ORDER BY time, id LIMIT 1', (session_id,)
+    ).fetchone()
+    last = conn.execute(
+        'SELECT id FROM wishes WHERE session_id = ? ORDER BY time DESC, id DESC LIMIT 1', (session_id,)
+    ).fetchone()
+    conn.execute('''
+        UPDATE import_sessions
+        SET finished = ?, status = ?, new_count = ?, banner_counts = ?, first_wish_id = ?, last_wish_id = ?
+        WHERE id = ?
+    ''', (
+        int(time.time()), status, sum(banner_counts.values()), json.dumps(banner_counts),
+        first[0] if first else None, last[0] if last else None, session_id
+    ))
+
+@contextmanager
+def import_session(database: 'Database', source: str):
+    """Run an import as a ledger session; yields the session id to tag new wishes with.
+
+    The session is opened and closed in transactions of its own, so chunked
+    imports can commit in between, and is marked failed if the body raises.
+    """
+    with database.writer() as conn:
+        session_id = start_import_session(conn, source)
+    status = 'failed'
+    try:
+        yield session_id
+        status = 'completed'
+    finally:
+        with database.writer() as conn:
+            finish_import_session(conn, session_id, status)
+
+def session_to_dict(row) -> Dict:
+    """Convert an import_sessions row to the dict shape the frontend uses"""
+    return {
+        "id": row['session_id'],
+        "source": row['source'],
+        "started": datetime.fromtimestamp(row['started']).strftime(TIME_FORMAT),
+        "finished": datetime.fromtimestamp(row['finished']).strftime(TIME_FORMAT) if row['finished'] else None,
+        "status": row['status'],
+        "new_count": row['new_count'],
+        "banner_counts": json.loads(row['banner_counts']),
+        "first_wish_id": str(row['first_wish_id']) if row['first_wish_id'] is not None else None,
+        "last_wish_id": str(row['last_wish_id']) if row['last_wish_id'] is not None else None
+    }
+
+_databases: Dict[str, Database] = {}
+_databases_lock = threading.Lock()
+
+def get_database(db_path: Path) -> Database:
+    """Get the process-wide Database for a file, opening it on first use"""
+    key = str(Path(db_path).resolve())
+    with _databases_lock:
+        database = _databases.get(key)
+        if database is None:
+            database = Database(db_path)
+            _databases[key] = database
+        return database
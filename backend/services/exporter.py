@@ -0,0 +1,248 @@
+# Path: backend/services/exporter.py
+import csv
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+from .database import Database, PITY_COLUMN, WISH_COLUMNS, row_to_wish
+
+logger = logging.getLogger(__name__)
+
+# Streaming wish export
+# Rows go from a single read transaction straight to the output file in
+# fixed-size batches, so memory stays bounded however long the history is
+
+EXPORT_FORMATS = {
+    "json": ".json",
+    "jsonl": ".jsonl",
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "xlsx": ".xlsx"
+}
+EXPORT_FIELDS = ['id', 'name', 'rarity', 'type', 'time', 'bannerType']
+BATCH_SIZE = 5000
+
+# One Excel sheet per pity-sharing banner group, after the summary sheet
+EXCEL_SHEETS = {
+    1: "Character Event",
+    2: "Weapon Event",
+    3: "Standard",
+    4: "Chronicled",
+    0: "Other"
+}
+EXCEL_COLUMNS = ['Time', 'Name', 'Type', 'Rarity', 'Banner', 'Pity', '5★ Pity', '4★ Pity', 'ID']
+SUMMARY_COLUMNS = ['Banner', 'Wishes', '5★', '4★', '5★ Rate', 'Avg 5★ Pity', 'Current 5★ Pity', 'Current 4★ Pity']
+# Column widths are estimated from the first rows of each sheet, since write-only
+# sheets need them before any row is written
+WIDTH_SAMPLE = 500
+EPOCH = datetime(1970, 1, 1)
+
+def _iter_batches(conn, with_pity: bool, batch_size: int) -> Iterator[List]:
+    """Wish rows oldest first, in lists of at most batch_size"""
+    columns = f'{WISH_COLUMNS}, {PITY_COLUMN}' if with_pity else WISH_COLUMNS
+    cursor = conn.execute(f'SELECT {columns} FROM wishes ORDER BY time ASC, id ASC')
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield rows
+
+def _write_json(path: Path, batches: Iterator[List], lines: bool, on_batch: Callable):
+    # A JSON array with one wish per line, or JSON Lines without the brackets
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        if not lines:
+            f.write('[')
+        first = True
+        for rows in batches:
+            parts = [json.dumps(row_to_wish(row), ensure_ascii=False) for row in rows]
+            if lines:
+                f.write('\n'.join(parts) + '\n')
+            else:
+                f.write(('\n' if first else ',\n') + ',\n'.join(parts))
+            first = False
+            on_batch(len(rows))
+        if not lines:
+            f.write('\n]\n')
+
+def _write_csv(path: Path, batches: Iterator[List], fields: List[str], on_batch: Callable):
+    # utf-8-sig so spreadsheet apps pick up the encoding of character names
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for rows in batches:
+            writer.writerows(row_to_wish(row) for row in rows)
+            on_batch(len(rows))
+
+def _write_parquet(path: Path, batches: Iterator[List], with_pity: bool, on_batch: Callable):
+    # pyarrow is only needed for this format, so it is imported on first use
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    fields = [
+        pa.field('id', pa.int64()),
+        pa.field('name', pa.string()),
+        pa.field('rarity', pa.int8()),
+        pa.field('type', pa.string()),
+        pa.field('time', pa.timestamp('s')),
+        pa.field('bannerType', pa.string())
+    ]
+    if with_pity:
+        fields.append(pa.field('pity', pa.int16()))
+    schema = pa.schema(fields)
+
+    # Each batch becomes one row group; times are stored as the game's wall clock
+    with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+        for rows in batches:
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, fields)],
+                schema=schema
+            ))
+            on_batch(len(rows))
+
+def _excel_row(row) -> List:
+    pity = row['pity_5'] if row['rarity'] == 5 else row['pity_4'] if row['rarity'] == 4 else None
+    return [
+        EPOCH + timedelta(seconds=row['time']), row['name'], row['type'], row['rarity'],
+        row['bannerType'], pity, row['pity_5'], row['pity_4'],
+        # Wish ids have more digits than Excel numbers can hold exactly
+        str(row['id'])
+    ]
+
+def _column_widths(header: List[str], rows: List[List]) -> List[int]:
+    widths = [len(title) for title in header]
+    for values in rows[:WIDTH_SAMPLE]:
+        for index, value in enumerate(values):
+            length = 19 if isinstance(value, datetime) else len(str(value)) if value is not None else 0
+            widths[index] = max(widths[index], length)
+    return [min(width + 2, 60) for width in widths]
+
+def _write_xlsx(path: Path, conn, batch_size: int, on_batch: Callable):
+    # openpyxl write-only mode streams each sheet to a temporary file, so memory
+    # stays flat; sheets are filled one banner group at a time in pity order
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    workbook = Workbook(write_only=True)
+    summary = workbook.create_sheet("Summary")
+    bold = Font(bold=True)
+
+    def start_sheet(sheet, header: List[str], sample: List[List]):
+        for index, width in enumerate(_column_widths(header, sample), start=1):
+            sheet.column_dimensions[get_column_letter(index)].width = width
+        sheet.freeze_panes = 'A2'
+        cells = []
+        for title in header:
+            cell = WriteOnlyCell(sheet, value=title)
+            cell.font = bold
+            cells.append(cell)
+        sheet.append(cells)
+
+    stats = []
+    for group, title in EXCEL_SHEETS.items():
+        cursor = conn.execute('''
+            SELECT id, name, rarity, type, time, bannerType, pity_5, pity_4
+            FROM wishes WHERE banner_group = ? ORDER BY time, id
+        ''', (group,))
+        rows = [_excel_row(row) for row in cursor.fetchmany(batch_size)]
+        if not rows:
+            continue
+
+        sheet = workbook.create_sheet(title)
+        start_sheet(sheet, EXCEL_COLUMNS, rows)
+        banner = {"wishes": 0, 5: 0, 4: 0, "pity_sum": 0, "current_5": 0, "current_4": 0}
+        while rows:
+            for values in rows:
+                sheet.append(values)
+                rarity, pity_5, pity_4 = values[3], values[6], values[7]
+                banner["wishes"] += 1
+                if rarity in (4, 5):
+                    banner[rarity] += 1
+                if rarity == 5:
+                    banner["pity_sum"] += pity_5
+                banner["current_5"] = 0 if rarity == 5 else pity_5
+                banner["current_4"] = 0 if rarity == 4 else pity_4
+            on_batch(len(rows))
+            rows = [_excel_row(row) for row in cursor.fetchmany(batch_size)]
+        stats.append([
+            title, banner["wishes"], banner[5], banner[4],
+            round(100 * banner[5] / banner["wishes"], 2),
+            round(banner["pity_sum"] / banner[5], 1) if banner[5] else None,
+            banner["current_5"], banner["current_4"]
+        ])
+
+    totals = [sum(row[i] for row in stats) for i in (1, 2, 3)]
+    summary_rows = stats + [[
+        "Total", *totals,
+        round(100 * totals[1] / totals[0], 2) if totals[0] else 0,
+        None, None, None
+    ]]
+    start_sheet(summary, SUMMARY_COLUMNS, summary_rows)
+    for values in summary_rows:
+        summary.append(values)
+    workbook.save(path)
+
+def export_wishes(database: Database, path: Path, format: str = "json", with_pity: bool = False,
+                  batch_size: int = BATCH_SIZE, progress_callback: Optional[Callable] = None) -> int:
+
+    # Streams the wish history to path in the given format and returns the row count
+    # Progress events carry rows written, the total and a percentage
+    # The file is written under a temporary name and only appears once complete
+
+    format = format.lower()
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported format: {format}")
+    path = Path(path)
+    partial = path.with_name(path.name + '.partial')
+    fields = EXPORT_FIELDS + ['pity'] if with_pity else EXPORT_FIELDS
+    state = {"rows": 0, "last_emit": 0.0}
+
+    def report(stage: str, total: int, force: bool = False):
+        now = time.monotonic()
+        if not progress_callback or (not force and now - state["last_emit"] < 0.25):
+            return
+        state["last_emit"] = now
+        try:
+            progress_callback({
+                "stage": stage,
+                "format": format,
+                "rows": state["rows"],
+                "total": total,
+                "percent": round(100 * state["rows"] / total, 1) if total else 100.0
+            })
+        except Exception as e:
+            logger.error(f"Export progress callback failed: {e}")
+
+    try:
+        with database.reader() as conn:
+            # Count and rows come from one snapshot, so the total is exact
+            conn.execute('BEGIN')
+            total = conn.execute('SELECT COUNT(*) FROM wishes').fetchone()[0]
+            report("exporting", total, force=True)
+
+            def on_batch(count: int):
+                state["rows"] += count
+                report("exporting", total)
+
+            batches = _iter_batches(conn, with_pity, batch_size)
+            if format == "xlsx":
+                # Workbooks always carry pity, one sheet per banner
+                _write_xlsx(partial, conn, batch_size, on_batch)
+            elif format == "parquet":
+                _write_parquet(partial, batches, with_pity, on_batch)
+            elif format == "csv":
+                _write_csv(partial, batches, fields, on_batch)
+            else:
+                _write_json(partial, batches, format == "jsonl", on_batch)
+
+        partial.replace(path)
+        report("done", total, force=True)
+        logger.info(f"Exported {state['rows']} wishes to {path}")
+        return state["rows"]
+    finally:
+        partial.unlink(missing_ok=True)
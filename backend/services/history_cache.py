@@ -0,0 +1,130 @@
+# Path: backend/services/history_cache.py
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .database import Database, PITY_COLUMN, from_epoch
+
+logger = logging.getLogger(__name__)
+
+# Process-wide columnar copy of the wishes table for analytics read paths
+# Built with one scan and reused until Database.data_version() moves, so
+# repeated pity, stats and training calls skip the table scan entirely
+
+@dataclass
+class HistoryColumns:
+    """Wish history as parallel NumPy arrays, newest first like get_history.
+
+    Names, item types and banner types are dictionary-encoded: the *_codes
+    arrays index into the matching lookup lists.
+    """
+    ids: np.ndarray
+    times: np.ndarray
+    rarity: np.ndarray
+    banner_group: np.ndarray
+    pity: np.ndarray
+    name_codes: np.ndarray
+    type_codes: np.ndarray
+    banner_codes: np.ndarray
+    names: List[str]
+    types: List[str]
+    banner_types: List[str]
+    _records: Dict[bool, List[Dict]] = field(default_factory=dict, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def records(self, with_pity: bool = False) -> List[Dict]:
+        """The history as wish dicts, built once per snapshot.
+
+        Callers get their own list, but the dicts are shared and must not be modified.
+        """
+        if with_pity not in self._records:
+            times = [from_epoch(value) for value in self.times.tolist()]
+            records = [
+                {
+                    "id": str(wish_id),
+                    "name": self.names[name_code],
+                    "rarity": rarity,
+                    "type": self.types[type_code],
+                    "time": wish_time,
+                    "bannerType": self.banner_types[banner_code]
+                }
+                for wish_id, name_code, rarity, type_code, wish_time, banner_code in zip(
+                    self.ids.tolist(), self.name_codes.tolist(), self.rarity.tolist(),
+                    self.type_codes.tolist(), times, self.banner_codes.tolist()
+                )
+            ]
+            if with_pity:
+                for record, pity in zip(records, self.pity.tolist()):
+                    record["pity"] = pity
+            self._records[with_pity] = records
+        return list(self._records[with_pity])
+
+def _encode(values: List[str]):
+    lookup = {}
+    codes = np.fromiter((lookup.setdefault(value, len(lookup)) for value in values),
+                        dtype=np.int32, count=len(values))
+    return codes, list(lookup)
+
+class HistoryCache:
+    def __init__(self, database: Database):
+        self.database = database
+        self._lock = threading.Lock()
+        self._columns: Optional[HistoryColumns] = None
+        self._version = None
+        self.builds = 0
+
+    def get(self) -> HistoryColumns:
+        """Current history columns, rebuilt only if the database changed since the last build"""
+        with self._lock:
+            # Read the version before scanning: a write landing mid-scan leaves
+            # the snapshot tagged as stale, so it is rebuilt on the next call
+            version = self.database.data_version()
+            if self._columns is None or version != self._version:
+                self._columns = self._build()
+                self._version = version
+                self.builds += 1
+            return self._columns
+
+    def _build(self) -> HistoryColumns:
+        with self.database.reader() as conn:
+            rows = conn.execute(f'''
+                SELECT id, time, rarity, banner_group, {PITY_COLUMN}, name, type, bannerType
+                FROM wishes ORDER BY time DESC, id DESC
+            ''').fetchall()
+
+        count = len(rows)
+        ids, times, rarity, groups, pity, names, types, banners = list(zip(*rows)) or [()] * 8
+        name_codes, name_lookup = _encode(names)
+        type_codes, type_lookup = _encode(types)
+        banner_codes, banner_lookup = _encode(banners)
+        logger.info(f"Built columnar history cache with {count} wishes")
+        return HistoryColumns(
+            ids=np.fromiter(ids, dtype=np.int64, count=count),
+            times=np.fromiter(times, dtype=np.int64, count=count),
+            rarity=np.fromiter(rarity, dtype=np.int8, count=count),
+            banner_group=np.fromiter(groups, dtype=np.int8, count=count),
+            pity=np.fromiter(pity, dtype=np.int16, count=count),
+            name_codes=name_codes,
+            type_codes=type_codes,
+            banner_codes=banner_codes,
+            names=name_lookup,
+            types=type_lookup,
+            banner_types=banner_lookup
+        )
+
+_caches: Dict[int, HistoryCache] = {}
+_caches_lock = threading.Lock()
+
+def get_history_cache(database: Database) -> HistoryCache:
+    """Get the process-wide HistoryCache for a Database"""
+    with _caches_lock:
+        cache = _caches.get(id(database))
+        if cache is None or cache.database is not database:
+            cache = HistoryCache(database)
+            _caches[id(database)] = cache
+        return cache
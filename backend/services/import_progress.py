@@ -0,0 +1,146 @@
+# Path: backend/services/import_progress.py
+import time
+import threading
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# The gacha log API only serves roughly the last six months of wishes
+HISTORY_WINDOW = timedelta(days=180)
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+class ImportProgress:
+    """Thread-safe progress tracker for a multi-banner wish import.
+
+    Fetch workers report requests and pages; the tracker turns them into
+    progress events carrying per-banner page and row counts, the request
+    rate and an ETA. Completion of a banner is estimated from how far its
+    cursor has moved back in time towards the oldest wish it needs, which
+    is the newest stored wish in incremental mode or the edge of the API's
+    history window otherwise.
+    """
+
+    def __init__(self, banner_types: Dict[str, str], stop_times: Optional[Dict[str, str]] = None,
+                 callback: Optional[Callable] = None, min_interval: float = 0.25):
+        self.banner_types = banner_types
+        self.callback = callback
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._last_emit = 0.0
+        self._requests = 0
+        self._stage = "fetching"
+        self._banners = {
+            name: {
+                "pages": 0, "rows": 0, "new": 0, "done": False,
+                "start_time": None, "cursor_time": None,
+                "stop_time": self._parse_time((stop_times or {}).get(name))
+            }
+            for name in banner_types.values()
+        }
+
+    def _parse_time(self, value: Optional[str]) -> Optional[datetime]:
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value[:19], TIME_FORMAT)
+        except ValueError:
+            return None
+
+    def record_request(self):
+        with self._lock:
+            self._requests += 1
+
+    def record_page(self, banner_name: str, wishes: list, new_count: int):
+        """Count a fetched page and move the banner's cursor to its oldest wish"""
+        with self._lock:
+            banner = self._banners[banner_name]
+            banner["pages"] += 1
+            banner["rows"] += len(wishes)
+            banner["new"] += new_count
+            if wishes:
+                newest = self._parse_time(wishes[0].get("time"))
+                oldest = self._parse_time(wishes[-1].get("time"))
+                if banner["start_time"] is None:
+                    banner["start_time"] = newest
+                if oldest is not None:
+                    banner["cursor_time"] = oldest
+        self._emit()
+
+    def finish_banner(self, banner_name: str):
+        with self._lock:
+            self._banners[banner_name]["done"] = True
+        self._emit(force=True)
+
+    def set_stage(self, stage: str):
+        with self._lock:
+            self._stage = stage
+        self._emit(force=True)
+
+    def _fraction(self, banner: Dict) -> float:
+        if banner["done"]:
+            return 1.0
+        start, cursor = banner["start_time"], banner["cursor_time"]
+        if start is None or cursor is None:
+            return 0.0
+        target = banner["stop_time"] or start - HISTORY_WINDOW
+        span = (start - target).total_seconds()
+        if span <= 0:
+            return 0.99
+        return max(0.0, min(0.99, (start - cursor).total_seconds() / span))
+
+    def snapshot(self) -> Dict:
+        """Build the current progress event"""
+        with self._lock:
+            elapsed = time.monotonic() - self._started
+            fractions = {name: self._fraction(banner) for name, banner in self._banners.items()}
+
+            # Banners are fetched concurrently, so the slowest one decides the ETA
+            eta = 0.0
+            for name, fraction in fractions.items():
+                if fraction >= 1.0:
+                    continue
+                if fraction <= 0.0:
+                    eta = None
+                    break
+                eta = max(eta, elapsed * (1 - fraction) / fraction)
+
+            overall = sum(fractions.values()) / len(fractions) if fractions else 1.0
+            if self._stage == "done":
+                percent = 100
+            else:
+                percent = int(10 + 85 * overall)
+
+            return {
+                "stage": self._stage,
+                "percent": percent,
+                "banners": {
+                    name: {
+                        "pages": banner["pages"],
+                        "rows": banner["rows"],
+                        "new": banner["new"],
+                        "done": banner["done"]
+                    }
+                    for name, banner in self._banners.items()
+                },
+                "rows": sum(banner["rows"] for banner in self._banners.values()),
+                "requests": self._requests,
+                "requests_per_second": round(self._requests / elapsed, 2) if elapsed > 0 else 0.0,
+                "elapsed_seconds": round(elapsed, 1),
+                "eta_seconds": round(eta, 1) if eta is not None and self._stage == "fetching" else None
+            }
+
+    def _emit(self, force: bool = False):
+        if not self.callback:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_emit < self.min_interval:
+                return
+            self._last_emit = now
+        try:
+            self.callback(self.snapshot())
+        except Exception as e:
+            logger.error(f"Progress callback failed: {e}")
@@ -1,16 +1,30 @@
 # Path: backend/services/pity_calculator.py
 from datetime import datetime
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .pity_kernel import banner_aggregates, chronological_order, displayed_pity, last_in_group, pity_counters
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Banner groups that share pity, in the order they are reported
+BANNER_GROUPS = ('character', 'weapon', 'permanent', 'chronicled')
+# Item type that is never featured as a 4★ on each event banner
+OFF_BANNER_4_STAR_TYPES = {'character': 'Weapon', 'weapon': 'Character'}
+
 class PityCalculator:
     def __init__(self):
         self.standard_5_stars = [
             "Diluc", "Jean", "Keqing", "Mona", "Qiqi", "Tighnari", "Dehya"
         ]
+        self.standard_5_star_weapons = [
+            "Amos' Bow", "Aquila Favonia", "Lost Prayer to the Sacred Winds",
+            "Primordial Jade Winged-Spear", "Skyward Atlas", "Skyward Blade",
+            "Skyward Harp", "Skyward Pride", "Skyward Spine", "Wolf's Gravestone"
+        ]
         self.banner_rules = {
             'character': {'soft_pity': 74, 'hard_pity': 90},
             'character-1': {'soft_pity': 74, 'hard_pity': 90},
@@ -20,6 +34,11 @@ class PityCalculator:
             'chronicled': {'soft_pity': 74, 'hard_pity': 90}
         }
         
+    def _chronological_key(self, wish):
+        """Order by time, then by wish id for the wishes of a 10-pull that share a time"""
+        wish_id = str(wish.get('id', ''))
+        return (wish['time'], int(wish_id) if wish_id.isdigit() else 0)
+
     def _normalize_banner_type(self, banner_type):
         """Normalize banner types - treat all character banners as the same."""
         if banner_type.startswith('character-'):
@@ -28,145 +47,168 @@ class PityCalculator:
 
     def calculate(self, wishes: Optional[List[Dict]] = None, banner_type: str = 'character') -> Dict:
         """Calculate pity statistics for a specific banner type"""
+        banner_type = self._normalize_banner_type(banner_type)
         if not wishes:
             return self._create_empty_stats(banner_type)
-            
-        # Normalize banner type
-        banner_type = self._normalize_banner_type(banner_type)
-            
-        return self.calculate_banner_pity(wishes, banner_type)
+        return self.calculate_banner_states(wishes)['banners'].get(banner_type) or self._create_empty_stats(banner_type)
 
     def calculate_all_banner_pities(self, wishes: List[Dict]) -> Dict:
         """Calculate pity for all banner types at once for consistency."""
-        if not wishes:
-            return {
-                "character": self._create_empty_stats('character'),
-                "weapon": self._create_empty_stats('weapon'),
-                "permanent": self._create_empty_stats('permanent')
-            }
-            
-        # Calculate each banner type
-        character_pity = self.calculate(wishes, 'character')
-        weapon_pity = self.calculate(wishes, 'weapon')
-        permanent_pity = self.calculate(wishes, 'permanent')
-        
-        # Return dictionary with consistent naming
-        return {
-            "character": character_pity,
-            "weapon": weapon_pity,
-            "permanent": permanent_pity
-        }
+        return self.calculate_banner_states(wishes)['banners']
 
     def calculate_banner_pity(self, wishes: List[Dict], banner_type: str) -> Dict:
-        # Normalize banner type
-        banner_type = self._normalize_banner_type(banner_type)
-        
-        # Handle all character banners together
-        if banner_type == 'character':
-            banner_wishes = [w for w in wishes if w['bannerType'].startswith('character')]
-        elif banner_type == 'permanent':
-            banner_wishes = [w for w in wishes if w['bannerType'] == 'permanent']
-        else:
-            banner_wishes = [w for w in wishes if w['bannerType'] == banner_type]
-            
-        banner_wishes.sort(key=lambda x: x['time'], reverse=True)
-        
-        current_pity = 0
-        guaranteed = False
-
-        for wish in banner_wishes:
-            current_pity += 1
-            if wish['rarity'] == 5:
-                # If they got a standard 5★, next is guaranteed
-                if wish['name'] in self.standard_5_stars:
-                    guaranteed = True
-                else:
-                    guaranteed = False
-                break
+        return self.calculate(wishes, banner_type)
 
-        return self._create_pity_stats(current_pity, banner_type, guaranteed)
+    def calculate_banner_states(self, wishes: Optional[List[Dict]]) -> Dict:
+        """Report the state of every banner group, and the overall stats, from one scan.
 
-    def calculate_pull_counts(self, wishes: List[Dict]) -> List[Dict]:
-        # Group wishes by pity sharing and pre-sort
-        pity_groups = {}
-        for wish in wishes:
-            # Normalize banner type
-            banner_type = self._normalize_banner_type(wish['bannerType'])
-            
-            if banner_type not in pity_groups:
-                pity_groups[banner_type] = []
-            pity_groups[banner_type].append(wish)
-
-        # Process each group
-        result_wishes = []
-        for group_key, group_wishes in pity_groups.items():
-            # Sort chronologically within group
-            group_wishes.sort(key=lambda x: x['time'])
-            
-            pity_5 = 0
-            pity_4 = 0
-            
-            for wish in group_wishes:
-                wish = wish.copy()  # Create copy to avoid modifying original
-                
-                pity_5 += 1
-                pity_4 += 1
-                
-                if wish['rarity'] == 5:
-                    wish['pity'] = pity_5
-                    pity_5 = 0
-                elif wish['rarity'] == 4:
-                    wish['pity'] = pity_4
-                    pity_4 = 0
+        Current 5★ and 4★ pity, counts and average and median pity come from the
+        vectorized kernel; only the 5★ wishes are walked to follow the 50/50
+        guarantee and loss streaks, since each 50/50 depends on the last.
+
+        A 5★ from the standard pool loses the 50/50 on the character and weapon
+        banners. Without the banner schedule, a 4★ only counts as off-banner
+        when its type is never featured there: a weapon on the character
+        banner, or a character on the weapon banner. Chronicled banners have no
+        50/50 to track.
+        """
+        wishes = wishes or []
+        group_names, groups, rarity, order = self._wish_arrays(wishes)
+        return self._banner_states(wishes, group_names, groups, rarity, order)
+
+    def _wish_arrays(self, wishes: List[Dict]) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """Group codes, rarity and chronological order of wish dicts, with the group names by code"""
+        group_codes = {group: code for code, group in enumerate(BANNER_GROUPS)}
+        groups = np.fromiter(
+            (group_codes.setdefault(self._normalize_banner_type(wish['bannerType']), len(group_codes))
+             for wish in wishes),
+            dtype=np.int64, count=len(wishes)
+        )
+        rarity = np.fromiter((wish['rarity'] for wish in wishes), dtype=np.int64, count=len(wishes))
+        keys = [self._chronological_key(wish) for wish in wishes]
+        order = chronological_order(
+            np.array([key[0] for key in keys], dtype=str),
+            np.fromiter((key[1] for key in keys), dtype=np.int64, count=len(keys))
+        )
+        return list(group_codes), groups, rarity, order
+
+    def _banner_states(self, wishes: List[Dict], group_names: List[str], groups: np.ndarray,
+                       rarity: np.ndarray, order: np.ndarray) -> Dict:
+        pity_5, pity_4 = pity_counters(groups, rarity, order)
+        aggregates = {
+            key: values.tolist()
+            for key, values in banner_aggregates(groups, rarity, order, pity_5, pity_4, len(group_names)).items()
+        }
+
+        # The 50/50 chain of each event banner, following its 5★ wishes in order
+        fifty_fifty = {}
+        hits = order[rarity[order] == 5]
+        for row, code in zip(hits.tolist(), groups[hits].tolist()):
+            group = group_names[code]
+            if group != 'character' and group != 'weapon':
+                continue
+            state = fifty_fifty.setdefault(group, self._new_fifty_fifty_state())
+            standard = self.standard_5_stars if group == 'character' else self.standard_5_star_weapons
+            lost = wishes[row]['name'] in standard
+            if not state['guaranteed']:
+                if lost:
+                    state['lost'] += 1
+                    state['loss_streak'] += 1
+                    state['max_loss_streak'] = max(state['max_loss_streak'], state['loss_streak'])
                 else:
-                    wish['pity'] = 0  # 3★ shows 0
-                    
-                result_wishes.append(wish)
+                    state['won'] += 1
+                    state['loss_streak'] = 0
+            state['guaranteed'] = lost
 
-        # Final sort by time for display
-        return sorted(result_wishes, key=lambda x: x['time'], reverse=True)
+        # The 4★ guarantee only depends on each group's newest 4★
+        newest_4 = last_in_group(groups, rarity == 4, order, len(group_names)).tolist()
+        banners = {}
+        for code, group in enumerate(group_names):
+            guaranteed_4 = (
+                newest_4[code] >= 0 and group in OFF_BANNER_4_STAR_TYPES
+                and wishes[newest_4[code]].get('type') == OFF_BANNER_4_STAR_TYPES[group]
+            )
+            banners[group] = (
+                {key: column[code] for key, column in aggregates.items()},
+                fifty_fifty.get(group),
+                guaranteed_4
+            )
+        return self.build_banner_states(banners)
 
-    def calculate_stats(self, wishes: List[Dict]) -> Dict:
-        if not wishes:
-            return self._create_empty_stats('character')
-
-        # Normalize banner types in the wish data
-        normalized_wishes = []
-        for wish in wishes:
-            wish_copy = wish.copy()
-            wish_copy['bannerType'] = self._normalize_banner_type(wish['bannerType'])
-            normalized_wishes.append(wish_copy)
-
-        banner_stats = {}
-        for banner_type in set(w['bannerType'] for w in normalized_wishes):
-            banner_wishes = [w for w in normalized_wishes if w['bannerType'] == banner_type]
-            if banner_wishes:
-                stats = {
-                    'total': len(banner_wishes),
-                    'five_stars': len([w for w in banner_wishes if w['rarity'] == 5]),
-                    'four_stars': len([w for w in banner_wishes if w['rarity'] == 4]),
-                    'average_pity': self._calculate_average_pity(banner_wishes)
-                }
-                banner_stats[banner_type] = stats
+    def build_banner_states(self, banners: Dict[str, Tuple[Dict, Dict, bool]]) -> Dict:
+        """Assemble the banner states and overall stats from per-group aggregates.
 
+        banners maps each group to its aggregate values (as banner_aggregates
+        names them), its 50/50 state, or None before any 5★, and whether the
+        next 4★ is guaranteed.
+        """
+        summaries = {
+            group: self._summarize_banner(group, values, fifty_fifty or self._new_fifty_fifty_state(), guaranteed_4)
+            for group, (values, fifty_fifty, guaranteed_4) in banners.items()
+        }
         return {
-            'total_wishes': len(wishes),
-            'banner_stats': banner_stats,
-            'total_five_stars': len([w for w in wishes if w['rarity'] == 5]),
-            'total_four_stars': len([w for w in wishes if w['rarity'] == 4])
+            'banners': summaries,
+            'stats': {
+                'total_wishes': sum(banner['total'] for banner in summaries.values()),
+                'banner_stats': {
+                    group: {
+                        'total': banner['total'],
+                        'five_stars': banner['five_stars'],
+                        'four_stars': banner['four_stars'],
+                        'average_pity': banner['average_pity'],
+                        'median_pity': banner['median_pity']
+                    }
+                    for group, banner in summaries.items() if banner['total']
+                },
+                'total_five_stars': sum(banner['five_stars'] for banner in summaries.values()),
+                'total_four_stars': sum(banner['four_stars'] for banner in summaries.values())
+            }
         }
 
-    def _calculate_average_pity(self, wishes: List[Dict]) -> float:
-        pity_counts = []
-        current_pity = 0
-        
-        for wish in sorted(wishes, key=lambda x: x['time']):
-            current_pity += 1
-            if wish['rarity'] == 5:
-                pity_counts.append(current_pity)
-                current_pity = 0
+    def _new_fifty_fifty_state(self) -> Dict:
+        return {'guaranteed': False, 'won': 0, 'lost': 0, 'loss_streak': 0, 'max_loss_streak': 0}
+
+    def _summarize_banner(self, group: str, values: Dict, fifty_fifty: Dict, guaranteed_4: bool) -> Dict:
+        five_stars, four_stars = values['five_stars'], values['four_stars']
+        if not five_stars:
+            median_pity = 0
+        elif five_stars % 2:
+            median_pity = values['median_low']
+        else:
+            median_pity = (values['median_low'] + values['median_high']) / 2
 
-        return round(sum(pity_counts) / len(pity_counts), 1) if pity_counts else 0
+        summary = self._create_pity_stats(values['current_5'], group, fifty_fifty['guaranteed'])
+        summary.update({
+            'current_4': values['current_4'],
+            'guaranteed_4': guaranteed_4,
+            'wishes_to_4': max(0, 10 - values['current_4']),
+            'fifty_fifty': {'won': fifty_fifty['won'], 'lost': fifty_fifty['lost']},
+            'loss_streak': fifty_fifty['loss_streak'],
+            'max_loss_streak': fifty_fifty['max_loss_streak'],
+            'total': values['total'],
+            'five_stars': five_stars,
+            'four_stars': four_stars,
+            'average_pity': round(values['pity_5_sum'] / five_stars, 1) if five_stars else 0,
+            'median_pity': median_pity,
+            'average_pity_4': round(values['pity_4_sum'] / four_stars, 1) if four_stars else 0
+        })
+        return summary
+
+    def calculate_pull_counts(self, wishes: List[Dict]) -> List[Dict]:
+        """Copies of the wishes with the pity of each, newest first.
+
+        Pity is counted per pity-sharing group by the vectorized kernel: pulls
+        since the previous 5★ for a 5★, since the previous 4★ for a 4★, else 0.
+        """
+        if not wishes:
+            return []
+        _, groups, rarity, order = self._wish_arrays(wishes)
+        pity_5, pity_4 = pity_counters(groups, rarity, order)
+        pity = displayed_pity(rarity, pity_5, pity_4).tolist()
+        return [{**wishes[row], 'pity': pity[row]} for row in order[::-1].tolist()]
+
+    def calculate_stats(self, wishes: List[Dict]) -> Dict:
+        return self.calculate_banner_states(wishes)['stats']
 
     def _create_pity_stats(self, current_pity: int, banner_type: str, guaranteed: bool = False) -> Dict:
         # Normalize banner type
@@ -0,0 +1,95 @@
+# Path: backend/services/pity_kernel.py
+from typing import Dict, Tuple
+
+import numpy as np
+
+# Vectorized pity over columnar wish data
+# Rows are described by parallel arrays: a banner group code and rarity per
+# wish, plus an order array listing row indexes oldest first. Pity counters
+# are grouped cumulative counts that restart after every hit, so no step
+# iterates over wishes in Python
+
+def chronological_order(times: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """Row indexes sorted by time, then wish id, oldest first; stable for equal keys"""
+    return np.lexsort((ids, times))
+
+def pity_counters(groups: np.ndarray, rarity: np.ndarray, order: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Pulls since the previous 5★ and previous 4★ of the same group, counting the wish itself.
+
+    Matches the pity_5 / pity_4 columns: a 5★ does not reset the 4★ counter.
+    """
+    count = len(order)
+    pity_5 = np.zeros(count, dtype=np.int64)
+    pity_4 = np.zeros(count, dtype=np.int64)
+    chronological_groups = groups[order]
+    chronological_rarity = rarity[order]
+
+    # Groups are few, so each is selected with one comparison instead of a sort
+    for code in np.unique(chronological_groups):
+        members = np.flatnonzero(chronological_groups == code)
+        member_rarity = chronological_rarity[members]
+        rows = order[members]
+        pulls = np.arange(1, len(members) + 1)
+        for target, counters in ((5, pity_5), (4, pity_4)):
+            # Pull number of the latest earlier hit of the target rarity, carried forward
+            last_hit = np.zeros(len(members), dtype=np.int64)
+            last_hit[1:] = np.where(member_rarity[:-1] == target, pulls[:-1], 0)
+            np.maximum.accumulate(last_hit, out=last_hit)
+            counters[rows] = pulls - last_hit
+    return pity_5, pity_4
+
+def displayed_pity(rarity: np.ndarray, pity_5: np.ndarray, pity_4: np.ndarray) -> np.ndarray:
+    """The pity shown for each wish: 5★ and 4★ show their counter, 3★ shows 0"""
+    return np.where(rarity == 5, pity_5, np.where(rarity == 4, pity_4, 0))
+
+def last_in_group(groups: np.ndarray, mask: np.ndarray, order: np.ndarray, group_count: int) -> np.ndarray:
+    """Per group, the row index of the newest wish where mask is set, or -1"""
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(len(order))
+    newest_rank = np.full(group_count, -1, dtype=np.int64)
+    np.maximum.at(newest_rank, groups[mask], ranks[mask])
+    found = newest_rank >= 0
+    newest = np.full(group_count, -1, dtype=np.int64)
+    newest[found] = order[newest_rank[found]]
+    return newest
+
+def banner_aggregates(groups: np.ndarray, rarity: np.ndarray, order: np.ndarray,
+                      pity_5: np.ndarray, pity_4: np.ndarray, group_count: int) -> Dict[str, np.ndarray]:
+    """Per-group counts, pity sums, median 5★ pity and current pity, as arrays indexed by group code.
+
+    The median is returned as its two middle values, which are equal for an odd count.
+    """
+    five = rarity == 5
+    four = rarity == 4
+    five_groups, five_pity = groups[five], pity_5[five]
+    five_stars = np.bincount(five_groups, minlength=group_count)
+
+    # Sort 5★ pity by group, then value, and read the middle of each group's slice
+    ranked = five_pity[np.lexsort((five_pity, five_groups))]
+    starts = np.cumsum(five_stars) - five_stars
+    has_five = five_stars > 0
+    median_low = np.zeros(group_count, dtype=np.int64)
+    median_high = np.zeros(group_count, dtype=np.int64)
+    median_low[has_five] = ranked[starts[has_five] + (five_stars[has_five] - 1) // 2]
+    median_high[has_five] = ranked[starts[has_five] + five_stars[has_five] // 2]
+
+    # Counters after a group's newest wish; a hit leaves its own counter at 0
+    newest = last_in_group(groups, np.ones(len(groups), dtype=bool), order, group_count)
+    has_wishes = newest >= 0
+    rows = newest[has_wishes]
+    current_5 = np.zeros(group_count, dtype=np.int64)
+    current_4 = np.zeros(group_count, dtype=np.int64)
+    current_5[has_wishes] = np.where(rarity[rows] == 5, 0, pity_5[rows])
+    current_4[has_wishes] = np.where(rarity[rows] == 4, 0, pity_4[rows])
+
+    return {
+        "total": np.bincount(groups, minlength=group_count),
+        "five_stars": five_stars,
+        "four_stars": np.bincount(groups[four], minlength=group_count),
+        "pity_5_sum": np.bincount(five_groups, weights=five_pity, minlength=group_count).astype(np.int64),
+        "pity_4_sum": np.bincount(groups[four], weights=pity_4[four], minlength=group_count).astype(np.int64),
+        "median_low": median_low,
+        "median_high": median_high,
+        "current_5": current_5,
+        "current_4": current_4
+    }
@@ -29,11 +29,12 @@ class ModelTrainerService:
             # Convert to DataFrame
             df = pd.DataFrame(wishes)
             
-            # Convert time to datetime
-            df['time'] = pd.to_datetime(df['time'])
+            # Convert time to datetime with the API's fixed format instead of inferring it per call
+            df['time'] = pd.to_datetime(df['time'], format='%Y-%m-%d %H:%M:%S')
+            df['id'] = df['id'].astype('int64')
             
-            # Sort by time
-            df = df.sort_values('time')
+            # Sort by time, then by wish id within a 10-pull
+            df = df.sort_values(['time', 'id'], kind='stable')
             
             # Process each banner type separately
             banner_types = df['bannerType'].unique()
@@ -72,7 +73,7 @@ class ModelTrainerService:
                 standard_characters = ["Diluc", "Jean", "Keqing", "Mona", "Qiqi", "Tighnari", "Dehya"]
                 
                 # Sort by time for pity calculation
-                banner_df = banner_df.sort_values('time')
+                banner_df = banner_df.sort_values(['time', 'id'], kind='stable')
                 
                 for i, (idx, row) in enumerate(banner_df.iterrows()):
                     banner_df.at[idx, 'since_last_5star'] = pity_counter
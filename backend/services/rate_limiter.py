@@ -0,0 +1,93 @@
+# Path: backend/services/rate_limiter.py
+import time
+import random
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every worker that talks to one server.
+
+    Each acquire reserves a token immediately and sleeps until the bucket has
+    refilled enough to cover it, so concurrent callers are served in order and
+    the combined request rate never exceeds `rate` per second.
+    """
+
+    def __init__(self, rate: float = 2.0, capacity: float = 1.0):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("Rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until `tokens` are available and return the time spent waiting"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+            wait = max(0.0, -self._tokens / self.rate)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """Token bucket that slows down when the server throttles and recovers afterwards.
+
+    A throttled request halves the rate (down to `min_rate`) and sleeps for an
+    exponentially growing, jittered delay. Throttles reported by several
+    workers within `base_delay` seconds only cut the rate once. After `recovery_successes`
+    successful requests in a row the rate climbs back by `recovery_factor`
+    until it reaches the configured ceiling again.
+    """
+
+    def __init__(self, rate: float = 2.0, capacity: float = 1.0, min_rate: float = 0.2,
+                 base_delay: float = 1.0, max_delay: float = 30.0,
+                 recovery_successes: int = 10, recovery_factor: float = 1.25):
+        super().__init__(rate=rate, capacity=capacity)
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.recovery_successes = recovery_successes
+        self.recovery_factor = recovery_factor
+        self._success_streak = 0
+        self._throttle_streak = 0
+        self._last_cut = float('-inf')
+
+    def _set_rate(self, rate: float):
+        # Settle tokens earned at the old rate before switching
+        self._refill(time.monotonic())
+        self.rate = rate
+
+    def record_success(self):
+        """Count a successful request and speed back up after a run of them"""
+        with self._lock:
+            self._throttle_streak = 0
+            self._success_streak += 1
+            if self._success_streak >= self.recovery_successes and self.rate < self.max_rate:
+                self._set_rate(min(self.max_rate, self.rate * self.recovery_factor))
+                self._success_streak = 0
+                logger.info(f"Request rate recovered to {self.rate:.2f}/s")
+
+    def backoff(self) -> float:
+        """Slow down after a throttled request, sleep a jittered delay and return it"""
+        with self._lock:
+            self._success_streak = 0
+            self._throttle_streak += 1
+            now = time.monotonic()
+            if now - self._last_cut >= self.base_delay:
+                self._set_rate(max(self.min_rate, self.rate / 2))
+                self._last_cut = now
+            ceiling = min(self.max_delay, self.base_delay * 2 ** (self._throttle_streak - 1))
+            delay = random.uniform(ceiling / 2, ceiling)
+        logger.warning(f"Throttled by server, retrying in {delay:.1f}s at {self.rate:.2f}/s")
+        time.sleep(delay)
+        return delay
@@ -0,0 +1,151 @@
+# Path: backend/services/result_cache.py
+import sys
+import json
+import logging
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Dict
+
+from .database import Database
+
+logger = logging.getLogger(__name__)
+
+# Read-through cache for bridge read results
+# Entries are keyed on the method, its arguments and the database's data
+# version, so any committed write makes older entries unreachable; they are
+# evicted least recently used first once their size passes the cap
+# Results are frozen into read-only dicts and lists when stored, so a hit hands
+# back the stored object itself and no caller can change what others read
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError("cached results are read-only")
+
+class FrozenDict(dict):
+    """A dict that refuses changes; copy.deepcopy gives a mutable copy"""
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return {key: thaw(value) for key, value in self.items()}
+
+class FrozenList(list):
+    """A list that refuses changes; copy.deepcopy gives a mutable copy"""
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return [thaw(value) for value in self]
+
+def freeze(value):
+    """A read-only copy of a result and its approximate size in bytes
+
+    Keys are left out of the size, as rows share the same key strings.
+    """
+    if isinstance(value, dict):
+        frozen, size = {}, sys.getsizeof(value)
+        for key, item in value.items():
+            frozen[key], item_size = freeze(item)
+            size += item_size
+        return FrozenDict(frozen), size
+    if isinstance(value, (list, tuple)):
+        frozen, size = [], sys.getsizeof(value)
+        for item in value:
+            item, item_size = freeze(item)
+            frozen.append(item)
+            size += item_size
+        return FrozenList(frozen), size
+    return value, sys.getsizeof(value)
+
+def thaw(value):
+    """A mutable deep copy of a frozen result"""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [thaw(item) for item in value]
+    return value
+
+class ResultCache:
+    def __init__(self, database: Database, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.database = database
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, name: str, args: tuple, kwargs: Dict, compute: Callable[[], Dict]) -> Dict:
+        """The cached result of name(*args, **kwargs), computing and storing it on a miss.
+
+        Only successful results are stored, so errors are retried on the next
+        call. Stored results are read-only, on the miss that stores them too.
+        """
+        # Read the version before computing: a write landing mid-call tags the
+        # result with the old version, so it is never served after that write
+        key = (name, json.dumps([args, kwargs], sort_keys=True, default=str), self.database.data_version())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        result = compute()
+        if isinstance(result, dict) and result.get("success"):
+            result = self._store(key, result)
+        return result
+
+    def _store(self, key, result: Dict) -> Dict:
+        frozen, size = freeze(result)
+        if size > self.max_bytes:
+            return frozen
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (frozen, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+        return frozen
+
+    def clear(self):
+        """Drop every entry, after writes that bypass the version key or free memory early"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+def cached_result(method: Callable) -> Callable:
+    """Serve a read-only API method through the instance's result_cache"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self.result_cache.get_or_compute(
+            method.__name__, args, kwargs, lambda: method(self, *args, **kwargs)
+        )
+    return wrapper
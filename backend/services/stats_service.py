@@ -0,0 +1,286 @@
+# Path: backend/services/stats_service.py
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from .database import BANNER_GROUPS, GROUP_CODES, Database, banner_condition, date_range
+from .pity_calculator import BANNER_GROUPS as GROUP_ORDER, OFF_BANNER_4_STAR_TYPES, PityCalculator
+
+logger = logging.getLogger(__name__)
+
+# Wish statistics computed inside SQLite
+# Counts come from the wish_totals summary where the filter allows, and pity
+# sums are aggregates over the stored pity_5 / pity_4 counters; medians, newest
+# wishes and the 50/50 chain use window functions over each banner group in
+# (time, id) order, so only a few rows per banner group ever reach Python
+
+GROUP_NAMES = {code: group for group, code in GROUP_CODES.items()}
+
+# Per-group counts, read from the trigger-maintained wish_totals when the
+# filter is by banner group alone, else counted from the wishes themselves
+SUMMARY_COUNTS_SQL = '''
+    SELECT banner_group, NULL AS banner_type, SUM(wishes) AS total,
+           COALESCE(SUM(wishes) FILTER (WHERE rarity = 5), 0) AS five_stars,
+           COALESCE(SUM(wishes) FILTER (WHERE rarity = 4), 0) AS four_stars
+    FROM wish_totals WHERE {where} GROUP BY banner_group HAVING SUM(wishes) > 0
+'''
+SCAN_COUNTS_SQL = '''
+    SELECT banner_group, MIN(bannerType) AS banner_type, COUNT(*) AS total,
+           COUNT(*) FILTER (WHERE rarity = 5) AS five_stars,
+           COUNT(*) FILTER (WHERE rarity = 4) AS four_stars
+    FROM wishes WHERE {where} GROUP BY banner_group
+'''
+
+# Per-group pity sums and median 5★ pity, as its two middle values
+PITY_SQL = '''
+    WITH hits AS (
+        SELECT banner_group, pity_5,
+               ROW_NUMBER() OVER (PARTITION BY banner_group ORDER BY pity_5) AS position,
+               COUNT(*) OVER (PARTITION BY banner_group) AS hit_count
+        FROM wishes WHERE rarity = 5 AND {where}
+    ),
+    medians AS (
+        SELECT banner_group,
+               MAX(CASE WHEN position = (hit_count + 1) / 2 THEN pity_5 END) AS median_low,
+               MAX(CASE WHEN position = hit_count / 2 + 1 THEN pity_5 END) AS median_high
+        FROM hits GROUP BY banner_group
+    )
+    SELECT s.banner_group,
+           COALESCE(SUM(s.pity_5) FILTER (WHERE s.rarity = 5), 0) AS pity_5_sum,
+           COALESCE(SUM(s.pity_4) FILTER (WHERE s.rarity = 4), 0) AS pity_4_sum,
+           COALESCE(m.median_low, 0) AS median_low,
+           COALESCE(m.median_high, 0) AS median_high
+    FROM (
+        SELECT banner_group, rarity, pity_5, pity_4 FROM wishes WHERE rarity IN (4, 5) AND {where}
+    ) s LEFT JOIN medians m ON m.banner_group = s.banner_group
+    GROUP BY s.banner_group
+'''
+
+# The newest wish of each group, and its newest 4★, for current pity and the 4★
+# guarantee; each is one descending probe of the (banner_group, time, id) index
+NEWEST_SQL = '''
+    WITH groups(banner_group) AS (SELECT value FROM json_each(?))
+    SELECT w.banner_group, w.rarity, w.type, w.pity_5, w.pity_4
+    FROM groups g JOIN wishes w ON w.id IN (
+        (SELECT id FROM wishes
+         WHERE banner_group = g.banner_group AND {where} ORDER BY time DESC, id DESC LIMIT 1),
+        (SELECT id FROM wishes
+         WHERE banner_group = g.banner_group AND rarity = 4 AND {where} ORDER BY time DESC, id DESC LIMIT 1)
+    )
+    ORDER BY w.banner_group, w.time DESC, w.id DESC
+'''
+
+# The 50/50 chain of the event banners. A 5★ is guaranteed when the group's
+# previous 5★ came from the standard pool (LAG over the whole history, since a
+# guarantee carries over from before any date range). Losses among the 50/50
+# pulls in scope form islands: the difference of the row numbers over all
+# 50/50 pulls and over those with the same outcome is constant along a run
+FIFTY_FIFTY_SQL = '''
+    WITH standard(banner_group, name) AS (
+        SELECT 1, value FROM json_each(?)
+        UNION ALL
+        SELECT 2, value FROM json_each(?)
+    ),
+    chained AS (
+        SELECT w.banner_group, w.bannerType, w.id, w.time, s.name IS NOT NULL AS lost,
+               COALESCE(LAG(s.name IS NOT NULL) OVER (
+                   PARTITION BY w.banner_group ORDER BY w.time, w.id
+               ), 0) AS guaranteed,
+               ROW_NUMBER() OVER (PARTITION BY w.banner_group ORDER BY w.time DESC, w.id DESC) AS recency
+        FROM wishes w
+        LEFT JOIN standard s ON s.banner_group = w.banner_group AND s.name = w.name
+        WHERE w.rarity = 5 AND w.banner_group IN (1, 2) AND {until}
+    ),
+    pulls AS (
+        SELECT banner_group, lost,
+               ROW_NUMBER() OVER (PARTITION BY banner_group ORDER BY time, id) AS position,
+               ROW_NUMBER() OVER (PARTITION BY banner_group ORDER BY time, id)
+                 - ROW_NUMBER() OVER (PARTITION BY banner_group, lost ORDER BY time, id) AS run
+        FROM chained WHERE NOT guaranteed AND {where}
+    ),
+    runs AS (
+        SELECT banner_group, COUNT(*) AS length, MAX(position) AS last_position
+        FROM pulls WHERE lost GROUP BY banner_group, run
+    ),
+    outcomes AS (
+        SELECT banner_group, COUNT(*) FILTER (WHERE NOT lost) AS won,
+               COUNT(*) FILTER (WHERE lost) AS lost, COUNT(*) AS pulls
+        FROM pulls GROUP BY banner_group
+    )
+    SELECT g.banner_group,
+           COALESCE(c.lost, 0) AS guaranteed,
+           COALESCE(o.won, 0) AS won,
+           COALESCE(o.lost, 0) AS lost,
+           COALESCE((SELECT length FROM runs r
+                     WHERE r.banner_group = g.banner_group AND r.last_position = o.pulls), 0) AS loss_streak,
+           COALESCE((SELECT MAX(length) FROM runs r WHERE r.banner_group = g.banner_group), 0) AS max_loss_streak
+    FROM (SELECT 1 AS banner_group UNION ALL SELECT 2) g
+    LEFT JOIN chained c ON c.banner_group = g.banner_group AND c.recency = 1
+    LEFT JOIN outcomes o ON o.banner_group = g.banner_group
+'''
+
+class StatsService:
+    def __init__(self, database: Database, calculator: Optional[PityCalculator] = None):
+        self.database = database
+        self.calculator = calculator or PityCalculator()
+
+    def get_stats(self, filters: Optional[Dict] = None) -> Dict:
+
+        # Returns the banner states and overall stats calculate_banner_states builds,
+        # computed in SQLite from the stored pity counters
+        # Filters take the history view's banner, date_from and date_to; pity is
+        # always counted over the full history, so a range reports the pity each
+        # wish really had and the state as of the range's newest wish
+
+        filters = filters or {}
+        groups, where, params, until, until_params = self._scope(filters)
+        condition = ' AND '.join(where) or '1'
+        # wish_totals is kept per banner group, so dates and single banner types need a scan
+        scan = any(clause != 'banner_group = ?' for clause in where)
+
+        with self.database.reader() as conn:
+            # One snapshot, so the queries agree
+            conn.execute('BEGIN')
+            try:
+                counts_sql = SCAN_COUNTS_SQL if scan else SUMMARY_COUNTS_SQL
+                counts = conn.execute(counts_sql.format(where=condition), params).fetchall()
+                pity = {
+                    row['banner_group']: row
+                    for row in conn.execute(PITY_SQL.format(where=condition), params * 2)
+                }
+                newest = conn.execute(
+                    NEWEST_SQL.format(where=condition),
+                    [json.dumps([row['banner_group'] for row in counts]), *params, *params]
+                ).fetchall()
+                if not scan and any(GROUP_NAMES.get(row['banner_group']) is None for row in counts):
+                    # Wishes outside the known groups are reported under their banner type
+                    banner_type = conn.execute(
+                        'SELECT MIN(bannerType) FROM wishes WHERE banner_group = 0'
+                    ).fetchone()[0]
+                    counts = [
+                        {**dict(row), 'banner_type': banner_type} if row['banner_group'] == 0 else row
+                        for row in counts
+                    ]
+                chains = conn.execute(
+                    FIFTY_FIFTY_SQL.format(until=' AND '.join(until) or '1', where=condition),
+                    [json.dumps(self.calculator.standard_5_stars),
+                     json.dumps(self.calculator.standard_5_star_weapons),
+                     *until_params, *params]
+                ).fetchall()
+            finally:
+                conn.execute('COMMIT')
+
+        names = {}
+        values = {}
+        for row in counts:
+            group = GROUP_NAMES.get(row['banner_group'], row['banner_type'])
+            names[row['banner_group']] = group
+            sums = pity.get(row['banner_group'])
+            values[group] = {
+                'total': row['total'],
+                'five_stars': row['five_stars'],
+                'four_stars': row['four_stars'],
+                'current_5': 0,
+                'current_4': 0,
+                **{
+                    key: sums[key] if sums else 0
+                    for key in ('pity_5_sum', 'pity_4_sum', 'median_low', 'median_high')
+                }
+            }
+
+        # Each group's rows come newest first: its newest wish, then its newest 4★ if older
+        guaranteed_4 = {}
+        current = set()
+        for row in newest:
+            group = names[row['banner_group']]
+            if group not in current:
+                current.add(group)
+                values[group]['current_5'] = 0 if row['rarity'] == 5 else row['pity_5']
+                values[group]['current_4'] = 0 if row['rarity'] == 4 else row['pity_4']
+            if row['rarity'] == 4:
+                guaranteed_4[group] = row['type'] == OFF_BANNER_4_STAR_TYPES.get(group)
+
+        fifty_fifty = {
+            GROUP_NAMES[row['banner_group']]: {
+                'guaranteed': bool(row['guaranteed']), 'won': row['won'], 'lost': row['lost'],
+                'loss_streak': row['loss_streak'], 'max_loss_streak': row['max_loss_streak']
+            }
+            for row in chains
+        }
+
+        # Every requested group is reported, in the calculator's order, even without wishes
+        empty = {key: 0 for key in (
+            'total', 'five_stars', 'four_stars', 'pity_5_sum', 'pity_4_sum',
+            'median_low', 'median_high', 'current_5', 'current_4'
+        )}
+        ordered = [group for group in GROUP_ORDER if group in groups] + [
+            group for group in values if group not in GROUP_ORDER
+        ]
+        return self.calculator.build_banner_states({
+            group: (
+                values.get(group, empty),
+                fifty_fifty.get(group) if group in values else None,
+                guaranteed_4.get(group, False)
+            )
+            for group in ordered
+        })
+
+    def get_totals(self, item_limit: int = 20, min_rarity: int = 4) -> Dict:
+        """Wish counts per banner group and rarity, and the most obtained items.
+
+        Read from the trigger-maintained summary tables, so the cost does not
+        grow with the history.
+        """
+        with self.database.reader() as conn:
+            conn.execute('BEGIN')
+            try:
+                rows = conn.execute(
+                    'SELECT banner_group, rarity, wishes FROM wish_totals WHERE wishes > 0'
+                ).fetchall()
+                items = conn.execute('''
+                    SELECT name, type, rarity, obtained FROM item_totals
+                    WHERE rarity >= ? ORDER BY obtained DESC, rarity DESC, name LIMIT ?
+                ''', (min_rarity, item_limit)).fetchall()
+            finally:
+                conn.execute('COMMIT')
+
+        banners = {}
+        for row in rows:
+            banner = banners.setdefault(GROUP_NAMES.get(row['banner_group'], 'unknown'), {
+                'total': 0, 'five_stars': 0, 'four_stars': 0, 'three_stars': 0
+            })
+            banner['total'] += row['wishes']
+            key = {5: 'five_stars', 4: 'four_stars', 3: 'three_stars'}.get(row['rarity'])
+            if key:
+                banner[key] += row['wishes']
+        return {
+            'total_wishes': sum(banner['total'] for banner in banners.values()),
+            'total_five_stars': sum(banner['five_stars'] for banner in banners.values()),
+            'total_four_stars': sum(banner['four_stars'] for banner in banners.values()),
+            'banners': banners,
+            'items': [dict(row) for row in items]
+        }
+
+    def _scope(self, filters: Dict) -> Tuple[List[str], List[str], List, List[str], List]:
+        """The groups to report, the SQL conditions for the filtered wishes, and
+        the end-of-range conditions alone, which bound the 50/50 chain"""
+        where, params = [], []
+        until, until_params = [], []
+        groups = list(GROUP_ORDER)
+
+        banner = filters.get('banner')
+        condition = banner_condition(banner)
+        if condition:
+            where.append(condition[0])
+            params.append(condition[1])
+            groups = [banner] if banner in GROUP_CODES else [GROUP_NAMES[BANNER_GROUPS[banner]]]
+
+        start, end = date_range(filters)
+        if start is not None:
+            where.append('time >= ?')
+            params.append(start)
+        if end is not None:
+            until.append('time < ?')
+            until_params.append(end)
+
+        return groups, where + until, params + until_params, until, until_params
@@ -0,0 +1,270 @@
+# Path: backend/services/uigf.py
+import json
+import time
+import logging
+from typing import Dict, Iterable, Iterator, Optional, TextIO
+
+logger = logging.getLogger(__name__)
+
+# Streaming reader and writer for UIGF (Uniformed Interchange GachaLog Format)
+# Handles v2.x/v3.x files (info + list) and v4.x files (info + hk4e accounts)
+# Records are parsed one at a time so archive size does not drive memory use
+
+UIGF_VERSION = "v4.0"
+
+GACHA_TYPE_BANNERS = {
+    "301": "character-1",
+    "400": "character-2",
+    "302": "weapon",
+    "200": "permanent",
+    "500": "chronicled"
+}
+BANNER_GACHA_TYPES = {banner: gacha_type for gacha_type, banner in GACHA_TYPE_BANNERS.items()}
+
+REQUIRED_FIELDS = ('id', 'time', 'name', 'item_type', 'rank_type')
+# Characters that can continue a JSON number after a prefix that already decodes
+NUMBER_CHARS = frozenset('0123456789+-.eE')
+
+class UIGFFormatError(ValueError):
+    """Raised when a file is not valid JSON or not a UIGF document"""
+
+class JsonStreamReader:
+    """Pull parser that walks a JSON document from a text stream.
+
+    Containers are entered with iter_object / iter_array, which yield once
+    per member; the caller then consumes the member with read_value, a
+    nested iterator or skip_value. Only one member is buffered at a time.
+    """
+
+    def __init__(self, stream: TextIO, chunk_size: int = 1 << 16):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._stream.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        # Drop the consumed prefix so the buffer only holds unread text
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ''
+
+    def _expect(self, char: str):
+        found = self._peek()
+        if found != char:
+            raise UIGFFormatError(f"Expected '{char}' but found '{found or 'end of file'}'")
+        self._pos += 1
+
+    def peek_type(self) -> str:
+        return self._peek()
+
+    def read_value(self):
+        """Decode the next complete JSON value"""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as e:
+                if self._fill():
+                    continue
+                raise UIGFFormatError(f"Invalid JSON: {e}")
+            # A number whose token runs to the buffer edge, including a trailing
+            # '.', 'e' or sign, may continue in the next chunk
+            if self._buf[self._pos] in '-0123456789':
+                tail = end
+                while tail < len(self._buf) and self._buf[tail] in NUMBER_CHARS:
+                    tail += 1
+                if tail == len(self._buf) and self._fill():
+                    continue
+            self._pos = end
+            return value
+
+    def skip_value(self):
+        char = self._peek()
+        if char == '{':
+            for _ in self.iter_object():
+                self.skip_value()
+        elif char == '[':
+            for _ in self.iter_array():
+                self.skip_value()
+        else:
+            self.read_value()
+
+    def iter_object(self) -> Iterator[str]:
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self.read_value()
+            if not isinstance(key, str):
+                raise UIGFFormatError("Object keys must be strings")
+            self._expect(':')
+            yield key
+            char = self._peek()
+            self._pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise UIGFFormatError(f"Expected ',' or '}}' but found '{char or 'end of file'}'")
+
+    def iter_array(self) -> Iterator[None]:
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield None
+            char = self._peek()
+            self._pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise UIGFFormatError(f"Expected ',' or ']' but found '{char or 'end of file'}'")
+
+class UIGFReader:
+    """Iterates the wishes of one account in a UIGF file, validating as it goes.
+
+    Only the first hk4e account is read unless a uid is given. Records that
+    miss required fields or belong to banners PityPal does not track are
+    counted in `skipped` instead of aborting the import.
+    """
+
+    def __init__(self, stream: TextIO, uid: Optional[str] = None):
+        self._reader = JsonStreamReader(stream)
+        self.uid = str(uid) if uid is not None else None
+        self.version = None
+        self.count = 0
+        self.skipped = 0
+        self.skipped_accounts = 0
+
+    def _normalize(self, record) -> Optional[Dict]:
+        if not isinstance(record, dict) or not all(record.get(field) for field in REQUIRED_FIELDS):
+            return None
+        gacha_type = str(record.get('gacha_type') or record.get('uigf_gacha_type') or '')
+        banner_type = GACHA_TYPE_BANNERS.get(gacha_type)
+        if banner_type is None:
+            return None
+        try:
+            wish_id = str(int(record['id']))
+            rarity = int(record['rank_type'])
+        except (TypeError, ValueError):
+            return None
+        return {
+            "id": wish_id,
+            "name": str(record['name']).strip(),
+            "rarity": rarity,
+            "type": str(record['item_type']),
+            "time": str(record['time']),
+            "bannerType": banner_type
+        }
+
+    def _iter_records(self) -> Iterator[Dict]:
+        for _ in self._reader.iter_array():
+            wish = self._normalize(self._reader.read_value())
+            if wish is None:
+                self.skipped += 1
+                continue
+            self.count += 1
+            yield wish
+
+    def _iter_accounts(self) -> Iterator[Dict]:
+        matched = False
+        for _ in self._reader.iter_array():
+            if self._reader.peek_type() != '{':
+                raise UIGFFormatError("hk4e entries must be objects")
+            wanted = None
+            for key in self._reader.iter_object():
+                if key == 'uid':
+                    account_uid = str(self._reader.read_value())
+                    wanted = not matched and (self.uid is None or self.uid == account_uid)
+                    if wanted:
+                        self.uid = account_uid
+                elif key == 'list' and wanted:
+                    matched = True
+                    yield from self._iter_records()
+                else:
+                    # Accounts without a leading uid or other accounts are skipped unread
+                    if key == 'list':
+                        self.skipped_accounts += 1
+                    self._reader.skip_value()
+
+    def __iter__(self) -> Iterator[Dict]:
+        found_list = False
+        for key in self._reader.iter_object():
+            if key == 'info':
+                info = self._reader.read_value()
+                if isinstance(info, dict):
+                    self.version = info.get('version') or info.get('uigf_version')
+                    if self.uid is None and info.get('uid') is not None:
+                        self.uid = str(info['uid'])
+            elif key == 'list':
+                found_list = True
+                yield from self._iter_records()
+            elif key == 'hk4e':
+                found_list = True
+                yield from self._iter_accounts()
+            else:
+                self._reader.skip_value()
+        if not found_list:
+            raise UIGFFormatError("No Genshin Impact wish list found in file")
+
+def timezone_for_uid(uid: str) -> int:
+    """Server UTC offset that the API's wish times are written in"""
+    uid = str(uid)
+    if uid.startswith('6'):
+        return -5   # America
+    if uid.startswith('7'):
+        return 1    # Europe
+    return 8        # Asia, TW/HK/MO and mainland servers
+
+def write_uigf(stream: TextIO, wishes: Iterable[Dict], uid: str, app_version: str,
+               lang: str = "en-us") -> int:
+    """Write wishes as a UIGF v4.0 document, one record at a time"""
+    info = {
+        "export_timestamp": int(time.time()),
+        "export_app": "PityPal",
+        "export_app_version": app_version,
+        "version": UIGF_VERSION
+    }
+    account = {"uid": str(uid), "timezone": timezone_for_uid(uid), "lang": lang}
+
+    # Everything but the list is small, so write it whole and open the list by hand
+    header = json.dumps({"info": info, "hk4e": [account]}, ensure_ascii=False)
+    stream.write(header[:-3] + ', "list": [')
+
+    count = 0
+    for wish in wishes:
+        gacha_type = BANNER_GACHA_TYPES.get(wish['bannerType'], "200")
+        record = {
+            "uigf_gacha_type": "301" if gacha_type == "400" else gacha_type,
+            "gacha_type": gacha_type,
+            "item_id": "",
+            "count": "1",
+            "time": wish['time'],
+            "name": wish['name'],
+            "item_type": wish['type'],
+            "rank_type": str(wish['rarity']),
+            "id": str(wish['id'])
+        }
+        stream.write(('\n' if count == 0 else ',\n') + json.dumps(record, ensure_ascii=False))
+        count += 1
+
+    stream.write('\n]}]}\n')
+    return count
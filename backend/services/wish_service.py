@@ -1,10 +1,12 @@
 # Path: backend/services/wish_service.py
 import json
-import time
+import queue
+import hashlib
 import sqlite3
+import threading
 import requests
-import pandas as pd
 import platform
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 import logging
@@ -12,12 +14,23 @@ from typing import Dict, List, Optional, Callable
 from urllib.parse import parse_qs, urlparse
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from .rate_limiter import AdaptiveRateLimiter
+from .import_progress import ImportProgress
+from .history_cache import get_history_cache
+from .exporter import export_wishes
+from .database import (
+    WISH_COLUMNS, PITY_COLUMN, get_database, upsert_wishes, row_to_wish, from_epoch, banner_condition, date_range,
+    fts_query, start_import_session, finish_import_session, session_to_dict
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Non-zero retcodes the gacha log API uses for "visit too frequently"
+THROTTLE_RETCODES = {-110}
+
 class WishService:
-    def __init__(self):
+    def __init__(self, requests_per_second: float = 2.0):
         self.api_base = "https://public-operation-hk4e-sg.hoyoverse.com/gacha_info/api"
         self.banner_types = {
             "301": "character-1",    # First character event banner
@@ -27,14 +40,20 @@ class WishService:
             "500": "chronicled"      # Chronicled wish
         }
         self.history = []
+        # One limiter for all banner workers keeps the server-side request rate
+        # at the old one-page-every-0.5s pace and backs off when throttled
+        self.rate_limiter = AdaptiveRateLimiter(rate=requests_per_second)
+        self.max_throttle_retries = 8
+        self.max_workers = len(self.banner_types)
+        self.write_batch_size = 500
+        self.write_queue_size = 64
         if platform.system() == "Windows":
             self.db_path = Path.home() / "AppData/Local/PityPal/wishes.db"
         elif platform.system() == "Darwin":  # macOS
             self.db_path = Path.home() / "Library/Application Support/PityPal/wishes.db"
         else:  # Linux and others
             self.db_path = Path.home() / ".pitypal/wishes.db"
-            
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
         self.init_database()
         self.load_history()
         self.session = self._create_session()
@@ -53,50 +72,182 @@ class WishService:
         return session
 
     def init_database(self):
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute('''
-                    CREATE TABLE IF NOT EXISTS wishes (
-                        id TEXT PRIMARY KEY,
-                        name TEXT NOT NULL,
-                        rarity INTEGER NOT NULL,
-                        type TEXT NOT NULL,
-                        time TIMESTAMP NOT NULL,
-                        bannerType TEXT NOT NULL
-                    )
-                ''')
-                conn.execute('CREATE INDEX IF NOT EXISTS idx_wishes_time ON wishes(time)')
-                conn.execute('CREATE INDEX IF NOT EXISTS idx_wishes_bannerType ON wishes(bannerType)')
-                conn.execute('CREATE INDEX IF NOT EXISTS idx_wishes_rarity ON wishes(rarity)')
-                logger.info("Database initialized successfully")
-        except sqlite3.Error as e:
-            logger.error(f"Database initialization failed: {e}")
-            raise
+        # Schema setup and connection tuning live in the shared database layer
+        self.db = get_database(self.db_path)
+        self.history_cache = get_history_cache(self.db)
 
     def load_history(self):
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.execute('SELECT * FROM wishes ORDER BY time DESC')
-                self.history = [dict(row) for row in cursor.fetchall()]
-                logger.info(f"Loaded {len(self.history)} wishes from database")
+            self.history = self.history_cache.get().records()
+            logger.info(f"Loaded {len(self.history)} wishes from database")
         except sqlite3.Error as e:
             logger.error(f"Failed to load wish history: {e}")
             self.history = []
 
-    def get_history(self):
-        """Get wish history with proper refresh"""
+    def get_history(self, with_pity: bool = False):
+        """Get wish history with proper refresh, optionally with each wish's stored pity"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.execute('SELECT * FROM wishes ORDER BY time DESC')
-                self.history = [dict(row) for row in cursor.fetchall()]
-                logger.info(f"Loaded {len(self.history)} wishes from database")
-                return self.history
+            # Served from the columnar cache, which rescans the table only after writes
+            self.history = self.history_cache.get().records(with_pity)
+            return self.history
         except sqlite3.Error as e:
             logger.error(f"Failed to load wish history: {e}")
             return []
 
+    def query_history(self, filters: Optional[Dict] = None, cursor: Optional[str] = None,
+                      limit: int = 10, order: str = 'desc') -> Dict:
+
+        # Returns one page of wish history, with pity, for the history view
+        # Keyset pagination over (time, id): cursor is the "time:id" key of the last
+        # wish on the previous page, so deep pages cost the same as the first one
+        # Totals are only counted for the first page of a filter
+
+        try:
+            if order not in ('asc', 'desc'):
+                raise ValueError(f"Invalid sort order: {order}")
+            limit = max(1, min(int(limit), 200))
+            where, params = self._history_filters(filters or {})
+
+            if cursor:
+                try:
+                    cursor_time, cursor_id = (int(part) for part in str(cursor).split(':'))
+                except ValueError:
+                    raise ValueError("Invalid page cursor")
+                where.append(f"(time, id) {'<' if order == 'desc' else '>'} (?, ?)")
+                params.extend([cursor_time, cursor_id])
+
+            direction = 'DESC' if order == 'desc' else 'ASC'
+            where_sql = f"WHERE {' AND '.join(where)}" if where else ''
+            with self.db.reader() as conn:
+                rows = conn.execute(f'''
+                    SELECT {WISH_COLUMNS}, {PITY_COLUMN} FROM wishes {where_sql}
+                    ORDER BY time {direction}, id {direction} LIMIT ?
+                ''', (*params, limit + 1)).fetchall()
+
+                total = overall_total = None
+                if not cursor:
+                    total = conn.execute(f'SELECT COUNT(*) FROM wishes {where_sql}', params).fetchone()[0]
+                    overall_total = conn.execute('SELECT COUNT(*) FROM wishes').fetchone()[0]
+
+            # The extra row only tells whether another page follows
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = f"{rows[-1]['time']}:{rows[-1]['id']}"
+
+            return {
+                "success": True,
+                "data": [row_to_wish(row) for row in rows],
+                "next_cursor": next_cursor,
+                "total": total,
+                "overall_total": overall_total
+            }
+        except (ValueError, sqlite3.Error) as e:
+            logger.error(f"Failed to query wish history: {e}")
+            return {"success": False, "error": str(e)}
+
+    def search_wishes(self, query: str, filters: Optional[Dict] = None, limit: int = 100) -> Dict:
+        """Find wishes whose item name matches every word of the query as a prefix, newest first"""
+        try:
+            if not fts_query(query):
+                return {"success": True, "data": [], "count": 0}
+            limit = max(1, min(int(limit), 1000))
+            where, params = self._history_filters({**(filters or {}), "name": query})
+            where_sql = ' AND '.join(where)
+            with self.db.reader() as conn:
+                rows = conn.execute(f'''
+                    SELECT {WISH_COLUMNS}, {PITY_COLUMN} FROM wishes WHERE {where_sql}
+                    ORDER BY time DESC, id DESC LIMIT ?
+                ''', (*params, limit)).fetchall()
+                count = conn.execute(f'SELECT COUNT(*) FROM wishes WHERE {where_sql}', params).fetchone()[0]
+            return {
+                "success": True,
+                "data": [row_to_wish(row) for row in rows],
+                "count": count
+            }
+        except (ValueError, sqlite3.Error) as e:
+            logger.error(f"Wish search failed: {e}")
+            return {"success": False, "error": str(e)}
+
+    def get_import_sessions(self, limit: int = 5, with_wishes: bool = True) -> Dict:
+        """Recent import sessions, newest first, each with the wishes it added.
+
+        Sessions and their wishes come from one query over the
+        (session_id, time, id) index, newest wish first within a session.
+        """
+        try:
+            limit = max(1, min(int(limit), 50))
+            with self.db.reader() as conn:
+                if with_wishes:
+                    rows = conn.execute(f'''
+                        SELECT s.id AS session_id, s.source, s.started, s.finished, s.status,
+                               s.new_count, s.banner_counts, s.first_wish_id, s.last_wish_id,
+                               w.id, w.name, w.rarity, w.type, w.time, w.bannerType, {PITY_COLUMN}
+                        FROM (SELECT * FROM import_sessions ORDER BY id DESC LIMIT ?) s
+                        LEFT JOIN wishes w ON w.session_id = s.id
+                        ORDER BY s.id DESC, w.time DESC, w.id DESC
+                    ''', (limit,)).fetchall()
+                else:
+                    rows = conn.execute('''
+                        SELECT id AS session_id, source, started, finished, status,
+                               new_count, banner_counts, first_wish_id, last_wish_id
+                        FROM import_sessions ORDER BY id DESC LIMIT ?
+                    ''', (limit,)).fetchall()
+
+            sessions = []
+            for row in rows:
+                if not sessions or sessions[-1]["id"] != row['session_id']:
+                    sessions.append(session_to_dict(row))
+                    if with_wishes:
+                        sessions[-1]["wishes"] = []
+                if with_wishes and row['id'] is not None:
+                    sessions[-1]["wishes"].append(row_to_wish(row))
+            return {"success": True, "data": sessions}
+        except (ValueError, sqlite3.Error) as e:
+            logger.error(f"Failed to get import sessions: {e}")
+            return {"success": False, "error": str(e)}
+
+    def _history_filters(self, filters: Dict):
+        """Build SQL conditions for history filters; 'all' or empty values are ignored"""
+        where, params = [], []
+
+        banner = banner_condition(filters.get('banner'))
+        if banner:
+            where.append(banner[0])
+            params.append(banner[1])
+
+        rarity = filters.get('rarity')
+        if rarity not in (None, '', 'all'):
+            where.append('rarity = ?')
+            params.append(int(rarity))
+
+        item_type = filters.get('type')
+        if item_type and item_type != 'all':
+            where.append('type = ?')
+            params.append(item_type)
+
+        name = (filters.get('name') or '').strip()
+        match = fts_query(name)
+        if match:
+            # Word-prefix match through the full-text index
+            where.append('id IN (SELECT rowid FROM wishes_fts WHERE wishes_fts MATCH ?)')
+            params.append(match)
+        elif name:
+            # Punctuation-only input has no words to index, so fall back to a substring scan
+            escaped = name.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            where.append("name LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+
+        start, end = date_range(filters)
+        if start is not None:
+            where.append('time >= ?')
+            params.append(start)
+        if end is not None:
+            where.append('time < ?')
+            params.append(end)
+
+        return where, params
+
     def parse_url(self, url: str) -> Dict:
         try:
             parsed = urlparse(url)
@@ -106,74 +257,104 @@ class WishService:
             logger.error(f"URL parsing failed: {e}")
             raise ValueError("Invalid URL format")
 
-    def import_from_url(self, url: str, progress_callback: Optional[Callable] = None) -> Dict:
+    def import_from_url(self, url: str, progress_callback: Optional[Callable] = None,
+                        incremental: bool = True) -> Dict:
 
         # Parses and imports wish history directly from the game's API endpoint
         # Uses rate limiting to avoid connection issues
-        # Reports progress through callback function to update the UI
+        # Reports progress events (pages, rows, request rate, ETA) through the callback
+        # In incremental mode each banner stops paginating at the newest wish already stored
+        # and first finishes any pass an earlier, interrupted import left a checkpoint for
 
         try:
-            if progress_callback:
-                progress_callback(5)
-
             params = self.parse_url(url)
             if 'authkey' not in params:
                 raise ValueError("Authentication key not found in URL")
 
             logger.info("Starting wish history fetch...")
-            if progress_callback:
-                progress_callback(10)
+            latest_ids = self._get_latest_wish_ids()
+            checkpoints = self._load_checkpoints()
+            progress = ImportProgress(
+                self.banner_types,
+                stop_times=self._get_latest_wish_times() if incremental else None,
+                callback=progress_callback
+            )
+            progress.set_stage("fetching")
+            with self.db.writer() as conn:
+                session_id = start_import_session(conn, "game")
+            new_counts = {banner_name: 0 for banner_name in self.banner_types.values()}
+            fetch_lock = threading.Lock()
+            stop_event = threading.Event()
+            resumed = []
+
+            # Pages are normalised by the fetch workers and written by a single writer
+            # thread, so network fetching and SQLite writes overlap
+            page_queue = queue.Queue(maxsize=self.write_queue_size)
+            writer_state = {"inserted": 0, "updated": 0, "unchanged": 0, "error": None}
+            writer = threading.Thread(
+                target=self._write_pages, args=(page_queue, writer_state, stop_event, session_id), daemon=True
+            )
+            writer.start()
 
-            all_wishes = []
-            for banner_id in self.banner_types:
-                current_params = {**params, "gacha_type": banner_id}
-                current_params['page'] = '1'
-                current_params['size'] = '20'
-                current_params['end_id'] = '0'
+            def on_page(banner_name, wishes, new_count, checkpoint):
+                page_queue.put((self._process_wish_data(wishes), checkpoint))
+                if checkpoint.get('clear'):
+                    return
+                with fetch_lock:
+                    new_counts[banner_name] += new_count
+                progress.record_page(banner_name, wishes, new_count)
 
-                while True:
+            fetched = False
+            try:
+                # Each banner has its own end_id cursor, so banners are paged concurrently
+                # while the shared token bucket keeps the overall request rate unchanged
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    futures = {
+                        executor.submit(
+                            self._fetch_banner, params, banner_id, latest_ids.get(banner_name),
+                            checkpoints.get(banner_id), incremental, on_page, stop_event, progress
+                        ): banner_name
+                        for banner_id, banner_name in self.banner_types.items()
+                    }
                     try:
-                        response = self.session.get(
-                            f"{self.api_base}/getGachaLog", 
-                            params=current_params,
-                            timeout=(5, 15)  # Connect timeout, Read timeout
-                        )
-                        data = response.json()
-                        
-                        if data["retcode"] != 0:
-                            error_msg = data.get('message', 'Unknown error')
-                            logger.error(f"API Error: {error_msg}")
-                            raise Exception(f"API Error: {error_msg}")
-
-                        wishes = data["data"]["list"]
-                        if not wishes:
-                            break
-
-                        all_wishes.extend(wishes)
-                        current_params['end_id'] = wishes[-1]["id"]
-                        time.sleep(0.5)  # Rate limiting
-
-                        if progress_callback:
-                            progress = min(90, len(all_wishes) / 2)
-                            progress_callback(int(progress))
-                    except requests.RequestException as e:
-                        logger.error(f"Network error: {e}")
-                        raise Exception(f"Failed to connect to wish history server: {e}")
-
-            if progress_callback:
-                progress_callback(95)
-
-            processed_wishes = self._process_wish_data(all_wishes)
-            self.save_wishes(processed_wishes)
-            self.history = processed_wishes
-
-            if progress_callback:
-                progress_callback(100)
+                        for future in as_completed(futures):
+                            if future.result():
+                                resumed.append(futures[future])
+                            progress.finish_banner(futures[future])
+                    except Exception:
+                        stop_event.set()
+                        raise
+                fetched = True
+            finally:
+                # Flush every page fetched so far, even when a worker failed
+                progress.set_stage("saving")
+                page_queue.put(None)
+                writer.join()
+                logger.info(
+                    f"Saved fetched wishes: {writer_state['inserted']} inserted, "
+                    f"{writer_state['updated']} updated, {writer_state['unchanged']} unchanged"
+                )
+                # The session keeps whatever was saved, even from a failed import
+                with self.db.writer() as conn:
+                    finish_import_session(
+                        conn, session_id, 'completed' if fetched and not writer_state["error"] else 'failed'
+                    )
+
+            if writer_state["error"]:
+                raise writer_state["error"]
 
+            history = self.get_history(with_pity=True)
+            progress.set_stage("done")
+
+            new_total = sum(new_counts.values())
+            logger.info(f"Import finished with {new_total} new wishes: {new_counts}")
             return {
                 "success": True,
-                "data": processed_wishes,
-                "message": f"Successfully imported {len(processed_wishes)} wishes"
+                "data": history,
+                "new_counts": new_counts,
+                "resumed": resumed,
+                "session_id": session_id,
+                "message": f"Successfully imported {new_total} new wishes"
             }
 
         except Exception as e:
@@ -183,6 +364,203 @@ class WishService:
                 "error": str(e)
             }
 
+    def _get_latest_wish_ids(self) -> Dict[str, int]:
+        """Get the newest stored wish id for each banner type"""
+        try:
+            with self.db.reader() as conn:
+                cursor = conn.execute('''
+                    SELECT bannerType, MAX(id)
+                    FROM wishes
+                    GROUP BY bannerType
+                ''')
+                return {banner: latest for banner, latest in cursor.fetchall() if latest is not None}
+        except sqlite3.Error as e:
+            logger.error(f"Failed to read latest wish ids: {e}")
+            return {}
+
+    def _get_latest_wish_times(self) -> Dict[str, str]:
+        """Get the newest stored wish time for each banner type"""
+        try:
+            with self.db.reader() as conn:
+                cursor = conn.execute('SELECT bannerType, MAX(time) FROM wishes GROUP BY bannerType')
+                return {banner: from_epoch(latest) for banner, latest in cursor.fetchall() if latest is not None}
+        except sqlite3.Error as e:
+            logger.error(f"Failed to read latest wish times: {e}")
+            return {}
+
+    def _authkey_fingerprint(self, authkey: str) -> str:
+        """Hash the authkey so checkpoints never store the credential itself"""
+        return hashlib.sha256(authkey.encode('utf-8')).hexdigest()[:16]
+
+    def _load_checkpoints(self) -> Dict[str, Dict]:
+        """Get the pagination checkpoints left behind by interrupted imports"""
+        try:
+            with self.db.reader() as conn:
+                cursor = conn.execute('SELECT * FROM import_checkpoints')
+                return {row['gacha_type']: dict(row) for row in cursor.fetchall()}
+        except sqlite3.Error as e:
+            logger.error(f"Failed to load import checkpoints: {e}")
+            return {}
+
+    def _apply_checkpoints(self, conn, checkpoints: List[Dict]):
+        """Persist or clear checkpoints in the caller's transaction, in arrival order"""
+        for checkpoint in checkpoints:
+            if checkpoint.get('clear'):
+                conn.execute('DELETE FROM import_checkpoints WHERE gacha_type = ?',
+                             (checkpoint['gacha_type'],))
+            else:
+                conn.execute('''
+                    INSERT OR REPLACE INTO import_checkpoints
+                    (gacha_type, end_id, stop_id, authkey_hash, uid, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (
+                    checkpoint['gacha_type'],
+                    checkpoint['end_id'],
+                    checkpoint['stop_id'],
+                    checkpoint['authkey_hash'],
+                    checkpoint['uid'],
+                    datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                ))
+
+    def _write_pages(self, page_queue: queue.Queue, writer_state: Dict, stop_event: threading.Event,
+                     session_id: Optional[int] = None):
+        """Drain normalised pages from the queue and save them in batched transactions"""
+        finished = False
+        while not finished:
+            batch = []
+            checkpoints = []
+            item = page_queue.get()
+            # Group whatever else has already arrived into the same transaction
+            while item is not None:
+                page, checkpoint = item
+                batch.extend(page)
+                checkpoints.append(checkpoint)
+                if len(batch) >= self.write_batch_size:
+                    break
+                try:
+                    item = page_queue.get_nowait()
+                except queue.Empty:
+                    break
+            finished = item is None
+
+            if checkpoints and writer_state["error"] is None:
+                try:
+                    # Rows and the checkpoints covering them commit together, so a
+                    # checkpoint never points past data that is not on disk
+                    with self.db.writer() as conn:
+                        counts = upsert_wishes(conn, batch, session_id)
+                        self._apply_checkpoints(conn, checkpoints)
+                    for key, count in counts.items():
+                        writer_state[key] += count
+                except Exception as e:
+                    # Keep draining so fetch workers never block on a full queue
+                    writer_state["error"] = e
+                    stop_event.set()
+
+    def _fetch_banner(self, params: Dict, banner_id: str, latest_id: Optional[int],
+                      checkpoint: Optional[Dict], incremental: bool, on_page: Callable,
+                      stop_event: threading.Event, progress: Optional[ImportProgress] = None) -> bool:
+        """Fetch one banner, finishing an interrupted pass first when a checkpoint exists"""
+        authkey_hash = self._authkey_fingerprint(params['authkey'])
+        resumed = False
+
+        if checkpoint and incremental:
+            # An authkey expires after a day, so a different key is expected on retry.
+            # The account uid on the first resumed page decides whether the cursor still applies
+            expected_uid = None if checkpoint['authkey_hash'] == authkey_hash else checkpoint['uid']
+            logger.info(f"Resuming banner {banner_id} from end_id {checkpoint['end_id']}")
+            resumed = self._paginate(
+                params, banner_id, checkpoint['end_id'], checkpoint['stop_id'], checkpoint['stop_id'],
+                authkey_hash, on_page, stop_event, expected_uid=expected_uid, progress=progress
+            )
+
+        if not stop_event.is_set():
+            self._paginate(
+                params, banner_id, '0', latest_id if incremental else None, latest_id,
+                authkey_hash, on_page, stop_event, store_known=not incremental, progress=progress
+            )
+        return resumed
+
+    def _paginate(self, params: Dict, banner_id: str, end_id: str, stop_id: Optional[int],
+                  latest_id: Optional[int], authkey_hash: str, on_page: Callable,
+                  stop_event: threading.Event, expected_uid: Optional[str] = None,
+                  store_known: bool = False, progress: Optional[ImportProgress] = None) -> bool:
+
+        # Pages back from end_id until the history ends or a page reaches stop_id
+        # Every page carries a checkpoint so an interrupted pass can resume from it
+        # The checkpoint is cleared only once the pass runs to completion
+
+        banner_name = self.banner_types[banner_id]
+        current_params = {**params, "gacha_type": banner_id}
+        current_params['page'] = '1'
+        current_params['size'] = '20'
+        current_params['end_id'] = end_id
+        throttle_retries = 0
+        completed = False
+
+        while not stop_event.is_set():
+            try:
+                self.rate_limiter.acquire()
+                response = self.session.get(
+                    f"{self.api_base}/getGachaLog",
+                    params=current_params,
+                    timeout=(5, 15)  # Connect timeout, Read timeout
+                )
+                data = response.json()
+            except requests.RequestException as e:
+                logger.error(f"Network error: {e}")
+                raise Exception(f"Failed to connect to wish history server: {e}")
+            if progress:
+                progress.record_request()
+
+            # Throttling arrives as a 200 response, so retry the same end_id page
+            if data["retcode"] in THROTTLE_RETCODES and throttle_retries < self.max_throttle_retries:
+                throttle_retries += 1
+                self.rate_limiter.backoff()
+                continue
+
+            if data["retcode"] != 0:
+                error_msg = data.get('message', 'Unknown error')
+                logger.error(f"API Error: {error_msg}")
+                raise Exception(f"API Error: {error_msg}")
+
+            throttle_retries = 0
+            self.rate_limiter.record_success()
+            wishes = data["data"]["list"]
+            if not wishes:
+                completed = True
+                break
+
+            uid = wishes[0].get("uid")
+            if expected_uid and uid and uid != expected_uid:
+                logger.warning(f"Checkpoint for banner {banner_id} belongs to another account, discarding")
+                on_page(banner_name, [], 0, {"gacha_type": banner_id, "clear": True})
+                return False
+            expected_uid = None
+
+            new_wishes = [w for w in wishes if latest_id is None or int(w["id"]) > latest_id]
+            reached_stop = stop_id is not None and any(int(w["id"]) <= stop_id for w in wishes)
+            on_page(banner_name, wishes if store_known else new_wishes, len(new_wishes), {
+                "gacha_type": banner_id,
+                "end_id": wishes[-1]["id"],
+                "stop_id": stop_id,
+                "authkey_hash": authkey_hash,
+                "uid": uid
+            })
+
+            # Pages are newest first, so reaching stop_id means the rest is already stored
+            # Guard against a cursor that does not move back through history
+            if reached_stop or wishes[-1]["id"] == current_params['end_id']:
+                completed = True
+                break
+
+            current_params['end_id'] = wishes[-1]["id"]
+
+        if not completed:
+            return False
+        on_page(banner_name, [], 0, {"gacha_type": banner_id, "clear": True})
+        return True
+
     def _process_wish_data(self, wishes: List[Dict]) -> List[Dict]:
         processed_wishes = []
         for wish in wishes:
@@ -205,30 +583,23 @@ class WishService:
 
         return sorted(processed_wishes, key=lambda x: x["time"], reverse=True)
 
-    def save_wishes(self, wishes):
+    def save_wishes(self, wishes, session_id: Optional[int] = None) -> Dict[str, int]:
+        """Upsert wishes in one transaction and report inserted, updated and unchanged counts"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                for wish in wishes:
-                    conn.execute('''
-                        INSERT OR REPLACE INTO wishes 
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (
-                        wish['id'],
-                        wish['name'],
-                        wish['rarity'],
-                        wish['type'],
-                        wish['time'],
-                        wish['bannerType']
-                    ))
-                logger.info(f"Saved {len(wishes)} wishes to database")
+            with self.db.writer() as conn:
+                counts = upsert_wishes(conn, wishes, session_id)
+            logger.info(f"Saved {len(wishes)} wishes to database: {counts}")
+            return counts
         except sqlite3.Error as e:
             logger.error(f"Failed to save wishes: {e}")
             raise
 
     def clear_history(self):
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.writer() as conn:
                 conn.execute('DELETE FROM wishes')
+                conn.execute('DELETE FROM import_checkpoints')
+                conn.execute('DELETE FROM import_sessions')
             self.history = []
             logger.info("Wish history cleared")
         except sqlite3.Error as e:
@@ -236,31 +607,27 @@ class WishService:
             raise
 
     def export_to_excel(self):
-        try:
-            if not self.history:
-                return {"success": False, "error": "No wish history to export"}
 
-            df = pd.DataFrame(self.history)
-            
-            documents_path = str(Path.home() / "Documents")
+        # Exports the stored history as an Excel workbook, streamed from the database
+        # One sheet per banner with pity columns, plus a summary sheet of stats
+
+        try:
+            documents_path = Path.home() / "Documents"
+            documents_path.mkdir(parents=True, exist_ok=True)
             filename = f"genshin_wishes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-            filepath = f"{documents_path}/{filename}"
-            
-            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False, sheet_name='Wish History')
-                worksheet = writer.sheets['Wish History']
-                for idx, col in enumerate(df.columns):
-                    max_length = max(
-                        df[col].astype(str).apply(len).max(),
-                        len(col)
-                    )
-                    worksheet.column_dimensions[chr(65 + idx)].width = max_length + 2
+            filepath = documents_path / filename
+
+            count = export_wishes(self.db, filepath, "xlsx")
+            if count == 0:
+                filepath.unlink(missing_ok=True)
+                return {"success": False, "error": "No wish history to export"}
 
             return {
                 "success": True,
-                "path": filepath,
-                "filename": filename
+                "path": str(filepath),
+                "filename": filename,
+                "count": count
             }
         except Exception as e:
             logger.error(f"Export failed: {e}")
-            return {"success": False, "error": str(e)}
\ No newline at end of file
+            return {"success": False, "error": str(e)}
@@ -0,0 +1,70 @@
+# Path: benchmarks/import_benchmark.py
+"""Benchmark WishService.import_from_url against the offline getGachaLog replay.
+
+Runs a full import followed by an incremental refresh into a throwaway
+database and reports wall time, requests per second and peak memory.
+
+    python -m benchmarks.import_benchmark --size 2000 --latency 0.05 --rate 20
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tests.gacha_log_replay import GachaLogReplayAdapter, install_replay
+
+URL = "https://public-operation-hk4e-sg.hoyoverse.com/gacha_info/api/getGachaLog?authkey=benchmark"
+GACHA_TYPES = ["301", "400", "302", "200", "500"]
+
+def run_import(service, adapter, label, incremental=True):
+    adapter.requests = adapter.throttled = adapter.failures = 0
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = service.import_from_url(URL, incremental=incremental)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    new_total = sum(result.get("new_counts", {}).values())
+    print(f"{label:<14} {'ok' if result['success'] else 'FAILED':<7} "
+          f"{elapsed:>8.2f}s {adapter.requests:>7} req {adapter.requests / elapsed:>8.1f} req/s "
+          f"{adapter.throttled:>5} throttled {new_total:>8} new {peak / 1024 / 1024:>8.1f} MiB peak")
+    if not result["success"]:
+        print(f"  error: {result['error']}")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1000, help="wishes per gacha_type")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of requests throttled")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of requests that fail")
+    parser.add_argument("--rate", type=float, default=50.0, help="limiter requests per second")
+    parser.add_argument("--new", type=int, default=25, help="wishes added before the refresh")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        # WishService keeps its database under the user's home directory
+        os.environ["HOME"] = os.environ["USERPROFILE"] = home
+        from backend.services.wish_service import WishService
+
+        service = WishService(requests_per_second=args.rate)
+        adapter = install_replay(service, GachaLogReplayAdapter(
+            {gacha_type: args.size for gacha_type in GACHA_TYPES},
+            latency=args.latency, throttle_rate=args.throttle_rate, failure_rate=args.failure_rate
+        ))
+
+        print(f"{len(GACHA_TYPES)} banners x {args.size} wishes, latency {args.latency}s, "
+              f"limiter {args.rate}/s")
+        run_import(service, adapter, "full import", incremental=False)
+        for gacha_type in GACHA_TYPES:
+            adapter.add_wishes(gacha_type, args.new)
+        run_import(service, adapter, "incremental")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# Path: benchmarks/pity_benchmark.py
+"""Benchmark the vectorized pity kernel against per-wish Python loops.
+
+Generates synthetic histories, checks that both give identical pity, and
+reports the time of each for per-wish pity and for per-banner aggregates.
+
+    python -m benchmarks.pity_benchmark --sizes 10000 100000 1000000
+"""
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.services.database import BANNER_GROUPS, wish_to_row
+from backend.services.pity_calculator import PityCalculator
+from backend.services.pity_kernel import banner_aggregates, chronological_order, displayed_pity, pity_counters
+
+BANNER_TYPES = ["character-1", "character-2", "weapon", "permanent", "chronicled"]
+NAMES = ["Cool Steel", "Slingshot", "Noelle", "Xiangling", "Furina", "Qiqi", "Skyward Harp"]
+
+def make_wishes(size, seed=1):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": str(1700000000000000000 + i),
+            "name": rng.choice(NAMES),
+            "rarity": rng.choice([3] * 12 + [4, 4, 5]),
+            "type": "Weapon",
+            "time": f"20{20 + i // 400000}-{1 + i // 40000 % 10:02d}-{1 + i // 1440 % 28:02d} "
+                    f"{i // 60 % 24:02d}:{i % 60:02d}:00",
+            "bannerType": rng.choice(BANNER_TYPES)
+        }
+        for i in range(size)
+    ]
+
+def chronological_key(wish):
+    return wish['time'], int(wish['id'])
+
+def wish_arrays(wishes):
+    """Banner group codes, rarity and chronological order, as the wishes table stores them"""
+    rows = [wish_to_row(wish) for wish in wishes]
+    groups = np.fromiter((row[6] for row in rows), dtype=np.int64, count=len(rows))
+    rarity = np.fromiter((row[2] for row in rows), dtype=np.int64, count=len(rows))
+    times = np.fromiter((row[4] for row in rows), dtype=np.int64, count=len(rows))
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    return groups, rarity, chronological_order(times, ids)
+
+def loop_pull_counts(wishes):
+    """The per-dict loop calculate_pull_counts used before the kernel"""
+    pity_groups = {}
+    for wish in wishes:
+        pity_groups.setdefault(BANNER_GROUPS.get(wish['bannerType'], 0), []).append(wish)
+    result = []
+    for group_wishes in pity_groups.values():
+        group_wishes.sort(key=chronological_key)
+        pity_5 = pity_4 = 0
+        for wish in group_wishes:
+            wish = wish.copy()
+            pity_5 += 1
+            pity_4 += 1
+            if wish['rarity'] == 5:
+                wish['pity'] = pity_5
+                pity_5 = 0
+            elif wish['rarity'] == 4:
+                wish['pity'] = pity_4
+                pity_4 = 0
+            else:
+                wish['pity'] = 0
+            result.append(wish)
+    return sorted(result, key=chronological_key, reverse=True)
+
+def loop_aggregates(wishes):
+    """Per-group counts, average and median 5★ pity and current pity with a loop over wish dicts"""
+    states = {}
+    for wish in sorted(wishes, key=chronological_key):
+        group = BANNER_GROUPS.get(wish['bannerType'], 0)
+        state = states.setdefault(group, {"total": 0, "pity_5": 0, "pity_4": 0, "pities": [], "four_stars": 0})
+        state["total"] += 1
+        state["pity_5"] += 1
+        state["pity_4"] += 1
+        if wish['rarity'] == 5:
+            state["pities"].append(state["pity_5"])
+            state["pity_5"] = 0
+        elif wish['rarity'] == 4:
+            state["four_stars"] += 1
+            state["pity_4"] = 0
+    return {
+        group: (state["total"], len(state["pities"]), state["four_stars"],
+                round(sum(state["pities"]) / len(state["pities"]), 1), float(np.median(state["pities"])),
+                state["pity_5"], state["pity_4"])
+        for group, state in states.items()
+    }
+
+def kernel_aggregates(groups, rarity, order):
+    pity_5, pity_4 = pity_counters(groups, rarity, order)
+    values = banner_aggregates(groups, rarity, order, pity_5, pity_4, int(groups.max()) + 1)
+    return {
+        group: (int(values["total"][group]), int(values["five_stars"][group]), int(values["four_stars"][group]),
+                round(values["pity_5_sum"][group] / values["five_stars"][group], 1),
+                (values["median_low"][group] + values["median_high"][group]) / 2,
+                int(values["current_5"][group]), int(values["current_4"][group]))
+        for group in range(len(values["total"])) if values["total"][group]
+    }
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - started, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+    calculator = PityCalculator()
+
+    # "loop" works on wish dicts as the calculator used to; "kernel" on the
+    # group, rarity and order columns, as refresh_pity reads them from the
+    # wishes table; "dicts" is calculate_pull_counts, which still has to read
+    # and copy every dict around the kernel
+    print(f"{'rows':>9} | {'pity: loop':>10} {'kernel':>8} {'speedup':>8} {'dicts':>8}"
+          f" | {'aggregates: loop':>16} {'kernel':>8} {'speedup':>8}")
+    for size in args.sizes:
+        wishes = make_wishes(size)
+        groups, rarity, order = wish_arrays(wishes)
+
+        loop_time, expected = timed(loop_pull_counts, wishes)
+        kernel_time, (pity_5, pity_4) = timed(pity_counters, groups, rarity, order)
+        dicts_time, actual = timed(calculator.calculate_pull_counts, wishes)
+        pity = displayed_pity(rarity, pity_5, pity_4)
+        if actual != expected or [w['pity'] for w in expected] != pity[order[::-1]].tolist():
+            raise SystemExit(f"Kernel pull counts differ from the loop at {size} rows")
+
+        loop_agg_time, loop_values = timed(loop_aggregates, wishes)
+        kernel_agg_time, kernel_values = timed(kernel_aggregates, groups, rarity, order)
+        if kernel_values != loop_values:
+            raise SystemExit(f"Kernel aggregates differ from the loop at {size} rows")
+
+        print(f"{size:>9} | {loop_time:>9.3f}s {kernel_time:>7.3f}s {loop_time / kernel_time:>7.1f}x {dicts_time:>7.3f}s"
+              f" | {loop_agg_time:>15.3f}s {kernel_agg_time:>7.3f}s {loop_agg_time / kernel_agg_time:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
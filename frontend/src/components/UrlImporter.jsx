@@ -1,5 +1,5 @@
 // Path: frontend/src/components/UrlImporter.jsx
-import React, { useState, useRef, useEffect } from 'react';
+import React, { useState, useRef } from 'react';
 import { Search, Loader2, AlertCircle, X } from 'lucide-react';
 import { useApp } from '../context/AppContext';
 import { importWishHistory } from '../context/appActions';
@@ -9,30 +9,16 @@ import { motion } from 'framer-motion';
 const UrlImporter = () => {
   const [url, setUrl] = useState('');
   const [loading, setLoading] = useState(false);
-  const [progress, setProgress] = useState(0);
   const [displayProgress, setDisplayProgress] = useState(0);
+  const [progressDetail, setProgressDetail] = useState(null);
   const { dispatch } = useApp();
   const { showNotification, showLoading, updateProgress, dismissNotification } = useNotification();
-  const importTimeout = useRef(null);
   const notificationId = useRef(null);
-  const progressInterval = useRef(null);
 
-  useEffect(() => {
-    return () => {
-      if (progressInterval.current) clearInterval(progressInterval.current);
-    };
-  }, []);
-
-  const simulateProgress = () => {
-    let currentProgress = 0;
-    progressInterval.current = setInterval(() => {
-      currentProgress += Math.random() * 2;
-      if (currentProgress > 90) {
-        clearInterval(progressInterval.current);
-        return;
-      }
-      setDisplayProgress(Math.min(Math.round(currentProgress), 90));
-    }, 200);
+  const formatEta = (seconds) => {
+    if (seconds === null || seconds === undefined) return 'estimating...';
+    if (seconds < 60) return `~${Math.ceil(seconds)}s left`;
+    return `~${Math.ceil(seconds / 60)}m left`;
   };
 
   const validateUrl = (url) => {
@@ -52,9 +38,8 @@ const UrlImporter = () => {
     }
   
     setLoading(true);
-    setProgress(0);
     setDisplayProgress(0);
-    simulateProgress();
+    setProgressDetail(null);
     
     notificationId.current = showLoading(
       'Importing Wishes',
@@ -62,18 +47,15 @@ const UrlImporter = () => {
     );
   
     try {
-      const result = await importWishHistory(dispatch, url, (currentProgress) => {
-        setProgress(currentProgress);
-        updateProgress(notificationId.current, currentProgress);
+      const result = await importWishHistory(dispatch, url, (detail) => {
+        setDisplayProgress(detail.percent);
+        setProgressDetail(detail);
+        updateProgress(notificationId.current, detail.percent);
       });
   
       if (!result.success) {
         throw new Error(result.error || 'Import failed');
       }
-  
-      if (progressInterval.current) {
-        clearInterval(progressInterval.current);
-      }
       
       setDisplayProgress(100);
       updateProgress(notificationId.current, 100);
@@ -87,15 +69,11 @@ const UrlImporter = () => {
         );
         setUrl('');
         setLoading(false);
-        setProgress(0);
         setDisplayProgress(0);
+        setProgressDetail(null);
       }, 500);
   
     } catch (error) {
-      if (progressInterval.current) {
-        clearInterval(progressInterval.current);
-      }
-      
       dismissNotification(notificationId.current);
       showNotification(
         'error',
@@ -103,8 +81,8 @@ const UrlImporter = () => {
         error.message || 'Failed to import wish history'
       );
       setLoading(false);
-      setProgress(0);
       setDisplayProgress(0);
+      setProgressDetail(null);
     }
   };
 
@@ -182,9 +160,26 @@ const UrlImporter = () => {
             />
           </div>
           <div className="flex justify-between text-xs text-white/60">
-            <span>Importing wish history...</span>
-            <span>{displayProgress}% complete</span>
+            <span>
+              {progressDetail
+                ? `${progressDetail.rows} wishes fetched · ${progressDetail.requests_per_second} req/s`
+                : 'Importing wish history...'}
+            </span>
+            <span>
+              {progressDetail?.stage === 'fetching'
+                ? formatEta(progressDetail.eta_seconds)
+                : `${displayProgress}% complete`}
+            </span>
           </div>
+          {progressDetail && (
+            <div className="flex flex-wrap gap-x-3 text-[11px] text-white/40">
+              {Object.entries(progressDetail.banners).map(([banner, info]) => (
+                <span key={banner}>
+                  {banner}: {info.pages} pages{info.done ? ' ✓' : ''}
+                </span>
+              ))}
+            </div>
+          )}
         </div>
       )}
     </div>
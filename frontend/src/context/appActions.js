@@ -6,15 +6,17 @@ export const importWishHistory = async (dispatch, url, progressCallback) => {
   dispatch({ type: ActionTypes.SET_LOADING, payload: true });
   dispatch({ type: ActionTypes.SET_ERROR, payload: null });
 
+  // The backend pushes real progress as pitypal:import-progress events
+  const handleProgress = (event) => {
+    if (progressCallback) {
+      progressCallback(event.detail);
+    }
+  };
+  window.addEventListener('pitypal:import-progress', handleProgress);
+
   try {
     await waitForPyWebView();
-    const handleProgress = (progress) => {
-      if (progressCallback) {
-        progressCallback(progress);
-      }
-    };
-
-    const result = await window.pywebview.api.import_wishes(url, handleProgress);
+    const result = await window.pywebview.api.import_wishes(url);
     
     if (!result.success) {
       throw new Error(result.error || 'Import failed');
@@ -37,6 +39,7 @@ export const importWishHistory = async (dispatch, url, progressCallback) => {
       error: error.message 
     };
   } finally {
+    window.removeEventListener('pitypal:import-progress', handleProgress);
     dispatch({ type: ActionTypes.SET_LOADING, payload: false });
   }
 };
@@ -56,7 +59,8 @@ export const updatePityAndStats = async (dispatch) => {
       payload: {
         character: result.data.character,
         weapon: result.data.weapon,
-        permanent: result.data.permanent
+        permanent: result.data.permanent,
+        chronicled: result.data.chronicled
       }
     });
 
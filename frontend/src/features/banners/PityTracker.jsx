@@ -62,7 +62,6 @@ const CircularProgress = ({ value, max, size = 120, strokeWidth = 8, className =
 const PityTracker = () => {
   const { state } = useApp();
   const [currentBannerType, setCurrentBannerType] = useState('character');
-  const [permanentBannerData, setPermanentBannerData] = useState(null);
   const [isTransitioning, setIsTransitioning] = useState(false);
   const [showChancePanel, setShowChancePanel] = useState(true);
   const [showStatusPanel, setShowStatusPanel] = useState(true);
@@ -87,47 +86,6 @@ const PityTracker = () => {
     setTimeout(() => setShowStatusPanel(true), 300);
   }, []);
   
-  // Calculate permanent banner pity separately from history
-  useEffect(() => {
-    if (state.wishes && state.wishes.history && state.wishes.history.length > 0) {
-      const permanentWishes = state.wishes.history.filter(wish => wish.bannerType === 'permanent');
-      
-      if (permanentWishes.length > 0) {
-        // Sort by time ascending (oldest first) for proper counting
-        const sortedWishes = [...permanentWishes].sort((a, b) => new Date(a.time) - new Date(b.time));
-        
-        let currentPity = 0;
-        
-        // Count from the end to get current pity
-        for (let i = sortedWishes.length - 1; i >= 0; i--) {
-          if (sortedWishes[i].rarity === 5) {
-            break;
-          }
-          currentPity++;
-        }
-        
-        setPermanentBannerData({
-          current: currentPity,
-          bannerType: 'permanent',
-          thresholds: {
-            soft_pity: 74,
-            hard_pity: 90
-          }
-        });
-      } else {
-        // No permanent wishes found
-        setPermanentBannerData({
-          current: 0,
-          bannerType: 'permanent',
-          thresholds: {
-            soft_pity: 74,
-            hard_pity: 90
-          }
-        });
-      }
-    }
-  }, [state.wishes.history]);
-  
   // Get pity stats for current banner type
   const getPityStats = () => {
     if (!state.wishes.pity) return null;
@@ -136,14 +94,7 @@ const PityTracker = () => {
       case 'weapon':
         return state.wishes.pity.weapon;
       case 'permanent':
-        return permanentBannerData || {
-          current: 0,
-          bannerType: 'permanent',
-          thresholds: {
-            soft_pity: 74,
-            hard_pity: 90
-          }
-        };
+        return state.wishes.pity.permanent;
       case 'character':
       default:
         return state.wishes.pity.character;
@@ -33,11 +33,11 @@ export const useDataManagement = () => {
     }
   };
 
-  const handleExport = async (format = 'json') => {
+  const handleExport = async (format = 'json', withPity = false) => {
     try {
       setIsExporting(true);
       await waitForPyWebView();
-      const result = await window.pywebview.api.export_data(format);
+      const result = await window.pywebview.api.export_data(format, withPity);
       
       if (!result.success) {
         throw new Error(result.error);
@@ -89,6 +89,49 @@ export const useDataManagement = () => {
     }
   };
 
+  const handleUigfImport = async () => {
+    try {
+      setIsImporting(true);
+      await waitForPyWebView();
+
+      // The backend opens a file dialog and streams the file from disk
+      const result = await window.pywebview.api.import_uigf();
+      if (!result.success) {
+        throw new Error(result.error);
+      }
+
+      const refreshSuccessful = await refreshData();
+      if (!refreshSuccessful) {
+        throw new Error('Failed to refresh data after import');
+      }
+
+      return { success: true, count: result.count, skipped: result.skipped };
+    } catch (error) {
+      console.error('UIGF import error:', error);
+      return { success: false, error: error.message };
+    } finally {
+      setIsImporting(false);
+    }
+  };
+
+  const handleUigfExport = async (uid) => {
+    try {
+      setIsExporting(true);
+      await waitForPyWebView();
+      const result = await window.pywebview.api.export_uigf(uid);
+
+      if (!result.success) {
+        throw new Error(result.error);
+      }
+
+      return { success: true, path: result.path, count: result.count };
+    } catch (error) {
+      return { success: false, error: error.message };
+    } finally {
+      setIsExporting(false);
+    }
+  };
+
   const handleReset = async () => {
     try {
       setIsResetting(true);
@@ -121,6 +164,8 @@ export const useDataManagement = () => {
     isResetting,
     handleExport,
     handleImport,
+    handleUigfImport,
+    handleUigfExport,
     handleReset
   };
 };
\ No newline at end of file
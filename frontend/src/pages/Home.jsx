@@ -13,7 +13,6 @@ import UrlImporter from '../components/UrlImporter';
 import ImportGuideModal from '../components/ImportGuideModal';
 import RemindersButton from '../components/reminders/RemindersButton';
 import StatCard from '../components/StatCard';
-import { calculateRateComparison } from '../services/analyticsService';
 import { AlertTriangle, Sparkles } from 'lucide-react';
 
 const LeaksButton = () => (
@@ -61,33 +60,28 @@ const Home = () => {
       try {
         await waitForPyWebView();
         
-        // Get pity calculation
-        const pityResult = await window.pywebview.api.calculate_pity();
-        if (!pityResult.success) {
-          console.error("Failed to calculate pity:", pityResult.error);
+        // Totals are read from the backend's summary tables, the character
+        // banner state from its pity calculation
+        const [totalsResult, pityResult] = await Promise.all([
+          window.pywebview.api.get_wish_totals(),
+          window.pywebview.api.calculate_pity({ banner: 'character' })
+        ]);
+        if (!totalsResult.success || !pityResult.success) {
+          console.error("Failed to load stats:", totalsResult.error || pityResult.error);
           return;
         }
-        
-        // Get wish history only once
-        const history = state.wishes.history;
-        if (!history || history.length === 0) return;
-        
-        // Use analytics service to calculate stats
-        const rateComparison = calculateRateComparison(history);
-        
-        // Calculate average pity using pull distribution
-        const characterWishes = history.filter(w => w.bannerType.startsWith('character'));
-        const fiveStarWishes = characterWishes.filter(w => w.rarity === 5 && w.pity);
-        const averagePity = fiveStarWishes.length ? 
-          (fiveStarWishes.reduce((acc, w) => acc + w.pity, 0) / fiveStarWishes.length).toFixed(1) : 0;
-        
+
+        const totals = totalsResult.data;
+        const { character } = pityResult.data;
+        if (!totals.total_wishes) return;
+
         setStats({
-          total_wishes: history.length,
-          five_stars: rateComparison.counts.fiveStar,
-          four_stars: rateComparison.counts.fourStar,
-          primogems_spent: history.length * 160,
-          average_pity: averagePity,
-          guaranteed: pityResult.data.character.guaranteed
+          total_wishes: totals.total_wishes,
+          five_stars: totals.total_five_stars,
+          four_stars: totals.total_four_stars,
+          primogems_spent: totals.total_wishes * 160,
+          average_pity: character.average_pity,
+          guaranteed: character.guaranteed
         });
       } catch (error) {
         console.error('Failed to calculate stats:', error);
@@ -65,6 +65,7 @@ const Settings = () => {
   const [currentUpdateFrequency, setCurrentUpdateFrequency] = useState(24);
   const [isCheckingUpdate, setIsCheckingUpdate] = useState(false);
   const [updateStatus, setUpdateStatus] = useState(null);
+  const [exportFormat, setExportFormat] = useState('json');
   const [activeSection, setActiveSection] = useState('app'); // 'app', 'content', 'data', 'about'
   const { dispatch } = useApp();
   const { playAudio } = useAudio();
@@ -75,6 +76,8 @@ const Settings = () => {
     isResetting,
     handleExport,
     handleImport,
+    handleUigfImport,
+    handleUigfExport,
     handleReset
   } = useDataManagement();
   
@@ -137,9 +140,9 @@ const Settings = () => {
 
   const onExport = async () => {
     try {
-      const result = await handleExport('json');
+      const result = await handleExport(exportFormat, exportFormat !== 'json');
       if (result.success) {
-        alert(`Data exported successfully to: ${result.path}`);
+        alert(`Exported ${result.count} wishes to: ${result.path}`);
       } else {
         throw new Error(result.error);
       }
@@ -193,6 +196,28 @@ const Settings = () => {
     }
   };
 
+  const onUigfImport = async () => {
+    const result = await handleUigfImport();
+    if (result.success) {
+      await loadWishHistory(dispatch);
+      const skipped = result.skipped ? ` (${result.skipped} unsupported records skipped)` : '';
+      alert(`Successfully imported ${result.count} wishes${skipped}`);
+    } else if (result.error !== 'No file selected') {
+      alert(`Import failed: ${result.error}`);
+    }
+  };
+
+  const onUigfExport = async () => {
+    const uid = window.prompt('Enter your Genshin Impact UID for the UIGF export');
+    if (!uid) return;
+    const result = await handleUigfExport(uid);
+    if (result.success) {
+      alert(`Exported ${result.count} wishes to: ${result.path}`);
+    } else {
+      alert(`Export failed: ${result.error}`);
+    }
+  };
+
   const onConfirmReset = async () => {
     try {
       const result = await handleReset();
@@ -536,10 +561,56 @@ const Settings = () => {
           <SettingItem 
             icon={Download} 
             label="Export Data"
-            description="Export your wish history to JSON"
+            description="Export your wish history to JSON, JSON Lines, CSV, Parquet or Excel"
+          >
+            <div className="flex items-center gap-2">
+              <select
+                value={exportFormat}
+                onChange={(e) => setExportFormat(e.target.value)}
+                disabled={isExporting}
+                className="bg-black/30 border border-white/10 rounded px-2 py-1 text-sm"
+              >
+                <option value="json">JSON</option>
+                <option value="jsonl">JSON Lines</option>
+                <option value="csv">CSV</option>
+                <option value="parquet">Parquet</option>
+                <option value="xlsx">Excel</option>
+              </select>
+              <button 
+                onClick={onExport}
+                disabled={isExporting}
+                className="px-4 py-1.5 rounded-lg bg-white/5 hover:bg-white/10
+                        border border-white/10 text-sm transition-colors
+                        disabled:opacity-50 disabled:cursor-not-allowed"
+              >
+                {isExporting ? 'Exporting...' : 'Export'}
+              </button>
+            </div>
+          </SettingItem>
+
+          <SettingItem 
+            icon={Upload} 
+            label="Import UIGF"
+            description="Merge wishes from another tracker's UIGF file"
+          >
+            <button 
+              onClick={onUigfImport}
+              disabled={isImporting || isLoading}
+              className="px-4 py-1.5 rounded-lg bg-white/5 hover:bg-white/10
+                      border border-white/10 text-sm transition-colors
+                      disabled:opacity-50 disabled:cursor-not-allowed"
+            >
+              {isImporting ? 'Importing...' : 'Import'}
+            </button>
+          </SettingItem>
+
+          <SettingItem 
+            icon={Download} 
+            label="Export UIGF"
+            description="Export your wish history in the UIGF v4.0 format"
           >
             <button 
-              onClick={onExport}
+              onClick={onUigfExport}
               disabled={isExporting}
               className="px-4 py-1.5 rounded-lg bg-white/5 hover:bg-white/10
                       border border-white/10 text-sm transition-colors
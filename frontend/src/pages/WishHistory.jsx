@@ -1,5 +1,5 @@
 // Path: frontend/src/pages/WishHistory.jsx
-import React, { useState, useMemo, useEffect } from 'react';
+import React, { useState, useMemo, useEffect, useCallback, useRef } from 'react';
 import Icon from '../components/Icon';
 import { useApp } from '../context/AppContext';
 import { exportWishHistory } from '../context/appActions';
@@ -74,52 +74,24 @@ const WishItem = ({ wish }) => {
   );
 };
 
-const Pagination = ({ currentPage, totalPages, onPageChange }) => (
+const Pagination = ({ currentPage, totalPages, hasNext, onPrevious, onNext, loading }) => (
   <div className="flex items-center justify-center gap-2">
     <button
-      onClick={() => onPageChange(currentPage - 1)}
-      disabled={currentPage === 1}
+      onClick={onPrevious}
+      disabled={currentPage === 1 || loading}
       className="p-2 rounded-lg bg-white/5 hover:bg-white/10 
                disabled:opacity-50 disabled:cursor-not-allowed"
     >
       <ChevronLeft size={16} />
     </button>
-    
-    <div className="flex items-center gap-1">
-      {[...Array(totalPages)].map((_, index) => {
-        const page = index + 1;
-        const isActive = page === currentPage;
-        
-        if (
-          page === 1 ||
-          page === totalPages ||
-          (page >= currentPage - 2 && page <= currentPage + 2)
-        ) {
-          return (
-            <button
-              key={page}
-              onClick={() => onPageChange(page)}
-              className={`w-8 h-8 rounded-lg text-sm transition-colors
-                       ${isActive 
-                ? 'bg-indigo-500 text-white' 
-                : 'bg-white/5 hover:bg-white/10 text-white/60'}`}
-            >
-              {page}
-            </button>
-          );
-        } else if (
-          (page === currentPage - 3 && currentPage > 4) ||
-          (page === currentPage + 3 && currentPage < totalPages - 3)
-        ) {
-          return <span key={page} className="text-white/40">...</span>;
-        }
-        return null;
-      })}
-    </div>
+
+    <span className="px-2 text-sm text-white/60">
+      Page {currentPage} of {totalPages}
+    </span>
 
     <button
-      onClick={() => onPageChange(currentPage + 1)}
-      disabled={currentPage === totalPages}
+      onClick={onNext}
+      disabled={!hasNext || loading}
       className="p-2 rounded-lg bg-white/5 hover:bg-white/10 
                disabled:opacity-50 disabled:cursor-not-allowed"
     >
@@ -130,12 +102,22 @@ const Pagination = ({ currentPage, totalPages, onPageChange }) => (
 
 const WishHistory = () => {
   const [activeFilter, setActiveFilter] = useState('all');
-  const [currentPage, setCurrentPage] = useState(1);
   const [sortOrder, setSortOrder] = useState('desc');
   const [rarityFilter, setRarityFilter] = useState('all');
   const [typeFilter, setTypeFilter] = useState('all');
   const [searchTerm, setSearchTerm] = useState('');
+  const [debouncedSearch, setDebouncedSearch] = useState('');
+  const [dateFrom, setDateFrom] = useState('');
+  const [dateTo, setDateTo] = useState('');
   const [showFilters, setShowFilters] = useState(false);
+  // Keyset pagination: pageCursors[i] is the cursor that loads page i + 1
+  const [pageCursors, setPageCursors] = useState([null]);
+  const [currentWishes, setCurrentWishes] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [totals, setTotals] = useState({ total: 0, overall: 0 });
+  const [loading, setLoading] = useState(false);
+  const [error, setError] = useState(null);
+  const requestId = useRef(0);
   const { state } = useApp();
   const { history } = state.wishes;
 
@@ -152,44 +134,64 @@ const WishHistory = () => {
     }
   };
 
-  const filteredAndSortedWishes = useMemo(() => {
-    return history.filter(wish => {
-      // Banner type filter
-      if (activeFilter !== 'all') {
-        if (activeFilter === 'character' && !wish.bannerType.startsWith('character')) return false;
-        if (activeFilter !== 'character' && wish.bannerType !== activeFilter) return false;
+  useEffect(() => {
+    const timer = setTimeout(() => setDebouncedSearch(searchTerm.trim()), 250);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
+
+  const filters = useMemo(() => ({
+    banner: activeFilter,
+    rarity: rarityFilter,
+    type: typeFilter,
+    name: debouncedSearch,
+    date_from: dateFrom || null,
+    date_to: dateTo || null
+  }), [activeFilter, rarityFilter, typeFilter, debouncedSearch, dateFrom, dateTo]);
+
+  // Only the visible page crosses the bridge; filtering and sorting run in SQL
+  const loadPage = useCallback(async (cursor, pageIndex) => {
+    if (!window.pywebview?.api?.query_wish_history) return;
+    const id = ++requestId.current;
+    setLoading(true);
+    try {
+      const result = await window.pywebview.api.query_wish_history(
+        filters, cursor, ITEMS_PER_PAGE, sortOrder
+      );
+      // Ignore responses that were overtaken by a newer filter or page change
+      if (id !== requestId.current) return;
+      if (!result.success) throw new Error(result.error);
+
+      setCurrentWishes(result.data);
+      setNextCursor(result.next_cursor);
+      if (result.total !== null && result.total !== undefined) {
+        setTotals({ total: result.total, overall: result.overall_total });
       }
-      
-      // Rarity filter
-      if (rarityFilter !== 'all' && wish.rarity.toString() !== rarityFilter) return false;
-      
-      // Item type filter
-      if (typeFilter !== 'all' && wish.type !== typeFilter) return false;
-      
-      // Search term
-      if (searchTerm && !wish.name.toLowerCase().includes(searchTerm.toLowerCase())) return false;
-      
-      return true;
-    }).sort((a, b) => {
-      const dateA = new Date(a.time);
-      const dateB = new Date(b.time);
-      return sortOrder === 'desc' ? dateB - dateA : dateA - dateB;
-    });
-  }, [history, activeFilter, sortOrder, rarityFilter, typeFilter, searchTerm]);
-
-  const totalPages = Math.max(1, Math.ceil(filteredAndSortedWishes.length / ITEMS_PER_PAGE));
-  
+      setPageCursors(cursors => [...cursors.slice(0, pageIndex), cursor]);
+      setError(null);
+    } catch (err) {
+      if (id === requestId.current) setError(err.message);
+    } finally {
+      if (id === requestId.current) setLoading(false);
+    }
+  }, [filters, sortOrder]);
+
+  // Filters, sort order or a fresh import start again from the first page
   useEffect(() => {
-    setCurrentPage(1);
-  }, [activeFilter, rarityFilter, typeFilter, searchTerm]);
+    loadPage(null, 0);
+  }, [loadPage, history.length]);
+
+  const currentPage = pageCursors.length;
+  const totalPages = Math.max(1, Math.ceil(totals.total / ITEMS_PER_PAGE));
 
-  const currentWishes = useMemo(() => {
-    const startIndex = (currentPage - 1) * ITEMS_PER_PAGE;
-    return filteredAndSortedWishes.slice(startIndex, startIndex + ITEMS_PER_PAGE);
-  }, [filteredAndSortedWishes, currentPage]);
+  const handleNextPage = () => {
+    if (!nextCursor) return;
+    loadPage(nextCursor, pageCursors.length);
+    window.scrollTo({ top: 0, behavior: 'smooth' });
+  };
 
-  const handlePageChange = (page) => {
-    setCurrentPage(page);
+  const handlePreviousPage = () => {
+    if (pageCursors.length < 2) return;
+    loadPage(pageCursors[pageCursors.length - 2], pageCursors.length - 2);
     window.scrollTo({ top: 0, behavior: 'smooth' });
   };
 
@@ -319,12 +321,35 @@ const WishHistory = () => {
                 </div>
               </div>
 
+              <div>
+                <h3 className="text-sm font-medium mb-2">Date Range</h3>
+                <div className="flex items-center gap-2">
+                  <input
+                    type="date"
+                    value={dateFrom}
+                    max={dateTo || undefined}
+                    onChange={(e) => setDateFrom(e.target.value)}
+                    className="px-2 py-1 rounded-lg text-sm bg-black/30 border border-white/10 text-white/80"
+                  />
+                  <span className="text-white/40">–</span>
+                  <input
+                    type="date"
+                    value={dateTo}
+                    min={dateFrom || undefined}
+                    onChange={(e) => setDateTo(e.target.value)}
+                    className="px-2 py-1 rounded-lg text-sm bg-black/30 border border-white/10 text-white/80"
+                  />
+                </div>
+              </div>
+
               <div className="flex items-end ml-auto">
                 <button
                   onClick={() => {
                     setRarityFilter('all');
                     setTypeFilter('all');
                     setSearchTerm('');
+                    setDateFrom('');
+                    setDateTo('');
                   }}
                   className="px-3 py-1.5 rounded-lg text-sm bg-black/30 
                            hover:bg-black/40 border border-white/10 transition-colors"
@@ -338,8 +363,8 @@ const WishHistory = () => {
 
         <div className="flex items-center justify-between px-4">
           <div className="flex items-center gap-2 text-white/60 text-sm">
-            <span>Showing {filteredAndSortedWishes.length} of {history.length} wishes</span>
-            {filteredAndSortedWishes.length !== history.length && (
+            <span>Showing {totals.total} of {totals.overall} wishes</span>
+            {totals.total !== totals.overall && (
               <span className="px-2 py-0.5 rounded-full bg-indigo-500/20 border border-indigo-500/30 text-indigo-400">
                 Filtered
               </span>
@@ -351,14 +376,21 @@ const WishHistory = () => {
             <Pagination 
               currentPage={currentPage} 
               totalPages={totalPages} 
-              onPageChange={handlePageChange} 
+              hasNext={Boolean(nextCursor)}
+              onPrevious={handlePreviousPage}
+              onNext={handleNextPage}
+              loading={loading}
             />
           )}
         </div>
 
         {/* Wish List */}
         <div className="space-y-2">
-          {currentWishes.length > 0 ? (
+          {error ? (
+            <div className="p-8 text-center text-red-400 border border-red-500/30 rounded-xl bg-black/20">
+              Failed to load wish history: {error}
+            </div>
+          ) : currentWishes.length > 0 ? (
             currentWishes.map(wish => (
               <WishItem key={wish.id} wish={wish} />
             ))
@@ -375,7 +407,10 @@ const WishHistory = () => {
             <Pagination 
               currentPage={currentPage} 
               totalPages={totalPages} 
-              onPageChange={handlePageChange} 
+              hasNext={Boolean(nextCursor)}
+              onPrevious={handlePreviousPage}
+              onNext={handleNextPage}
+              loading={loading}
             />
           </div>
         )}
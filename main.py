@@ -10,6 +10,8 @@ from pathlib import Path
 from backend.services.wish_service import WishService
 from backend.services.pity_calculator import PityCalculator
 from backend.services.data_service import DataService
+from backend.services.stats_service import StatsService
+from backend.services.result_cache import ResultCache, cached_result
 from backend.services.update_service import UpdateService
 from backend.services.pity_predictor.model_trainer_service import ModelTrainerService
 from backend.services.pity_predictor.predictor_service import PredictorService
@@ -21,25 +23,53 @@ from backend.services.pity_predictor.create_base_model import create_base_model
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def push_event(name, detail):
+    """Dispatch a DOM CustomEvent named pitypal:<name> in the app window"""
+    if not webview.windows:
+        return
+    try:
+        script = f"window.dispatchEvent(new CustomEvent('pitypal:{name}', {{ detail: {json.dumps(detail)} }}))"
+        webview.windows[0].evaluate_js(script)
+    except Exception as e:
+        logger.error(f"Failed to push {name} event: {e}")
+
+def choose_file(file_types=('JSON files (*.json)',)):
+    """Let the user pick a file with the native dialog, returns its path or None"""
+    if not webview.windows:
+        return None
+    result = webview.windows[0].create_file_dialog(webview.OPEN_DIALOG, file_types=file_types)
+    return result[0] if result else None
+
 class API:
     def __init__(self):
         self.wish_service = WishService()
         self.pity_calculator = PityCalculator()
         self.data_service = DataService()
+        self.stats_service = StatsService(self.wish_service.db, self.pity_calculator)
+        # Read results are reused until the next write to the database
+        self.result_cache = ResultCache(self.wish_service.db)
         self.predictor_service = PredictorService()
         self.model_trainer_service = ModelTrainerService()
         self.update_service = UpdateService(current_version=VERSION_STRING)
         logger.info("API services initialized")
         
     def import_wishes(self, url, progress_callback=None):
+        # JS functions cannot cross the bridge, so progress is pushed to the page
+        # as pitypal:import-progress events; Python callers may still pass a callable
+        def report_progress(event):
+            push_event('import-progress', event)
+            if callable(progress_callback):
+                progress_callback(event)
+
         try:
-            result = self.wish_service.import_from_url(url)
-            if result["success"]:
-                result["data"] = self.pity_calculator.calculate_pull_counts(result["data"])
-            return result
+            # The returned history already carries the pity stored with each wish
+            return self.wish_service.import_from_url(url, progress_callback=report_progress)
         except Exception as e:
             logger.error(f"Failed to import wishes: {e}")
             return {"success": False, "error": str(e)}
+        finally:
+            # Imports, resets and merges rewrite history wholesale, so cached reads go too
+            self.result_cache.clear()
         
     def predict_wishes(self, current_pity, banner_type, guaranteed=False, pulls=40):
         try:
@@ -83,23 +113,49 @@ class API:
             return {"success": False, "error": str(e)}
     
     def get_wish_history(self):
+        # Not result-cached: the history cache already serves it from memory
         try:
-            history = self.wish_service.get_history()
-            history_with_pity = self.pity_calculator.calculate_pull_counts(history)
-            return {"success": True, "data": history_with_pity}
+            history = self.wish_service.get_history(with_pity=True)
+            return {"success": True, "data": history}
         except Exception as e:
             logger.error(f"Failed to get wish history: {e}")
             return {"success": False, "error": str(e)}
     
-    def calculate_pity(self):
+    @cached_result
+    def query_wish_history(self, filters=None, cursor=None, limit=10, order='desc'):
+        """Get one filtered page of wish history; pass next_cursor back to get the following page."""
         try:
-            history = self.wish_service.get_history()
-            # Use the new consolidated method to ensure consistent naming
-            pity_data = self.pity_calculator.calculate_all_banner_pities(history)
-            stats = self.pity_calculator.calculate_stats(history)
-            
-            # Return with consistent naming
-            pity_data['stats'] = stats
+            return self.wish_service.query_history(filters, cursor=cursor, limit=limit, order=order)
+        except Exception as e:
+            logger.error(f"Failed to query wish history: {e}")
+            return {"success": False, "error": str(e)}
+    
+    @cached_result
+    def search_wishes(self, query, filters=None, limit=100):
+        """Search wish history by item name; every word matches as a prefix."""
+        try:
+            return self.wish_service.search_wishes(query, filters, limit=limit)
+        except Exception as e:
+            logger.error(f"Failed to search wishes: {e}")
+            return {"success": False, "error": str(e)}
+
+    @cached_result
+    def get_import_sessions(self, limit=5, with_wishes=True):
+        """Recent imports, newest first, with the wishes each one added."""
+        try:
+            return self.wish_service.get_import_sessions(limit=limit, with_wishes=with_wishes)
+        except Exception as e:
+            logger.error(f"Failed to get import sessions: {e}")
+            return {"success": False, "error": str(e)}
+    
+    @cached_result
+    def calculate_pity(self, filters=None):
+        try:
+            # Every banner's state and the overall stats are aggregated inside SQLite,
+            # optionally for one banner or a date range of the history
+            states = self.stats_service.get_stats(filters)
+            pity_data = states['banners']
+            pity_data['stats'] = states['stats']
             return {
                 "success": True,
                 "data": pity_data
@@ -108,9 +164,32 @@ class API:
             logger.error(f"Failed to calculate pity: {e}")
             return {"success": False, "error": str(e)}
 
-    def export_data(self, format='json'):
+    @cached_result
+    def get_wish_totals(self, item_limit=20):
+        """Wish counts per banner and rarity, and the most obtained 4★ and 5★ items."""
+        try:
+            return {"success": True, "data": self.stats_service.get_totals(item_limit=item_limit)}
+        except Exception as e:
+            logger.error(f"Failed to get wish totals: {e}")
+            return {"success": False, "error": str(e)}
+
+    def rebuild_summaries(self):
+        """Recompute the summary tables behind the dashboard totals."""
+        try:
+            return self.data_service.rebuild_summaries()
+        except Exception as e:
+            logger.error(f"Failed to rebuild summaries: {e}")
+            return {"success": False, "error": str(e)}
+        finally:
+            self.result_cache.clear()
+
+    def export_data(self, format='json', with_pity=False):
+        # Progress is pushed to the page as pitypal:export-progress events
         try:
-            result = self.data_service.export_data(format)
+            result = self.data_service.export_data(
+                format, with_pity=with_pity,
+                progress_callback=lambda event: push_event('export-progress', event)
+            )
             return result
         except Exception as e:
             logger.error(f"Failed to export data: {e}")
@@ -125,6 +204,29 @@ class API:
         except Exception as e:
             logger.error(f"Failed to import data: {e}")
             return {"success": False, "error": str(e)}
+        finally:
+            self.result_cache.clear()
+
+    def import_uigf(self, file_path=None):
+        """Import a UIGF file from disk, asking the user to pick one if no path is given."""
+        try:
+            file_path = file_path or choose_file()
+            if not file_path:
+                return {"success": False, "error": "No file selected"}
+            return self.data_service.import_uigf(file_path)
+        except Exception as e:
+            logger.error(f"Failed to import UIGF data: {e}")
+            return {"success": False, "error": str(e)}
+        finally:
+            self.result_cache.clear()
+
+    def export_uigf(self, uid):
+        """Export the wish history as a UIGF v4.0 file."""
+        try:
+            return self.data_service.export_uigf(uid, app_version=VERSION_STRING)
+        except Exception as e:
+            logger.error(f"Failed to export UIGF data: {e}")
+            return {"success": False, "error": str(e)}
 
     def reset_data(self):
         try:
@@ -133,7 +235,62 @@ class API:
         except Exception as e:
             logger.error(f"Failed to reset data: {e}")
             return {"success": False, "error": str(e)}
+        finally:
+            self.result_cache.clear()
         
+    def create_backup(self):
+        """Back up the wish database now; skipped if nothing changed since the last backup."""
+        try:
+            return self.data_service.backup_service.create_backup()
+        except Exception as e:
+            logger.error(f"Failed to create backup: {e}")
+            return {"success": False, "error": str(e)}
+
+    def list_backups(self):
+        """List database backups, newest first."""
+        try:
+            return self.data_service.backup_service.list_backups()
+        except Exception as e:
+            logger.error(f"Failed to list backups: {e}")
+            return {"success": False, "error": str(e)}
+
+    def restore_backup(self, name):
+        """Restore the wish database to the backup with the given name."""
+        try:
+            result = self.data_service.backup_service.restore_backup(name)
+            if result["success"]:
+                self.wish_service.load_history()
+            return result
+        except Exception as e:
+            logger.error(f"Failed to restore backup: {e}")
+            return {"success": False, "error": str(e)}
+        finally:
+            self.result_cache.clear()
+
+    def merge_database(self, source=None):
+        """Merge wishes from a backup name or another wishes.db into the current history."""
+        try:
+            source = source or choose_file(('SQLite databases (*.db)', 'All files (*.*)'))
+            if not source:
+                return {"success": False, "error": "No file selected"}
+            result = self.data_service.merge_database(source)
+            if result["success"]:
+                self.wish_service.load_history()
+            return result
+        except Exception as e:
+            logger.error(f"Failed to merge database: {e}")
+            return {"success": False, "error": str(e)}
+        finally:
+            self.result_cache.clear()
+
+    def get_cache_stats(self):
+        """Entries, memory and hit / miss counts of the read result cache."""
+        try:
+            return {"success": True, "data": self.result_cache.stats()}
+        except Exception as e:
+            logger.error(f"Failed to get cache stats: {e}")
+            return {"success": False, "error": str(e)}
+
     def get_app_version(self):
         """Return the application version information."""
         from version import VERSION, VERSION_STRING, DISPLAY_VERSION
@@ -0,0 +1,44 @@
+# tests/conftest.py
+import random
+import pytest
+from datetime import datetime, timedelta
+from backend.services.database import Database
+
+FIRST_WISH_TIME = datetime(2025, 3, 1, 10)
+ITEMS = [
+    ("Furina", "Character"), ("Diluc", "Character"), ("Qiqi", "Character"),
+    ("Skyward Harp", "Weapon"), ("Mistsplitter Reforged", "Weapon"), ("Cool Steel", "Weapon")
+]
+BANNERS = ["character-1", "character-2", "weapon", "permanent", "chronicled"]
+
+def wish_time(minutes):
+    return (FIRST_WISH_TIME + timedelta(minutes=minutes)).strftime("%Y-%m-%d %H:%M:%S")
+
+def make_wish(index, **changes):
+    """A 3★ Cool Steel on the character banner, one minute after the wish before it"""
+    wish = {"id": str(1000 + index), "name": "Cool Steel", "rarity": 3, "type": "Weapon",
+            "time": wish_time(index), "bannerType": "character-1"}
+    wish.update(changes)
+    return wish
+
+def make_wishes(count, start=0, seed=None, **changes):
+    """Wishes start to start + count, or with a seed, a random history across every banner"""
+    if seed is None:
+        return [make_wish(i, **changes) for i in range(start, start + count)]
+
+    rng = random.Random(seed)
+    wishes = []
+    for i in range(start, start + count):
+        name, item_type = rng.choice(ITEMS)
+        wishes.append(make_wish(
+            i, name=name, type=item_type, rarity=rng.choice([3] * 10 + [4, 4, 5]),
+            # Ten-pulls share a timestamp, so ties are broken by id
+            bannerType=rng.choice(BANNERS), time=wish_time(i // 10), **changes
+        ))
+    return wishes
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(tmp_path / "wishes.db")
+    yield database
+    database.close()
@@ -0,0 +1,151 @@
+# tests/gacha_log_replay.py
+import json
+import time
+import bisect
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.adapters import BaseAdapter
+
+from backend.services.rate_limiter import AdaptiveRateLimiter
+
+# Offline stand-in for the getGachaLog endpoint, mounted on a requests.Session
+# Serves synthetic histories with the API's end_id pagination and response shape
+# Can inject latency, "visit too frequently" retcodes and connection failures,
+# at random rates or from a scenario hook that sees every request's parameters
+
+THROTTLE_RESPONSE = {"retcode": -110, "message": "visit too frequently", "data": None}
+
+ITEMS = {
+    5: [("Furina", "Character"), ("Diluc", "Character"), ("Aqua Simulacra", "Weapon")],
+    4: [("Xingqiu", "Character"), ("Bennett", "Character"), ("The Flute", "Weapon")],
+    3: [("Cool Steel", "Weapon"), ("Debate Club", "Weapon"), ("Slingshot", "Weapon")],
+}
+
+class GachaLogReplayAdapter(BaseAdapter):
+    def __init__(self, history_sizes: Dict[str, int], latency: float = 0.0,
+                 throttle_rate: float = 0.0, failure_rate: float = 0.0,
+                 uid: str = "700000001", seed: int = 0,
+                 scenario: Optional[Callable[[Dict], Optional[Dict]]] = None):
+        super().__init__()
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.failure_rate = failure_rate
+        self.uid = uid
+        self.requests = 0
+        self.throttled = 0
+        self.failures = 0
+        # (gacha_type, end_id) of every request, in the order they arrived
+        self.requested = []
+        # Called with each request's query parameters; may return a payload to
+        # send instead of the page, or raise to fail the request
+        self.scenario = scenario
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.histories = {}
+        # Histories are kept oldest first with their ids, for bisecting on end_id
+        self._ids = {}
+        self._build_histories(history_sizes)
+
+    def _build_histories(self, history_sizes: Dict[str, int]):
+        start = datetime(2024, 6, 1)
+        for offset, (gacha_type, size) in enumerate(sorted(history_sizes.items())):
+            rows = []
+            for index in range(size):
+                # Hard pity at 90, a 4-star every 10 pulls, like a plain account
+                if (index + 1) % 90 == 0 or self._random.random() < 0.006:
+                    rarity = 5
+                elif (index + 1) % 10 == 0:
+                    rarity = 4
+                else:
+                    rarity = 3
+                name, item_type = self._random.choice(ITEMS[rarity])
+                pull_time = start + timedelta(minutes=index // 10 * 30)
+                rows.append({
+                    "uid": self.uid,
+                    "gacha_type": gacha_type,
+                    "item_id": "",
+                    "count": "1",
+                    "time": pull_time.strftime('%Y-%m-%d %H:%M:%S'),
+                    "name": name,
+                    "lang": "en-us",
+                    "item_type": item_type,
+                    "rank_type": str(rarity),
+                    "id": str(1700000000000000000 + index * 10 + offset)
+                })
+            self.histories[gacha_type] = rows
+            self._ids[gacha_type] = [int(row["id"]) for row in rows]
+
+    def add_wishes(self, gacha_type: str, count: int):
+        """Append newer wishes to a banner, as if the player pulled again"""
+        rows = self.histories.setdefault(gacha_type, [])
+        ids = self._ids.setdefault(gacha_type, [])
+        last_id = ids[-1] if ids else 1800000000000000000
+        for index in range(count):
+            wish_id = last_id + (index + 1) * 10
+            rows.append({
+                "uid": self.uid, "gacha_type": gacha_type, "item_id": "", "count": "1",
+                "time": "2025-01-01 00:00:00", "name": "Cool Steel", "lang": "en-us",
+                "item_type": "Weapon", "rank_type": "3", "id": str(wish_id)
+            })
+            ids.append(wish_id)
+
+    def newest_first(self, gacha_type: str):
+        """A banner's rows in the order the API pages through them"""
+        return list(reversed(self.histories.get(gacha_type, [])))
+
+    def _page(self, gacha_type: str, end_id: int, size: int):
+        rows = self.histories.get(gacha_type, [])
+        ids = self._ids.get(gacha_type, [])
+        stop = len(ids) if end_id == 0 else bisect.bisect_left(ids, end_id)
+        return list(reversed(rows[max(0, stop - size):stop]))
+
+    def _serve(self, params: Dict) -> Dict:
+        if 'authkey' not in params:
+            return {"retcode": -100, "message": "authkey error", "data": None}
+        page = self._page(params.get("gacha_type", ""), int(params.get("end_id", "0")),
+                          min(int(params.get("size", "20")), 20))
+        return {"retcode": 0, "message": "OK", "data": {"list": page}}
+
+    def send(self, request, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        params = {k: v[0] for k, v in parse_qs(urlparse(request.url).query).items()}
+        with self._lock:
+            self.requests += 1
+            self.requested.append((params.get("gacha_type", ""), params.get("end_id", "0")))
+            roll = self._random.random()
+            if roll < self.failure_rate:
+                self.failures += 1
+                raise requests.ConnectionError("Injected connection failure", request=request)
+            throttled = roll < self.failure_rate + self.throttle_rate
+            if throttled:
+                self.throttled += 1
+
+        payload = self.scenario(params) if self.scenario else None
+        if payload is None:
+            payload = THROTTLE_RESPONSE if throttled else self._serve(params)
+
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "application/json"
+        response._content = json.dumps(payload).encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+def install_replay(service, adapter: GachaLogReplayAdapter, requests_per_second: Optional[float] = None):
+    """Route a WishService's API traffic to the replay adapter"""
+    service.session.mount("https://", adapter)
+    service.session.mount("http://", adapter)
+    if requests_per_second:
+        service.rate_limiter = AdaptiveRateLimiter(rate=requests_per_second)
+    return adapter
@@ -13,6 +13,7 @@ class TestAPI:
         with patch('main.WishService'), \
              patch('main.PityCalculator'), \
              patch('main.DataService'), \
+             patch('main.StatsService'), \
              patch('main.PredictorService'), \
              patch('main.ModelTrainerService'), \
              patch('main.UpdateService'):
@@ -20,17 +21,12 @@ class TestAPI:
     
     def test_import_wishes(self, api):
         """Test the import_wishes API method."""
-        # Mock the wish_service's import_from_url method
+        # Mock the wish_service's import_from_url method; pity comes stored with each wish
         api.wish_service.import_from_url = MagicMock(return_value={
             "success": True,
-            "data": [{"id": "1", "rarity": 5}]
+            "data": [{"id": "1", "rarity": 5, "pity": 10}]
         })
         
-        # Mock the pity_calculator's calculate_pull_counts method
-        api.pity_calculator.calculate_pull_counts = MagicMock(return_value=[
-            {"id": "1", "rarity": 5, "pity": 10}
-        ])
-        
         # Call the API method
         result = api.import_wishes("https://test-url.com")
         
@@ -40,5 +36,46 @@ class TestAPI:
         assert result["data"][0]["pity"] == 10
         
         # Verify the methods were called
-        api.wish_service.import_from_url.assert_called_once_with("https://test-url.com")
-        api.pity_calculator.calculate_pull_counts.assert_called_once()
\ No newline at end of file
+        api.wish_service.import_from_url.assert_called_once()
+        assert api.wish_service.import_from_url.call_args.args == ("https://test-url.com",)
+        api.pity_calculator.calculate_pull_counts.assert_not_called()
+
+    def test_get_wish_history_reads_stored_pity(self, api):
+        """Test that the history page reads pity from the database instead of recomputing it."""
+        api.wish_service.get_history = MagicMock(return_value=[{"id": "1", "rarity": 5, "pity": 74}])
+
+        result = api.get_wish_history()
+
+        assert result == {"success": True, "data": [{"id": "1", "rarity": 5, "pity": 74}]}
+        api.wish_service.get_history.assert_called_once_with(with_pity=True)
+        api.pity_calculator.calculate_pull_counts.assert_not_called()
+
+    def test_reads_cached_until_import(self, api):
+        """Test that repeat reads are answered from the result cache and imports drop it."""
+        api.stats_service.get_stats = MagicMock(return_value={"banners": {}, "stats": {"total_wishes": 0}})
+        api.wish_service.import_from_url = MagicMock(return_value={"success": True, "data": []})
+
+        assert api.calculate_pity() == api.calculate_pity()
+        api.stats_service.get_stats.assert_called_once_with(None)
+
+        api.import_wishes("https://test-url.com")
+        api.calculate_pity()
+        assert api.stats_service.get_stats.call_count == 2
+        assert api.get_cache_stats()["data"]["hits"] == 1
+
+    def test_import_wishes_forwards_progress(self, api):
+        """Test that backend progress events reach a Python progress callback."""
+        event = {"stage": "fetching", "percent": 42}
+
+        def fake_import(url, progress_callback=None):
+            progress_callback(event)
+            return {"success": True, "data": []}
+
+        api.wish_service.import_from_url = MagicMock(side_effect=fake_import)
+        received = []
+
+        with patch('main.push_event') as mock_push:
+            api.import_wishes("https://test-url.com", progress_callback=received.append)
+
+        assert received == [event]
+        mock_push.assert_called_once_with('import-progress', event)
\ No newline at end of file
@@ -0,0 +1,73 @@
+# tests/test_backup_service.py
+import gzip
+import pytest
+from datetime import datetime
+from backend.services.database import upsert_wishes
+from backend.services.backup_service import BackupService
+from tests.conftest import make_wishes
+
+def count_wishes(db):
+    with db.reader() as conn:
+        return conn.execute('SELECT COUNT(*) FROM wishes').fetchone()[0]
+
+class TestBackupService:
+    @pytest.fixture
+    def db(self, db):
+        with db.writer() as conn:
+            upsert_wishes(conn, make_wishes(50))
+        return db
+
+    @pytest.fixture
+    def service(self, db, tmp_path):
+        return BackupService(db, tmp_path / "backups", keep_last=2, keep_daily=2, keep_weekly=2,
+                             pages_per_step=1)
+
+    def test_identical_backup_is_skipped(self, service, db):
+        """Test that a backup of unchanged data reuses the newest archive."""
+        first = service.create_backup()
+        assert first["success"] is True and first["skipped"] is False
+        assert first["name"].endswith(".db.gz")
+        with gzip.open(first["path"], 'rb') as f:
+            assert f.read(16) == b"SQLite format 3\x00"
+
+        second = service.create_backup()
+        assert second["skipped"] is True and second["name"] == first["name"]
+
+        with db.writer() as conn:
+            upsert_wishes(conn, make_wishes(1, start=50))
+        third = service.create_backup()
+        assert third["skipped"] is False and third["hash"] != first["hash"]
+        assert len(service.list_backups()["data"]) == 2
+
+    def test_restore_point_in_time(self, service, db):
+        """Test restoring an older backup, with a safety backup of the current state."""
+        before = service.create_backup()
+        with db.writer() as conn:
+            upsert_wishes(conn, make_wishes(25, start=50))
+        assert count_wishes(db) == 75
+
+        result = service.restore_backup(before["name"])
+        assert result["success"] is True
+        assert count_wishes(db) == 50
+        assert result["safety_backup"] != before["name"]
+
+        assert service.restore_backup("../wishes.db")["success"] is False
+
+    def test_retention_keeps_recent_daily_and_weekly(self, db, tmp_path):
+        """Test pruning of old archives and uncompressed backups from older versions."""
+        service = BackupService(db, tmp_path / "backups", keep_last=2, keep_daily=3, keep_weekly=3)
+        backups = tmp_path / "backups"
+        stamps = [datetime(2020, 1, 8, 12), datetime(2020, 1, 8, 11), datetime(2020, 1, 7, 12),
+                  datetime(2020, 1, 7, 11), datetime(2019, 12, 1, 12)]
+        for index, stamp in enumerate(stamps):
+            (backups / f"wishes_{stamp.strftime('%Y%m%d_%H%M%S_%f')}_{index:016x}.db.gz").write_bytes(b"x")
+        legacy = backups / "wishes_backup_20190601_120000.db"
+        legacy.write_bytes(b"x")
+
+        service.create_backup()
+        names = [b["name"] for b in service.list_backups()["data"]]
+        # The new backup and the last of Jan 8 by count, Jan 7 by day, December by week
+        assert [name.rsplit('_', 1)[1] for name in names[1:]] == [
+            f"{index:016x}.db.gz" for index in (0, 2, 4)
+        ]
+        assert not legacy.exists()
@@ -41,4 +41,111 @@ class TestDataService:
         # Verify data was saved
         wishes = service.get_wishes()
         assert len(wishes) == 1
-        assert wishes[0]["id"] == "1"
\ No newline at end of file
+        assert wishes[0]["id"] == "1"
+
+    def test_uigf_round_trip(self, service, tmp_path):
+        """Test streaming a UIGF v4 export back in through import."""
+        v3_file = tmp_path / "uigf_v3.json"
+        v3_file.write_text(json.dumps({
+            "info": {"uid": "700000001", "uigf_version": "v3.0", "lang": "en-us"},
+            "list": [
+                {"uigf_gacha_type": "301", "gacha_type": "400", "item_id": "", "count": "1",
+                 "time": "2025-01-01 12:00:00", "name": "Furina", "item_type": "Character",
+                 "rank_type": "5", "id": "1700000000000000001"},
+                {"uigf_gacha_type": "302", "gacha_type": "302", "item_id": "", "count": "1",
+                 "time": "2025-01-01 12:01:00", "name": "Cool Steel", "item_type": "Weapon",
+                 "rank_type": "3", "id": "1700000000000000002"},
+                {"uigf_gacha_type": "100", "gacha_type": "100", "item_id": "", "count": "1",
+                 "time": "2025-01-01 12:02:00", "name": "Noelle", "item_type": "Character",
+                 "rank_type": "4", "id": "1700000000000000003"}
+            ]
+        }), encoding="utf-8")
+
+        result = service.import_uigf(str(v3_file))
+        assert result["success"] is True
+        assert result["count"] == 2
+        assert result["skipped"] == 1
+        assert {w["bannerType"] for w in service.get_wishes()} == {"character-2", "weapon"}
+
+        with patch('backend.services.data_service.Path.home', return_value=tmp_path):
+            exported = service.export_uigf("700000001", app_version="3.0.0")
+        assert exported["count"] == 2
+        document = json.loads(Path(exported["path"]).read_text(encoding="utf-8"))
+        assert document["info"]["version"] == "v4.0"
+        assert document["hk4e"][0]["timezone"] == 1
+        assert [w["id"] for w in document["hk4e"][0]["list"]] == ["1700000000000000001", "1700000000000000002"]
+
+        service.reset_data()
+        result = service.import_uigf(exported["path"])
+        assert result["count"] == 2
+        assert result["uid"] == "700000001"
+        assert len(service.get_wishes()) == 2
+
+    def test_uigf_import_rejects_invalid_json(self, service, tmp_path):
+        """Test that a truncated file is reported instead of half-imported silently."""
+        broken = tmp_path / "broken.json"
+        broken.write_text('{"info": {}, "list": [{"id": "1"', encoding="utf-8")
+        result = service.import_uigf(str(broken))
+        assert result["success"] is False
+        assert "Invalid UIGF file" in result["error"]
+
+    def test_export_data_round_trip(self, service, sample_data, tmp_path):
+        """Test that a streamed JSON export can be imported again."""
+        with patch('backend.services.data_service.Path.home', return_value=tmp_path):
+            assert service.export_data("csv")["error"] == "No data to export"
+            assert service.export_data("xml")["error"] == "Unsupported format"
+
+            service.import_data(json.dumps(sample_data))
+            exported = service.export_data("json")
+        assert exported["success"] is True and exported["count"] == 1
+
+        service.reset_data()
+        result = service.import_data(Path(exported["path"]).read_text(encoding="utf-8"))
+        assert result["count"] == 1
+        assert service.get_wishes() == sample_data
+
+    def test_merge_backup_and_legacy_database(self, service, tmp_path):
+        """Test unioning older history back in, keeping live rows on conflicts."""
+        old = [
+            {"id": str(100 + i), "name": "Cool Steel", "rarity": 3, "type": "Weapon",
+             "time": f"2024-06-01 10:00:{i:02d}", "bannerType": "character-1"}
+            for i in range(5)
+        ]
+        service.import_data(json.dumps(old))
+        backup = service.backup_service.create_backup()
+
+        live = [dict(old[4], name="Furina", rarity=5, type="Character")] + [
+            {"id": str(200 + i), "name": "Slingshot", "rarity": 3, "type": "Weapon",
+             "time": f"2025-01-01 10:00:{i:02d}", "bannerType": "character-1"}
+            for i in range(3)
+        ]
+        service.import_data(json.dumps(live))
+
+        result = service.merge_database(backup["name"])
+        assert result["success"] is True
+        assert (result["inserted"], result["unchanged"], result["conflict_count"]) == (4, 0, 1)
+        assert result["conflicts"][0]["live"]["name"] == "Furina"
+        assert result["conflicts"][0]["source"]["name"] == "Cool Steel"
+
+        wishes = service.get_wishes()
+        assert len(wishes) == 8
+        # Pity is rebuilt across the merged history: 4 older pulls precede Furina
+        with service.db.reader() as conn:
+            assert conn.execute('SELECT pity_5 FROM wishes WHERE id = 104').fetchone()[0] == 5
+
+        # A pre-versioning database file is migrated before it is merged
+        legacy = tmp_path / "legacy.db"
+        with sqlite3.connect(legacy) as conn:
+            conn.execute('''
+                CREATE TABLE wishes (
+                    id TEXT PRIMARY KEY, name TEXT NOT NULL, rarity INTEGER NOT NULL,
+                    type TEXT NOT NULL, time TIMESTAMP NOT NULL, bannerType TEXT NOT NULL
+                )
+            ''')
+            conn.execute("INSERT INTO wishes VALUES ('50', 'Noelle', 4, 'Character', '2024-01-01 00:00:00', 'permanent')")
+        conn.close()
+        result = service.merge_database(str(legacy))
+        assert (result["inserted"], result["source_count"]) == (1, 1)
+        assert legacy.exists() and not list((tmp_path / ".pitypal" / "backups").glob("merge.partial*"))
+
+        assert service.merge_database(str(tmp_path / "missing.db"))["success"] is False
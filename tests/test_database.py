@@ -0,0 +1,171 @@
+# tests/test_database.py
+import sqlite3
+import threading
+import pytest
+from backend.services.database import (
+    PITY_COLUMN, SCHEMA_VERSION, WISH_COLUMNS, Database, get_database, rebuild_summaries, refresh_pity,
+    row_to_wish, upsert_wishes
+)
+from backend.services.pity_calculator import PityCalculator
+from tests.conftest import make_wish, make_wishes
+
+WISH = {"id": "1", "name": "Test Character", "rarity": 5, "type": "Character",
+        "time": "2025-01-01 12:00:00", "bannerType": "character-1"}
+
+class TestDatabase:
+    def test_new_database_is_not_backed_up(self, db, tmp_path):
+        """Test that only existing databases are copied aside before migrating."""
+        assert not list(tmp_path.glob("*.bak"))
+
+    def test_pragmas_and_schema(self, db):
+        """Test WAL mode and that the schema exists after opening."""
+        with db.reader() as conn:
+            assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+            assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        assert {"wishes", "import_checkpoints"} <= tables
+
+    def test_writer_rolls_back_on_error(self, db):
+        """Test that a failed write transaction leaves no rows behind."""
+        with pytest.raises(RuntimeError):
+            with db.writer() as conn:
+                upsert_wishes(conn, [WISH])
+                with db.writer() as nested:
+                    nested.execute('DELETE FROM import_checkpoints')
+                raise RuntimeError("abort")
+
+        with db.reader() as conn:
+            assert conn.execute('SELECT COUNT(*) FROM wishes').fetchone()[0] == 0
+
+    def test_reader_during_open_write(self, db):
+        """Test that readers see the last commit while a write is in progress."""
+        with db.writer() as conn:
+            upsert_wishes(conn, [WISH])
+
+        counts = []
+        with db.writer() as conn:
+            conn.execute('DELETE FROM wishes')
+
+            def read():
+                with db.reader() as reader:
+                    counts.append(reader.execute('SELECT COUNT(*) FROM wishes').fetchone()[0])
+
+            thread = threading.Thread(target=read)
+            thread.start()
+            thread.join(timeout=5)
+
+        assert counts == [1]
+
+    def test_data_version_during_open_write(self, db):
+        """Test that version checks answer during a write and move once it commits."""
+        before = db.data_version()
+        versions = []
+        with db.writer() as conn:
+            upsert_wishes(conn, [WISH])
+            thread = threading.Thread(target=lambda: versions.append(db.data_version()))
+            thread.start()
+            thread.join(timeout=2)
+            # Still inside the write transaction: the check must not have waited for it
+            assert not thread.is_alive()
+
+        assert versions == [before]
+        assert db.data_version() != before
+
+    def test_get_database_is_shared(self, tmp_path):
+        """Test that services opening the same file share one manager."""
+        assert get_database(tmp_path / "shared.db") is get_database(tmp_path / "shared.db")
+
+    def test_migrates_legacy_text_schema(self, tmp_path):
+        """Test that a pre-versioning database is converted to integer ids and epoch times."""
+        db_path = tmp_path / "legacy.db"
+        with sqlite3.connect(db_path) as conn:
+            conn.execute('''
+                CREATE TABLE wishes (
+                    id TEXT PRIMARY KEY, name TEXT NOT NULL, rarity INTEGER NOT NULL,
+                    type TEXT NOT NULL, time TIMESTAMP NOT NULL, bannerType TEXT NOT NULL
+                )
+            ''')
+            # A 10-pull shares one time, and text ids sort 10 before 9
+            conn.executemany('INSERT INTO wishes VALUES (?, ?, ?, ?, ?, ?)', [
+                ("10", "Cool Steel", 3, "Weapon", "2025-01-01 12:00:00", "character-2"),
+                ("9", "Furina", 5, "Character", "2025-01-01 12:00:00", "character-1"),
+                ("20", "Slingshot", 3, "Weapon", "2025-01-02 08:30:15", "weapon"),
+                # Valid under the old schema, but not an integer id or a parseable time
+                ("abc-imported", "Qiqi", 5, "Character", "2025-01-03 12:00:00", "permanent"),
+                ("30", "Diluc", 5, "Character", "2025/01/03 12:00:00", "permanent")
+            ])
+        conn.close()
+
+        db = Database(db_path)
+        with db.reader() as conn:
+            assert conn.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION
+            rows = conn.execute('''
+                SELECT id, name, rarity, type, time, bannerType, banner_group
+                FROM wishes ORDER BY banner_group, id
+            ''').fetchall()
+            quarantined = conn.execute('SELECT id, time FROM wishes_quarantine ORDER BY id').fetchall()
+        db.close()
+
+        assert [tuple(row) for row in quarantined] == [("30", "2025/01/03 12:00:00"),
+                                                        ("abc-imported", "2025-01-03 12:00:00")]
+        # The untouched legacy database is kept next to the migrated one
+        backup, = tmp_path.glob("legacy.v0-*.bak")
+        with sqlite3.connect(backup) as conn:
+            assert conn.execute('SELECT COUNT(*) FROM wishes').fetchone()[0] == 5
+        conn.close()
+
+        assert [(row['id'], row['banner_group']) for row in rows] == [(9, 1), (10, 1), (20, 2)]
+        assert row_to_wish(rows[2]) == {
+            "id": "20", "name": "Slingshot", "rarity": 3, "type": "Weapon",
+            "time": "2025-01-02 08:30:15", "bannerType": "weapon"
+        }
+
+    def test_stored_pity_matches_calculator(self, db):
+        """Test that pity kept up to date batch by batch matches a full recalculation."""
+        wishes = make_wishes(400, seed=7)
+        # Imports arrive newest first, and a later re-import changes one wish
+        for start in range(360, -40, -40):
+            with db.writer() as conn:
+                upsert_wishes(conn, wishes[start:start + 40])
+        wishes[124] = dict(wishes[124], rarity=5)
+        with db.writer() as conn:
+            counts = upsert_wishes(conn, wishes[100:150])
+        assert counts == {"inserted": 0, "updated": 1, "unchanged": 49}
+
+        with db.reader() as conn:
+            stored = [row_to_wish(row) for row in conn.execute(
+                f'SELECT {WISH_COLUMNS}, {PITY_COLUMN} FROM wishes ORDER BY time DESC, id DESC'
+            )]
+        assert stored == PityCalculator().calculate_pull_counts(wishes)
+
+    def test_full_pity_rebuild(self, db):
+        """Test that rebuilding every group's pity at once matches a full recalculation."""
+        wishes = make_wishes(1000, seed=3)
+        with db.writer() as conn:
+            upsert_wishes(conn, wishes)
+            conn.execute('UPDATE wishes SET pity_5 = 0, pity_4 = 0 WHERE id % 3 = 0')
+            refresh_pity(conn)
+            stored = [row_to_wish(row) for row in conn.execute(
+                f'SELECT {WISH_COLUMNS}, {PITY_COLUMN} FROM wishes ORDER BY time DESC, id DESC'
+            )]
+        assert stored == PityCalculator().calculate_pull_counts(wishes)
+
+    def test_summaries_follow_writes(self, db):
+        """Test that trigger-maintained totals match a rebuild after inserts, updates and deletes."""
+        def summaries(conn):
+            return (
+                conn.execute('SELECT * FROM wish_totals WHERE wishes > 0 ORDER BY 1, 2').fetchall(),
+                conn.execute('SELECT * FROM item_totals ORDER BY 1, 2, 3').fetchall()
+            )
+
+        wishes = [make_wish(i, name=f"Item {i % 7}", rarity=3 + i % 3,
+                            bannerType=["character-1", "weapon", "permanent"][i % 3]) for i in range(60)]
+        with db.writer() as conn:
+            upsert_wishes(conn, wishes)
+            upsert_wishes(conn, [dict(wishes[15], bannerType="chronicled", name="Item 9")])
+            conn.execute('DELETE FROM wishes WHERE id < 1010')
+            live = summaries(conn)
+            rebuild_summaries(conn)
+            assert summaries(conn) == live
+            assert conn.execute("SELECT obtained FROM item_totals WHERE name = 'Item 9'").fetchone()[0] == 1
+            assert conn.execute('SELECT SUM(wishes) FROM wish_totals').fetchone()[0] == 50
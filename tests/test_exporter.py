@@ -0,0 +1,91 @@
+# tests/test_exporter.py
+import csv
+import json
+import pytest
+from backend.services.database import upsert_wishes
+from backend.services.exporter import export_wishes
+
+WISHES = [
+    {"id": "1700000000000000003", "name": "Noelle", "rarity": 4, "type": "Character",
+     "time": "2025-01-01 12:00:00", "bannerType": "character-1"},
+    {"id": "1700000000000000002", "name": "Furina", "rarity": 5, "type": "Character",
+     "time": "2025-01-01 12:00:00", "bannerType": "character-1"},
+    {"id": "1700000000000000001", "name": "Cool Steel", "rarity": 3, "type": "Weapon",
+     "time": "2024-12-31 23:59:59", "bannerType": "character-1"}
+]
+OLDEST_FIRST = ["1700000000000000001", "1700000000000000002", "1700000000000000003"]
+
+class TestExporter:
+    @pytest.fixture
+    def db(self, db):
+        with db.writer() as conn:
+            upsert_wishes(conn, WISHES)
+        return db
+
+    def test_json_and_jsonl(self, db, tmp_path):
+        """Test that JSON and JSON Lines exports hold the same wishes, oldest first."""
+        assert export_wishes(db, tmp_path / "out.json", "json", batch_size=2) == 3
+        document = json.loads((tmp_path / "out.json").read_text(encoding="utf-8"))
+        assert [w["id"] for w in document] == OLDEST_FIRST
+        assert document[1] == WISHES[1]
+
+        assert export_wishes(db, tmp_path / "out.jsonl", "jsonl", with_pity=True, batch_size=2) == 3
+        lines = (tmp_path / "out.jsonl").read_text(encoding="utf-8").splitlines()
+        records = [json.loads(line) for line in lines]
+        assert [(w["id"], w["pity"]) for w in records] == [
+            ("1700000000000000001", 0), ("1700000000000000002", 2), ("1700000000000000003", 3)
+        ]
+
+    def test_csv(self, db, tmp_path):
+        """Test CSV export with an optional pity column."""
+        export_wishes(db, tmp_path / "out.csv", "csv", with_pity=True)
+        with open(tmp_path / "out.csv", encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert list(rows[0]) == ["id", "name", "rarity", "type", "time", "bannerType", "pity"]
+        assert [row["name"] for row in rows] == ["Cool Steel", "Furina", "Noelle"]
+        assert rows[1]["pity"] == "2"
+
+    def test_parquet_row_groups(self, db, tmp_path):
+        """Test that each batch becomes a Parquet row group with typed columns."""
+        pq = pytest.importorskip("pyarrow.parquet")
+        export_wishes(db, tmp_path / "out.parquet", "parquet", batch_size=2)
+        parquet = pq.ParquetFile(tmp_path / "out.parquet")
+        assert parquet.metadata.num_row_groups == 2
+        table = parquet.read()
+        assert table.column_names == ["id", "name", "rarity", "type", "time", "bannerType"]
+        assert table.column("id").to_pylist() == [int(i) for i in OLDEST_FIRST]
+        assert str(table.column("time")[0].as_py()) == "2024-12-31 23:59:59"
+
+    def test_progress_and_errors(self, db, tmp_path):
+        """Test progress events and that a failed export leaves no file behind."""
+        events = []
+        export_wishes(db, tmp_path / "out.csv", "csv", progress_callback=events.append)
+        assert events[0]["rows"] == 0 and events[0]["total"] == 3
+        assert events[-1] == {"stage": "done", "format": "csv", "rows": 3, "total": 3, "percent": 100.0}
+
+        with pytest.raises(ValueError):
+            export_wishes(db, tmp_path / "out.xml", "xml")
+        assert not (tmp_path / "out.xml").exists()
+
+    def test_excel_sheets_and_summary(self, db, tmp_path):
+        """Test the write-only workbook: a sheet per banner with pity, and a summary."""
+        openpyxl = pytest.importorskip("openpyxl")
+        with db.writer() as conn:
+            upsert_wishes(conn, [{"id": "1700000000000000004", "name": "Slingshot", "rarity": 3,
+                                  "type": "Weapon", "time": "2025-01-02 08:00:00", "bannerType": "weapon"}])
+        assert export_wishes(db, tmp_path / "out.xlsx", "xlsx", batch_size=2) == 4
+
+        workbook = openpyxl.load_workbook(tmp_path / "out.xlsx")
+        assert workbook.sheetnames == ["Summary", "Character Event", "Weapon Event"]
+        character = list(workbook["Character Event"].iter_rows(values_only=True))
+        assert character[0] == ('Time', 'Name', 'Type', 'Rarity', 'Banner', 'Pity', '5★ Pity', '4★ Pity', 'ID')
+        assert [row[1] for row in character[1:]] == ["Cool Steel", "Furina", "Noelle"]
+        assert character[2][5] == 2 and character[3][5] == 3 and character[1][5] is None
+        assert character[3][8] == "1700000000000000003"
+        assert str(character[1][0]) == "2024-12-31 23:59:59"
+
+        summary = list(workbook["Summary"].iter_rows(values_only=True))
+        assert summary[1] == ("Character Event", 3, 1, 1, 33.33, 2, 1, 0)
+        assert summary[2][:2] == ("Weapon Event", 1) and summary[2][6] == 1
+        assert summary[-1][:4] == ("Total", 4, 1, 1)
+        assert workbook["Character Event"].column_dimensions["B"].width == 12
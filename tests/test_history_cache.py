@@ -0,0 +1,52 @@
+# tests/test_history_cache.py
+import sqlite3
+import pytest
+from backend.services.database import upsert_wishes
+from backend.services.history_cache import get_history_cache
+from tests.conftest import make_wish
+
+# Every fifth wish is a 5★ Furina
+WISHES = [make_wish(i, **({"name": "Furina", "rarity": 5, "type": "Character"} if i % 5 == 4 else {}))
+          for i in range(10)]
+
+class TestHistoryCache:
+    @pytest.fixture
+    def db(self, db):
+        with db.writer() as conn:
+            upsert_wishes(conn, WISHES)
+        return db
+
+    def test_columns_match_rows(self, db):
+        """Test the columnar layout, dictionary encoding and materialized records."""
+        columns = get_history_cache(db).get()
+        assert len(columns) == 10
+        assert columns.ids.tolist() == [1009 - i for i in range(10)]
+        assert sorted(columns.names) == ["Cool Steel", "Furina"]
+        assert [columns.names[code] for code in columns.name_codes[:2]] == ["Furina", "Cool Steel"]
+        assert columns.records(with_pity=True)[0] == {**WISHES[9], "pity": 5}
+
+    def test_rebuilt_only_after_real_writes(self, db):
+        """Test that reads reuse the snapshot and only changing writes invalidate it."""
+        cache = get_history_cache(db)
+        first = cache.get()
+        assert cache.get() is first
+
+        # Re-saving identical wishes writes nothing, so the snapshot stays valid
+        with db.writer() as conn:
+            assert upsert_wishes(conn, WISHES)["unchanged"] == 10
+        assert cache.get() is first
+
+        with db.writer() as conn:
+            upsert_wishes(conn, [make_wish(3, name="Xingqiu")])
+        second = cache.get()
+        assert second is not first and "Xingqiu" in second.names
+        assert cache.builds == 2
+
+    def test_external_write_invalidates(self, db):
+        """Test that a commit from another connection is caught through data_version."""
+        cache = get_history_cache(db)
+        first = cache.get()
+        with sqlite3.connect(db.db_path) as conn:
+            conn.execute('DELETE FROM wishes WHERE id = 1000')
+        conn.close()
+        assert len(cache.get()) == 9 and cache.get() is not first
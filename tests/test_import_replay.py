@@ -0,0 +1,99 @@
+# tests/test_import_replay.py
+import pytest
+from unittest.mock import patch
+from backend.services.wish_service import WishService
+from tests.gacha_log_replay import GachaLogReplayAdapter, install_replay
+
+# End-to-end imports against the offline getGachaLog replay adapter
+
+URL = "https://public-operation-hk4e-sg.hoyoverse.com/gacha_info/api/getGachaLog?authkey=testkey"
+
+class TestImportReplay:
+    @pytest.fixture
+    def service(self, tmp_path):
+        with patch('backend.services.wish_service.Path.home') as mock_home:
+            mock_home.return_value = tmp_path
+            return WishService()
+
+    @pytest.fixture(autouse=True)
+    def no_backoff_sleep(self):
+        with patch('backend.services.rate_limiter.time.sleep'):
+            yield
+
+    def test_full_history_import(self, service):
+        """Test that every page of every banner is imported."""
+        adapter = install_replay(service, GachaLogReplayAdapter({"301": 95, "302": 41, "200": 20}), 1000)
+
+        result = service.import_from_url(URL)
+
+        assert result["success"] is True
+        assert result["new_counts"] == {
+            "character-1": 95, "character-2": 0, "weapon": 41, "permanent": 20, "chronicled": 0
+        }
+        assert len(service.get_history()) == 156
+        # 5 + 3 + 1 full pages plus one empty page per banner
+        assert adapter.requests == 9 + 5
+
+    def test_incremental_refresh_fetches_only_new_pages(self, service):
+        """Test that a second import only walks the pages holding new wishes."""
+        adapter = install_replay(service, GachaLogReplayAdapter({"301": 200, "302": 100}), 1000)
+        service.import_from_url(URL)
+
+        adapter.add_wishes("301", 12)
+        adapter.requests = 0
+        result = service.import_from_url(URL)
+
+        assert result["new_counts"]["character-1"] == 12
+        assert len(service.get_history()) == 312
+        # One page reaches the known wishes on each populated banner, one empty page elsewhere
+        assert adapter.requests == 5
+
+    def test_import_survives_throttling(self, service):
+        """Test that injected throttling retcodes are retried instead of failing."""
+        adapter = install_replay(
+            service, GachaLogReplayAdapter({"301": 300}, throttle_rate=0.3, seed=7), 1000
+        )
+
+        result = service.import_from_url(URL)
+
+        assert result["success"] is True
+        assert adapter.throttled > 0
+        assert len(service.get_history()) == 300
+
+    def test_failed_import_resumes(self, service):
+        """Test that an import broken by connection failures completes on the next run."""
+        adapter = install_replay(
+            service, GachaLogReplayAdapter({"301": 400}, failure_rate=0.2, seed=3), 1000
+        )
+
+        result = service.import_from_url(URL)
+        assert result["success"] is False
+        assert 0 < len(service.get_history()) < 400
+
+        adapter.failure_rate = 0.0
+        result = service.import_from_url(URL)
+
+        assert result["success"] is True
+        assert len(service.get_history()) == 400
+        assert service._load_checkpoints() == {}
+
+    def test_import_sessions_record_new_wishes(self, service):
+        """Test that each import is recorded with exactly the wishes it added."""
+        adapter = install_replay(service, GachaLogReplayAdapter({"301": 30, "302": 10}), 1000)
+        first = service.import_from_url(URL)
+        adapter.add_wishes("301", 4)
+        second = service.import_from_url(URL)
+        service.import_from_url(URL)
+
+        sessions = service.get_import_sessions(limit=2)["data"]
+        assert [s["id"] for s in sessions] == [second["session_id"] + 1, second["session_id"]]
+        assert sessions[0]["new_count"] == 0 and sessions[0]["wishes"] == []
+        assert sessions[1]["status"] == "completed" and sessions[1]["source"] == "game"
+        assert sessions[1]["banner_counts"] == {"character-1": 4}
+        newest = service.get_history()[0]
+        assert [w["id"] for w in sessions[1]["wishes"]][0] == newest["id"] == sessions[1]["last_wish_id"]
+        assert len(sessions[1]["wishes"]) == 4 and "pity" in sessions[1]["wishes"][0]
+
+        oldest = service.get_import_sessions(limit=50, with_wishes=False)["data"][-1]
+        assert oldest["id"] == first["session_id"] and oldest["new_count"] == 40
+        assert "wishes" not in oldest
@@ -35,4 +35,51 @@ class TestPityCalculator:
         result = calculator.calculate_pull_counts(mock_wishes)
         assert len(result) == len(mock_wishes)
         # Check that pity field was added
-        assert 'pity' in result[0]
\ No newline at end of file
+        assert 'pity' in result[0]
+
+    def test_pull_counts_order_ten_pull_by_id(self, calculator):
+        """Test that wishes sharing a timestamp are counted in wish id order."""
+        ten_pull = [
+            {"id": str(100 + i), "name": "Cool Steel", "rarity": 3, "type": "Weapon",
+             "time": "2025-01-01 12:00:00", "bannerType": "character-1"}
+            for i in range(10)
+        ]
+        ten_pull[6] = dict(ten_pull[6], name="Test Character", rarity=5)
+        result = calculator.calculate_pull_counts(list(reversed(ten_pull)))
+        assert [w["id"] for w in result] == [str(109 - i) for i in range(10)]
+        assert [w["pity"] for w in result if w["rarity"] == 5] == [7]
+
+    def test_banner_states_one_pass(self, calculator):
+        """Test pity, guarantees, loss streaks and averages for every banner group."""
+        def wish(i, banner, rarity=3, name="Cool Steel", item_type="Weapon"):
+            return {"id": str(1000 + i), "name": name, "rarity": rarity, "type": item_type,
+                    "time": f"2025-01-01 12:{i // 60:02d}:{i % 60:02d}", "bannerType": banner}
+
+        wishes = [wish(i, "character-1") for i in range(40)]
+        wishes[9] = wish(9, "character-1", 5, "Qiqi", "Character")       # lost 50/50 at 10
+        wishes[29] = wish(29, "character-2", 5, "Furina", "Character")   # guaranteed at 20
+        wishes[34] = wish(34, "character-1", 5, "Diluc", "Character")    # lost 50/50 at 5
+        wishes[36] = wish(36, "character-1", 4, "Favonius Sword")        # off-banner 4★
+        wishes += [wish(40 + i, "weapon") for i in range(3)]
+        wishes += [wish(50, "chronicled", 4, "Noelle", "Character")]
+
+        states = calculator.calculate_banner_states(list(reversed(wishes)))
+        character = states["banners"]["character"]
+        assert (character["current"], character["current_4"]) == (5, 3)
+        assert character["guaranteed"] is True and character["guaranteed_4"] is True
+        assert character["fifty_fifty"] == {"won": 0, "lost": 2}
+        # The guaranteed pull between the two losses is not a 50/50, so the streak continues
+        assert (character["loss_streak"], character["max_loss_streak"]) == (2, 2)
+        assert (character["average_pity"], character["median_pity"]) == (11.7, 10)
+        assert (character["total"], character["five_stars"], character["four_stars"]) == (40, 3, 1)
+
+        assert states["banners"]["weapon"]["current"] == 3
+        assert states["banners"]["chronicled"]["four_stars"] == 1
+        assert states["banners"]["permanent"] == calculator.calculate(None, "permanent") | {
+            "current_4": 0, "guaranteed_4": False, "wishes_to_4": 10, "fifty_fifty": {"won": 0, "lost": 0},
+            "loss_streak": 0, "max_loss_streak": 0, "total": 0, "five_stars": 0, "four_stars": 0,
+            "average_pity": 0, "median_pity": 0, "average_pity_4": 0
+        }
+        assert states["stats"]["total_wishes"] == 44
+        assert set(states["stats"]["banner_stats"]) == {"character", "weapon", "chronicled"}
+        assert calculator.calculate(wishes, "character-2")["current"] == 5
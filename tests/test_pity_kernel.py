@@ -0,0 +1,53 @@
+# tests/test_pity_kernel.py
+import numpy as np
+from backend.services.pity_calculator import PityCalculator
+from backend.services.pity_kernel import (
+    banner_aggregates, chronological_order, displayed_pity, pity_counters
+)
+
+def reference_counters(groups, rarity, order):
+    pity_5 = np.zeros(len(order), dtype=np.int64)
+    pity_4 = np.zeros(len(order), dtype=np.int64)
+    counters = {}
+    for row in order:
+        since_5, since_4 = counters.get(groups[row], (0, 0))
+        since_5, since_4 = since_5 + 1, since_4 + 1
+        pity_5[row], pity_4[row] = since_5, since_4
+        counters[groups[row]] = (0 if rarity[row] == 5 else since_5, 0 if rarity[row] == 4 else since_4)
+    return pity_5, pity_4
+
+class TestPityKernel:
+    def test_chronological_order_breaks_ties_by_id(self):
+        """Test that equal times are ordered by wish id."""
+        times = np.array(["2025-01-02", "2025-01-01", "2025-01-01"])
+        ids = np.array([1, 3, 2])
+        assert chronological_order(times, ids).tolist() == [2, 1, 0]
+
+    def test_counters_match_loop(self):
+        """Test the grouped counters and aggregates against a per-wish loop."""
+        rng = np.random.default_rng(3)
+        groups = rng.integers(0, 4, 5000)
+        rarity = rng.choice([3, 3, 3, 3, 3, 3, 4, 5], 5000)
+        order = rng.permutation(5000)
+
+        pity_5, pity_4 = pity_counters(groups, rarity, order)
+        expected_5, expected_4 = reference_counters(groups, rarity, order)
+        assert pity_5.tolist() == expected_5.tolist()
+        assert pity_4.tolist() == expected_4.tolist()
+        assert displayed_pity(rarity, pity_5, pity_4)[rarity == 3].sum() == 0
+
+        values = banner_aggregates(groups, rarity, order, pity_5, pity_4, 4)
+        for group in range(4):
+            hits = sorted(pity_5[(groups == group) & (rarity == 5)])
+            assert values["five_stars"][group] == len(hits)
+            assert values["pity_5_sum"][group] == sum(hits)
+            assert (values["median_low"][group] + values["median_high"][group]) / 2 == np.median(hits)
+            newest = [row for row in order if groups[row] == group][-1]
+            assert values["current_5"][group] == (0 if rarity[newest] == 5 else pity_5[newest])
+
+    def test_empty_history(self):
+        """Test that an empty history gives zeroed states for every group."""
+        calculator = PityCalculator()
+        states = calculator.calculate_banner_states([])
+        assert states["stats"]["total_wishes"] == 0
+        assert calculator.calculate_pull_counts([]) == []
@@ -0,0 +1,49 @@
+# tests/test_rate_limiter.py
+import pytest
+from unittest.mock import patch
+from backend.services.rate_limiter import TokenBucket, AdaptiveRateLimiter
+
+class TestTokenBucket:
+    def test_first_token_is_immediate(self):
+        """Test that a full bucket hands out its burst without waiting."""
+        bucket = TokenBucket(rate=2.0, capacity=1.0)
+        with patch('backend.services.rate_limiter.time.sleep') as mock_sleep:
+            assert bucket.acquire() == 0
+            mock_sleep.assert_not_called()
+
+    def test_waits_are_spaced_by_rate(self):
+        """Test that back-to-back callers queue up at 1/rate intervals."""
+        bucket = TokenBucket(rate=2.0, capacity=1.0)
+        with patch('backend.services.rate_limiter.time.monotonic', return_value=100.0), \
+             patch('backend.services.rate_limiter.time.sleep'):
+            bucket._updated = 100.0
+            waits = [bucket.acquire() for _ in range(4)]
+        assert waits == pytest.approx([0.0, 0.5, 1.0, 1.5])
+
+    def test_invalid_rate(self):
+        """Test that a non-positive rate is rejected."""
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestAdaptiveRateLimiter:
+    def test_backoff_and_recovery(self):
+        """Test that throttling halves the rate and a run of successes restores it."""
+        limiter = AdaptiveRateLimiter(rate=2.0, base_delay=1.0, recovery_successes=2)
+        with patch('backend.services.rate_limiter.time.sleep') as mock_sleep:
+            delay = limiter.backoff()
+        assert limiter.rate == 1.0
+        assert 0.5 <= delay <= 1.0
+        mock_sleep.assert_called_once_with(delay)
+
+        for _ in range(10):
+            limiter.record_success()
+        assert limiter.rate == 2.0
+
+    def test_rate_never_drops_below_minimum(self):
+        """Test that repeated throttling stops at min_rate."""
+        limiter = AdaptiveRateLimiter(rate=2.0, min_rate=0.5, base_delay=0.0)
+        with patch('backend.services.rate_limiter.time.sleep'):
+            for _ in range(5):
+                limiter.backoff()
+        assert limiter.rate == 0.5
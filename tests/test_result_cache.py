@@ -0,0 +1,100 @@
+# tests/test_result_cache.py
+import copy
+import time
+import threading
+import pytest
+from backend.services.database import upsert_wishes
+from backend.services.result_cache import ResultCache, freeze
+from tests.conftest import make_wish, make_wishes
+
+class TestResultCache:
+    def test_hits_until_write(self, db):
+        """Test that repeat calls are served from memory until a write changes the data."""
+        cache = ResultCache(db)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {"success": True, "data": len(calls)}
+
+        assert cache.get_or_compute("stats", (), {}, compute)["data"] == 1
+        assert cache.get_or_compute("stats", (), {}, compute)["data"] == 1
+        assert cache.get_or_compute("stats", ({"banner": "weapon"},), {}, compute)["data"] == 2
+
+        with db.writer() as conn:
+            upsert_wishes(conn, [make_wish(0)])
+        assert cache.get_or_compute("stats", (), {}, compute)["data"] == 3
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 3
+
+        cache.clear()
+        assert cache.get_or_compute("stats", (), {}, compute)["data"] == 4
+
+    def test_lookups_during_open_write(self, db):
+        """Test that cached reads are answered while an import holds the write transaction."""
+        cache = ResultCache(db)
+        compute = lambda: {"success": True, "data": 1}
+        cache.get_or_compute("stats", (), {}, compute)
+        results = []
+        with db.writer() as conn:
+            upsert_wishes(conn, [make_wish(0)])
+            thread = threading.Thread(target=lambda: results.append(cache.get_or_compute("stats", (), {}, compute)))
+            thread.start()
+            thread.join(timeout=2)
+            assert not thread.is_alive()
+        assert results == [{"success": True, "data": 1}]
+        assert cache.stats()["hits"] == 1
+
+    def test_hits_are_read_only(self, db):
+        """Test that no caller can change what later callers get, and hits match misses."""
+        cache = ResultCache(db)
+        compute = lambda: {"success": True, "data": {5: [{"id": "1", "pity": 10}]}}
+        first = cache.get_or_compute("history", (), {}, compute)
+        with pytest.raises(TypeError):
+            first["data"][5].clear()
+        with pytest.raises(TypeError):
+            first["data"][5][0]["pity"] = 99
+
+        hit = cache.get_or_compute("history", (), {}, compute)
+        assert hit is first and hit == compute()
+        mutable = copy.deepcopy(hit)
+        mutable["data"][5][0]["pity"] = 99
+        assert type(mutable["data"]) is dict and hit["data"][5][0]["pity"] == 10
+
+    def test_hit_cheaper_than_miss(self, db):
+        """Test that a hit on a large result skips the work a miss does."""
+        cache = ResultCache(db)
+        compute = lambda: {"success": True, "data": make_wishes(20000)}
+
+        started = time.perf_counter()
+        cache.get_or_compute("history", (), {}, compute)
+        miss = time.perf_counter() - started
+        started = time.perf_counter()
+        cache.get_or_compute("history", (), {}, compute)
+        hit = time.perf_counter() - started
+        assert cache.stats()["hits"] == 1
+        assert hit * 100 < miss
+
+    def test_failures_are_not_stored(self, db):
+        """Test that error results are recomputed on the next call."""
+        cache = ResultCache(db)
+        cache.get_or_compute("stats", (), {}, lambda: {"success": False, "error": "boom"})
+        assert cache.stats()["entries"] == 0
+
+    def test_lru_eviction_under_cap(self, db):
+        """Test that the least recently used entries go once the size cap is passed."""
+        result = {"success": True, "data": ["x" * 1000]}
+        cache = ResultCache(db, max_bytes=freeze(result)[1] * 2)
+        cache.get_or_compute("a", (), {}, lambda: dict(result))
+        cache.get_or_compute("b", (), {}, lambda: dict(result))
+        cache.get_or_compute("a", (), {}, lambda: dict(result))
+        cache.get_or_compute("c", (), {}, lambda: dict(result))
+
+        stats = cache.stats()
+        assert (stats["entries"], stats["evictions"]) == (2, 1)
+        assert stats["bytes"] <= stats["max_bytes"]
+        # "b" was the least recently used, so it is the one recomputed
+        cache.get_or_compute("a", (), {}, lambda: dict(result))
+        assert cache.stats()["hits"] == 2
+        cache.get_or_compute("b", (), {}, lambda: dict(result))
+        assert cache.stats()["misses"] == 4
@@ -0,0 +1,65 @@
+# tests/test_stats_service.py
+import pytest
+from backend.services.database import upsert_wishes
+from backend.services.pity_calculator import PityCalculator
+from backend.services.stats_service import StatsService
+from tests.conftest import make_wish, make_wishes
+
+DAY_TWO = "2025-03-02 10:00:00"
+
+class TestStatsService:
+    def test_matches_calculator(self, db):
+        """Test that the SQL stats equal the banner states computed in Python."""
+        wishes = make_wishes(5000, seed=11)
+        with db.writer() as conn:
+            upsert_wishes(conn, wishes)
+        calculator = PityCalculator()
+        assert StatsService(db, calculator).get_stats() == calculator.calculate_banner_states(wishes)
+
+    def test_totals_from_summaries(self, db):
+        """Test dashboard totals and item counts read from the summary tables."""
+        wishes = make_wishes(2000, seed=11)
+        with db.writer() as conn:
+            upsert_wishes(conn, wishes)
+        totals = StatsService(db).get_totals(item_limit=3)
+
+        assert totals["total_wishes"] == 2000
+        assert totals["total_five_stars"] == sum(wish["rarity"] == 5 for wish in wishes)
+        assert totals["banners"]["weapon"]["total"] == sum(wish["bannerType"] == "weapon" for wish in wishes)
+        assert len(totals["items"]) == 3
+        assert all(item["rarity"] >= 4 for item in totals["items"])
+        assert totals["items"][0]["obtained"] >= totals["items"][-1]["obtained"]
+
+    def test_empty_history(self, db):
+        """Test that every banner group is reported with zeroed stats."""
+        stats = StatsService(db).get_stats()
+        assert list(stats["banners"]) == ["character", "weapon", "permanent", "chronicled"]
+        assert stats["banners"]["character"]["current"] == 0
+        assert stats["stats"]["total_wishes"] == 0
+
+    def test_filters_keep_full_history_pity(self, db):
+        """Test that a date range counts pity from before the range and carries the guarantee."""
+        # Day two's wishes share one timestamp, so they are ordered by id
+        wishes = [make_wish(i) for i in range(20)]
+        wishes[9] = make_wish(9, rarity=5, name="Diluc", type="Character")                 # lost at 10
+        wishes += [make_wish(20 + i, time=DAY_TWO) for i in range(15)]
+        wishes[29] = make_wish(29, rarity=5, name="Furina", type="Character", time=DAY_TWO)  # guaranteed at 20
+        wishes += [make_wish(40 + i, bannerType="weapon", time=DAY_TWO) for i in range(5)]
+        with db.writer() as conn:
+            upsert_wishes(conn, wishes)
+        service = StatsService(db)
+
+        day_two = service.get_stats({"date_from": "2025-03-02", "date_to": "2025-03-02", "banner": "character"})
+        assert list(day_two["banners"]) == ["character"]
+        character = day_two["banners"]["character"]
+        assert (character["total"], character["five_stars"], character["average_pity"]) == (15, 1, 20.0)
+        assert character["fifty_fifty"] == {"won": 0, "lost": 0}
+        assert (character["current"], character["guaranteed"]) == (5, False)
+
+        day_one = service.get_stats({"date_to": "2025-03-01"})
+        assert day_one["banners"]["character"]["guaranteed"] is True
+        assert day_one["banners"]["character"]["fifty_fifty"] == {"won": 0, "lost": 1}
+        assert day_one["banners"]["weapon"]["total"] == 0
+
+        with pytest.raises(ValueError):
+            service.get_stats({"banner": "beginner"})
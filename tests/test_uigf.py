@@ -0,0 +1,63 @@
+# tests/test_uigf.py
+import io
+import json
+import pytest
+from backend.services.uigf import JsonStreamReader, UIGFReader, UIGFFormatError, write_uigf
+
+def _record(index, gacha_type="301"):
+    return {"uigf_gacha_type": gacha_type, "gacha_type": gacha_type, "item_id": "", "count": "1",
+            "time": "2025-01-01 12:00:00", "name": f"Item {index}", "item_type": "Weapon",
+            "rank_type": "3", "id": str(1700000000000000000 + index)}
+
+def test_stream_reader_across_chunk_boundaries():
+    """Test that values split over tiny read chunks decode intact."""
+    document = {"a": [1, 23456, -7.5e3, "x\"y", {"b": None}], "c": True}
+    reader = JsonStreamReader(io.StringIO(json.dumps(document)), chunk_size=3)
+    result = {}
+    for key in reader.iter_object():
+        if key == "a":
+            result[key] = []
+            for _ in reader.iter_array():
+                result[key].append(reader.read_value())
+        else:
+            result[key] = reader.read_value()
+    assert result == document
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 4, 5, 7])
+def test_stream_reader_splits_numbers(chunk_size):
+    """Test that fractions, exponents and signs split at any chunk boundary decode whole."""
+    text = '[12.5, 2e3, 1000, -0.25, 6.02E+23, 1e-7, 0, -3]'
+    reader = JsonStreamReader(io.StringIO(text), chunk_size=chunk_size)
+    values = [reader.read_value() for _ in reader.iter_array()]
+    assert values == json.loads(text)
+
+def test_reader_picks_requested_v4_account():
+    """Test that only the requested account of a multi-account v4 file is read."""
+    document = {
+        "info": {"version": "v4.0"},
+        "hk4e": [
+            {"uid": "800000001", "timezone": 8, "lang": "en-us", "list": [_record(1)]},
+            {"uid": "700000002", "timezone": 1, "lang": "en-us", "list": [_record(2), _record(3, "302")]}
+        ]
+    }
+    reader = UIGFReader(io.StringIO(json.dumps(document)), uid="700000002")
+    wishes = list(reader)
+    assert [w["bannerType"] for w in wishes] == ["character-1", "weapon"]
+    assert reader.skipped_accounts == 1
+    assert reader.version == "v4.0"
+
+def test_reader_requires_a_wish_list():
+    """Test that a JSON file without a UIGF list is rejected."""
+    with pytest.raises(UIGFFormatError):
+        list(UIGFReader(io.StringIO('{"info": {}}')))
+
+def test_writer_produces_valid_json():
+    """Test that the hand-written v4 envelope is valid JSON."""
+    stream = io.StringIO()
+    wishes = [{"id": "1", "name": "Furina", "rarity": 5, "type": "Character",
+               "time": "2025-01-01 12:00:00", "bannerType": "character-2"}]
+    assert write_uigf(stream, wishes, "800000001", "3.0.0") == 1
+    document = json.loads(stream.getvalue())
+    record = document["hk4e"][0]["list"][0]
+    assert record["gacha_type"] == "400"
+    assert record["uigf_gacha_type"] == "301"
@@ -1,7 +1,11 @@
 # tests/test_wish_service.py
 import pytest
+import requests
 from unittest.mock import patch, MagicMock
 from backend.services.wish_service import WishService
+from tests.gacha_log_replay import THROTTLE_RESPONSE, GachaLogReplayAdapter, install_replay
+
+URL = "https://test-url.com?authkey=testkey"
 
 class TestWishService:
     @pytest.fixture
@@ -13,6 +17,11 @@ class TestWishService:
             # Ensure database is initialized
             service.init_database()
             return service
+
+    @pytest.fixture(autouse=True)
+    def no_backoff_sleep(self):
+        with patch('backend.services.rate_limiter.time.sleep'):
+            yield
     
     def test_init_database(self, service, tmp_path):
         """Test database initialization."""
@@ -44,4 +53,152 @@ class TestWishService:
         
         # Verify results
         assert result["success"] is True
-        assert len(result["data"]) > 0
\ No newline at end of file
+        assert len(result["data"]) > 0
+
+    def test_incremental_import_stops_at_known_wish(self, service):
+        """Test that an incremental import stops paginating at the newest stored wish."""
+        adapter = install_replay(service, GachaLogReplayAdapter({"301": 100}), 1000)
+        service.save_wishes(service._process_wish_data(adapter.newest_first("301")[50:]))
+
+        result = service.import_from_url(URL)
+
+        assert result["success"] is True
+        assert result["new_counts"]["character-1"] == 50
+        assert len(result["data"]) == 100
+        # 3 pages of new wishes, then the page reaching the stored ones, plus one empty page per other banner
+        assert adapter.requests == 3 + 4
+
+    def test_import_retries_throttled_page(self, service):
+        """Test that a throttling retcode retries the same page instead of failing."""
+        throttled = []
+
+        def throttle_twice(params):
+            if params["gacha_type"] == "301" and len(throttled) < 2:
+                throttled.append(params["end_id"])
+                return THROTTLE_RESPONSE
+
+        adapter = install_replay(service, GachaLogReplayAdapter({"301": 1}, scenario=throttle_twice), 1000)
+        result = service.import_from_url(URL)
+
+        assert result["success"] is True
+        assert result["new_counts"]["character-1"] == 1
+        requested = [end_id for gacha_type, end_id in adapter.requested if gacha_type == "301"]
+        assert requested == ["0", "0", "0", adapter.newest_first("301")[0]["id"]]
+
+    def test_failed_import_keeps_fetched_pages(self, service):
+        """Test that pages fetched before a network failure are saved and resumed later."""
+        adapter = install_replay(service, GachaLogReplayAdapter({"302": 60}), 1000)
+        history = adapter.newest_first("302")
+        # The connection drops when the third page, after 40 wishes, is requested
+        third_page = history[39]["id"]
+        connection_up = False
+
+        def drop_third_page(params):
+            if not connection_up and params["end_id"] == third_page:
+                raise requests.ConnectionError("connection dropped")
+
+        adapter.scenario = drop_third_page
+        result = service.import_from_url(URL)
+
+        assert result["success"] is False
+        assert len(service.get_history()) == 40
+        assert service._load_checkpoints()["302"]["end_id"] == third_page
+        session = service.get_import_sessions(limit=1, with_wishes=False)["data"][0]
+        assert (session["status"], session["new_count"]) == ("failed", 40)
+
+        # A later import with a fresh authkey resumes from the checkpoint
+        connection_up = True
+        adapter.requested.clear()
+        result = service.import_from_url("https://test-url.com?authkey=newkey")
+
+        assert result["success"] is True
+        assert result["resumed"] == ["weapon"]
+        assert result["new_counts"]["weapon"] == 20
+        assert len(service.get_history()) == 60
+        assert service._load_checkpoints() == {}
+        requested = [end_id for gacha_type, end_id in adapter.requested if gacha_type == "302"]
+        assert requested == [third_page, history[59]["id"], "0"]
+
+    def test_import_reports_progress_events(self, service):
+        """Test that progress events carry per-banner counts and finish at 100%."""
+        install_replay(service, GachaLogReplayAdapter({"200": 1}), 1000)
+        events = []
+
+        service.import_from_url(URL, progress_callback=events.append)
+
+        assert events[0]["stage"] == "fetching"
+        assert events[-1]["stage"] == "done"
+        assert events[-1]["percent"] == 100
+        assert events[-1]["banners"]["permanent"]["rows"] == 1
+        assert events[-1]["requests"] == 6
+
+    def test_save_wishes_skips_unchanged_rows(self, service):
+        """Test that re-saving known wishes reports them unchanged and only writes real changes."""
+        wishes = [
+            {"id": str(i), "name": "Test Weapon", "rarity": 3, "type": "Weapon",
+             "time": "2025-01-01 12:00:00", "bannerType": "weapon"}
+            for i in range(1, 11)
+        ]
+        assert service.save_wishes(wishes) == {"inserted": 10, "updated": 0, "unchanged": 0}
+
+        renamed = [dict(wishes[0], name="Renamed Weapon")] + wishes[1:]
+        extra = {**wishes[0], "id": "11"}
+        assert service.save_wishes(renamed + [extra]) == {"inserted": 1, "updated": 1, "unchanged": 9}
+        assert [w["name"] for w in service.get_history() if w["id"] == "1"] == ["Renamed Weapon"]
+
+    def test_query_history_pages_and_filters(self, service):
+        """Test keyset pagination, totals and server-side filters on the history query."""
+        wishes = [
+            {"id": str(100 + i), "name": "Furina" if i % 10 == 9 else "Cool Steel",
+             "rarity": 5 if i % 10 == 9 else 3, "type": "Character" if i % 10 == 9 else "Weapon",
+             # Ten-pulls share one timestamp
+             "time": f"2025-01-{1 + i // 10:02d} 12:00:00",
+             "bannerType": "character-1" if i < 20 else "weapon"}
+            for i in range(30)
+        ]
+        service.save_wishes(wishes)
+
+        first = service.query_history(limit=12)
+        assert first["total"] == first["overall_total"] == 30
+        second = service.query_history(cursor=first["next_cursor"], limit=12)
+        third = service.query_history(cursor=second["next_cursor"], limit=12)
+        ids = [w["id"] for page in (first, second, third) for w in page["data"]]
+        assert ids == [str(129 - i) for i in range(30)]
+        assert second["total"] is None and third["next_cursor"] is None
+
+        character = service.query_history({"banner": "character", "rarity": "5"}, order="asc")
+        assert [(w["id"], w["pity"]) for w in character["data"]] == [("109", 10), ("119", 10)]
+        assert character["total"] == 2
+
+        dated = service.query_history({"name": "steel", "date_from": "2025-01-02", "date_to": "2025-01-02"})
+        assert dated["total"] == 9
+
+        assert service.query_history({"banner": "nope"})["success"] is False
+        assert service.query_history(cursor="garbage")["success"] is False
+
+    def test_search_wishes_uses_name_index(self, service):
+        """Test prefix and accent-insensitive name search, kept in sync on update and clear."""
+        names = ["Furina", "Cool Steel", "Lumière Mélodie", "芙宁娜", "Furina"]
+        service.save_wishes([
+            {"id": str(200 + i), "name": name, "rarity": 5 if name == "Furina" else 3,
+             "type": "Character", "time": f"2025-02-01 12:0{i}:00", "bannerType": "character-1"}
+            for i, name in enumerate(names)
+        ])
+
+        result = service.search_wishes("furi")
+        assert result["count"] == 2
+        assert [w["id"] for w in result["data"]] == ["204", "200"]
+        assert result["data"][0]["pity"] == 4
+
+        assert [w["name"] for w in service.search_wishes("lumiere melo")["data"]] == ["Lumière Mélodie"]
+        assert service.search_wishes("芙宁")["count"] == 1
+        assert service.search_wishes("furi", {"rarity": 3})["count"] == 0
+        assert service.search_wishes("!!")["data"] == []
+
+        service.save_wishes([{"id": "201", "name": "Furina Plush", "rarity": 3, "type": "Weapon",
+                              "time": "2025-02-01 12:01:00", "bannerType": "character-1"}])
+        assert service.search_wishes("furina")["count"] == 3
+        assert service.search_wishes("cool")["count"] == 0
+
+        service.clear_history()
+        assert service.search_wishes("furina")["count"] == 0